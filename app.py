@@ -4,20 +4,33 @@ import plotly.graph_objects as go
 from datetime import datetime
 import sys
 import os
+import uuid
 from streamlit.components.v1 import html
 
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 from src.core.ensemble_ai import ProfessionalEnsembleAI, PredictionResult
+from src.core.inference_server import InferenceClient
+from src.core.router import ShardedInferenceRouter
+from src.core.scheduler import InferenceScheduler, ScheduledModel
 from src.core.knowledge_graph import KnowledgeGraphVerifier
 from src.core.multi_source import MultiSourceVerifier
+from src.core.pipeline import AnalysisHandle, AnalysisPipeline
 from src.analytics.dashboard import AdvancedDashboard
 from src.analytics.explainable_ai import ExplainableAI
 from src.data.database import AnalysisDatabase
+from src.data.jobs import JobQueue, spawn_worker
+from src.data.partitions import MaintenanceScheduler
 from src.utils.helpers import clean_text, format_confidence, get_verdict_color
 from config import config
 
+# Seconds between reruns while a background analysis is running
+ANALYSIS_POLL_INTERVAL = 0.3
+
+# Latency budgets offered in the UI, in milliseconds; None waits for every stage
+RESPONSE_BUDGETS = {'300 ms': 300, '1 s': 1000, '3 s': 3000, 'Full evidence': None}
+
 # Page configuration
 st.set_page_config(
     page_title="NEXUS TRUTH VERIFIER PRO",
@@ -612,20 +625,52 @@ if (document.readyState === 'loading') {
 
 html(particles_js, height=0)
 
+@st.cache_resource
+def load_components() -> dict:
+    """
+    Models, database and worker pools, built once per server process.
+    
+    Every rerun (including the progress polls of a running analysis) and
+    every session reuses them; only the ``AnalysisHandle`` lives in
+    ``st.session_state``.
+    """
+    # Inference servers schedule the analyses as interactive calls alongside the bulk jobs they serve
+    if config.INFERENCE_NODES:
+        ai_system = ShardedInferenceRouter(config.INFERENCE_NODES).start()
+    elif config.INFERENCE_SOCKET:
+        ai_system = InferenceClient(config.INFERENCE_SOCKET)
+    else:
+        ai_system = ScheduledModel(ProfessionalEnsembleAI(), InferenceScheduler(config.INFERENCE_SLOTS))
+    knowledge_graph = KnowledgeGraphVerifier()
+    multi_source = MultiSourceVerifier()
+    explainable_ai = ExplainableAI()
+    database = AnalysisDatabase()
+    # Archives old months, applies retention and compacts, hourly, for the life of the server
+    MaintenanceScheduler(database, hot_days=config.HISTORY_HOT_DAYS,
+                         retention_days=config.HISTORY_RETENTION_DAYS).start()
+    return {
+        'ai_system': ai_system,
+        'knowledge_graph': knowledge_graph,
+        'multi_source': multi_source,
+        'dashboard': AdvancedDashboard(),
+        'explainable_ai': explainable_ai,
+        'database': database,
+        'pipeline': AnalysisPipeline(ai_system, knowledge_graph, multi_source, explainable_ai),
+        'jobs': JobQueue(database)
+    }
+
 class EnhancedNexusVerifier:
     def __init__(self):
-        self.ai_system = ProfessionalEnsembleAI()
-        self.knowledge_graph = KnowledgeGraphVerifier()
-        self.multi_source = MultiSourceVerifier()
-        self.dashboard = AdvancedDashboard()
-        self.explainable_ai = ExplainableAI()
-        self.database = AnalysisDatabase()
+        for name, component in load_components().items():
+            setattr(self, name, component)
         
         # Initialize session state
         if 'analysis_history' not in st.session_state:
             st.session_state.analysis_history = []
         if 'current_analysis' not in st.session_state:
             st.session_state.current_analysis = None
+        if 'analysis_handle' not in st.session_state:
+            st.session_state.analysis_handle = None
     
     def render_enhanced_header(self):
         """Render premium header with DiscoveryLandCo-inspired design"""
@@ -724,6 +769,9 @@ class EnhancedNexusVerifier:
         with col3:
             enable_deep_analysis = st.checkbox("🧠 Deep Analysis", value=True)
         
+        # Tighter budgets drop optional work (explanation, extra entities, slow models and sources)
+        budget = st.select_slider("⏱ Response budget", options=list(RESPONSE_BUDGETS), value='Full evidence')
+        
         # Action buttons
         col1, col2 = st.columns([3, 1])
         with col1:
@@ -735,6 +783,7 @@ class EnhancedNexusVerifier:
         with col2:
             if st.button("🔄 CLEAR", use_container_width=True):
                 st.session_state.current_analysis = None
+                st.session_state.analysis_handle = None
                 st.rerun()
         
         st.markdown("</div>", unsafe_allow_html=True)
@@ -742,31 +791,31 @@ class EnhancedNexusVerifier:
         return text_input, analyze_clicked, {
             'knowledge_graph': enable_knowledge_graph,
             'multi_source': enable_multi_source,
-            'deep_analysis': enable_deep_analysis
+            'deep_analysis': enable_deep_analysis,
+            'budget_ms': RESPONSE_BUDGETS[budget]
         }
     
-    def perform_comprehensive_analysis(self, text: str, options: dict):
-        """Perform comprehensive analysis with progress tracking"""
-        progress_bar = st.progress(0)
-        status_container = st.empty()
-        
-        steps = [
-            "🔮 Initializing Enhanced AI System...",
-            "🧠 Loading Advanced Models...",
-            "🌐 Connecting to Knowledge Graph...",
-            "🔗 Querying Multi-Source Databases...",
-            "📊 Analyzing Linguistic Patterns...",
-            "🔍 Cross-Referencing Evidence...",
-            "⚡ Generating Comprehensive Assessment...",
-            "✅ Analysis Complete!"
-        ]
-        
-        results = {}
+    def perform_comprehensive_analysis(self, text: str, options: dict) -> AnalysisHandle:
+        """Start the analysis pipeline in the background; the handle survives reruns"""
+        handle = self.pipeline.submit(text, options)
+        st.session_state.analysis_handle = handle
+        return handle
+    
+    def display_analysis_progress(self, handle: AnalysisHandle):
+        """Show the stages finished so far, and the results as they arrive"""
+        results = handle.snapshot()
         
-        for i, step in enumerate(steps):
-            status_container.markdown(f"""
+        if not handle.done():
+            completed, total = handle.progress()
+            st.progress(int(completed * 100 / total) if total else 0)
+            event = handle.last_event
+            status = (f"{event.label} {'✓' if not event.result.error else '✗'} ({event.result.duration:.2f}s)"
+                      if event else "🚀 Starting analysis")
+            st.markdown(f"""
             <div style="text-align: center; padding: 1rem;">
-                <div style="font-size: 1.5rem; margin-bottom: 1rem; color: #00ffff;">{step}</div>
+                <div style="font-size: 1.5rem; margin-bottom: 1rem; color: #00ffff;">
+                    {status}
+                </div>
                 <div class="loading-dots">
                     <div></div>
                     <div></div>
@@ -776,33 +825,18 @@ class EnhancedNexusVerifier:
             </div>
             """, unsafe_allow_html=True)
             
-            progress = (i + 1) * (100 // len(steps))
-            progress_bar.progress(progress)
-            
-            # Perform actual work at certain steps
-            if i == 1:  # After loading models
-                results['ai_analysis'] = self.ai_system.ensemble_predict(text)
-            
-            if i == 2 and options['knowledge_graph']:
-                entities = self.knowledge_graph.extract_entities(text)
-                results['knowledge_evidence'] = self.knowledge_graph.verify_against_knowledge(text, entities)
-            
-            if i == 3 and options['multi_source']:
-                results['multi_source'] = self.multi_source.verify_claim(text)
-            
-            time.sleep(0.8)
-        
-        # Generate explanations
-        if options['deep_analysis'] and 'ai_analysis' in results:
-            results['explanation'] = self.explainable_ai.generate_explanation(
-                results['ai_analysis'], text
-            )
+            # Render the ensemble verdict as soon as it lands; evidence fills in on later reruns
+            if results.get('ai_analysis'):
+                self.display_enhanced_results(results, handle.text, pending=True)
+            return
         
-        status_container.empty()
-        return results
+        self.display_enhanced_results(results, handle.text)
+        if results.get('ai_analysis') and not handle.saved:
+            handle.saved = True
+            self._save_to_history(handle.text, results['ai_analysis'], results)
     
-    def display_enhanced_results(self, results: dict, text: str):
-        """Display comprehensive results"""
+    def display_enhanced_results(self, results: dict, text: str, pending: bool = False):
+        """Display comprehensive results; ``pending`` while later stages are still running"""
         if not results.get('ai_analysis'):
             st.error("❌ Analysis failed. Please try again.")
             return
@@ -811,6 +845,8 @@ class EnhancedNexusVerifier:
         
         # Main verdict display
         self._display_main_verdict(ai_result)
+        if results.get('skipped'):
+            st.caption(f"⏱ Skipped to meet the response budget: {', '.join(results['skipped'])}")
         
         # Detailed analysis in tabs
         tab1, tab2, tab3, tab4 = st.tabs([
@@ -824,16 +860,18 @@ class EnhancedNexusVerifier:
             self._display_detailed_analysis(ai_result, results)
         
         with tab2:
-            self._display_ai_explanation(results.get('explanation'))
+            if pending and not results.get('explanation'):
+                st.info("⏳ Explanation in progress...")
+            else:
+                self._display_ai_explanation(results.get('explanation'))
         
         with tab3:
+            if pending:
+                st.caption("⏳ Evidence is still arriving...")
             self._display_evidence(results, text)
         
         with tab4:
             self._display_analytics(ai_result, results)
-        
-        # Save to history
-        self._save_to_history(text, ai_result, results)
     
     def _display_main_verdict(self, ai_result: PredictionResult):
         """Display main verdict with enhanced visualization"""
@@ -910,6 +948,15 @@ class EnhancedNexusVerifier:
     
     def _display_evidence(self, results: dict, text: str):
         """Display evidence from various sources"""
+        prior_analyses = self.database.search_history(text, limit=5, highlight=('**', '**'))
+        if prior_analyses:
+            st.markdown("#### 🗂️ Prior Analyses of Similar Claims")
+            for prior in prior_analyses:
+                st.markdown(
+                    f"• {prior['snippet']} — **{prior['verdict'].upper()}** "
+                    f"({format_confidence(prior['confidence'])}, analysed {prior['analysis_count']}×)"
+                )
+        
         col1, col2 = st.columns(2)
         
         with col1:
@@ -962,6 +1009,11 @@ class EnhancedNexusVerifier:
         with col4:
             st.metric("Processing Time", f"{ai_result.processing_time:.2f}s")
         
+        if results.get('timings'):
+            with st.expander(f"⏱️ Pipeline latency: {results['latency']:.2f}s"):
+                for stage, seconds in results['timings'].items():
+                    st.write(f"• {stage}: {seconds:.3f}s")
+        
         # Model performance
         st.markdown("#### 🤖 MODEL PERFORMANCE")
         performance = self.ai_system.get_model_performance()
@@ -979,9 +1031,18 @@ class EnhancedNexusVerifier:
                 st.metric(f"{name} Accuracy", f"{data['accuracy']*100:.1f}%")
                 st.metric("Status", data['status'])
         
+        # Streaming sketches: constant-time regardless of history size
+        week_ago = int((time.time() - 7 * 24 * 3600) * 1000)
+        latency = self.database.get_processing_time_quantiles(since_ms=week_ago)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Distinct Claims (7d)", self.database.get_distinct_claims(since_ms=week_ago))
+        with col2:
+            st.metric("p99 Processing Time (7d)", f"{latency['p99']:.0f} ms" if latency['count'] else "n/a")
+        
         # Historical analysis
         st.markdown("#### 📈 SYSTEM ANALYTICS")
-        fig = self.dashboard.create_timeline_analysis([])
+        fig = self.dashboard.create_timeline_analysis(self.database.get_timeline())
         st.plotly_chart(fig, use_container_width=True)
     
     def _save_to_history(self, text: str, ai_result: PredictionResult, results: dict):
@@ -995,18 +1056,45 @@ class EnhancedNexusVerifier:
             'processing_time': ai_result.processing_time
         }
         
-        # Save to database
-        self.database.save_analysis(
-            statement=text,
-            verdict=ai_result.verdict,
-            confidence=ai_result.confidence,
-            model_used=ai_result.model_used
-        )
+        # Queue the full prediction for write-behind persistence so the request never waits on fsync
+        self.database.enqueue_prediction(text, ai_result)
         
         # Save to session state
         st.session_state.analysis_history.append(analysis_record)
         st.session_state.current_analysis = analysis_record
     
+    def render_bulk_jobs(self):
+        """Submit bulk verification jobs and poll their progress without blocking the session"""
+        with st.expander("📦 BULK VERIFICATION JOBS"):
+            uploaded = st.file_uploader("JSONL or CSV file with a 'text' column", type=['jsonl', 'csv'])
+            if uploaded is not None and st.button("📤 SUBMIT JOB", use_container_width=True):
+                upload_dir = os.path.join(os.path.dirname(self.database.db_path), 'jobs')
+                os.makedirs(upload_dir, exist_ok=True)
+                path = os.path.join(upload_dir, f"{uuid.uuid4().hex}_{os.path.basename(uploaded.name)}")
+                with open(path, 'wb') as f:
+                    f.write(uploaded.getbuffer())
+                job_id = self.jobs.submit(path, name=uploaded.name)
+                spawn_worker(self.database.db_path)
+                st.success(f"Job #{job_id} queued - results will be written to {os.path.basename(path)}")
+            
+            jobs = self.jobs.list_jobs(limit=10)
+            if not jobs:
+                st.info("No bulk jobs yet")
+                return
+            
+            for job in jobs:
+                eta = f"ETA {job['eta_seconds']}s" if job['eta_seconds'] is not None else ''
+                st.markdown(f"**#{job['id']} {job['name']}** - {job['status']} - "
+                            f"{job['done_records']:,}/{job['total_records'] or 0:,} claims - "
+                            f"{job['throughput']:,.1f}/s {eta}")
+                st.progress(min(job['progress'], 1.0))
+                if job['status'] == 'completed':
+                    st.caption(job['output_path'])
+                elif job['error']:
+                    st.caption(f"❌ {job['error']}")
+            
+            st.button("🔄 REFRESH STATUS", key="refresh_jobs")
+    
     def render_developer_section(self):
         """Render premium developer section"""
         st.markdown("""
@@ -1090,9 +1178,13 @@ class EnhancedNexusVerifier:
         text_input, analyze_clicked, options = self.render_analysis_interface()
         
         if analyze_clicked and text_input.strip():
-            cleaned_text = clean_text(text_input)
-            results = self.perform_comprehensive_analysis(cleaned_text, options)
-            self.display_enhanced_results(results, cleaned_text)
+            self.perform_comprehensive_analysis(clean_text(text_input), options)
+        
+        handle = st.session_state.analysis_handle
+        if handle is not None:
+            self.display_analysis_progress(handle)
+        
+        self.render_bulk_jobs()
         
         # Render developer section
         self.render_developer_section()
@@ -1106,6 +1198,11 @@ class EnhancedNexusVerifier:
             </p>
         </div>
         """, unsafe_allow_html=True)
+        
+        # Poll the running analysis; any interaction just starts the next rerun sooner
+        if handle is not None and not handle.done():
+            time.sleep(ANALYSIS_POLL_INTERVAL)
+            st.rerun()
 
 # Run the application
 if __name__ == "__main__":
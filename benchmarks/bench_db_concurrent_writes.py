@@ -0,0 +1,100 @@
+"""
+Concurrent-write benchmark for AnalysisDatabase.
+
+Compares the previous connect-per-call, rollback-journal behaviour with the
+pooled WAL connections, while a reader thread keeps querying analytics.
+    
+    python benchmarks/bench_db_concurrent_writes.py --threads 8 --writes 500
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data.database import AnalysisDatabase
+
+LEGACY_SCHEMA = '''
+    CREATE TABLE analysis_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, statement TEXT NOT NULL,
+        verdict TEXT NOT NULL, confidence REAL NOT NULL, model_used TEXT NOT NULL
+    )
+'''
+LEGACY_INSERT = '''
+    INSERT INTO analysis_history (timestamp, statement, verdict, confidence, model_used)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+
+def legacy_save(db_path: str, i: int):
+    """Old behaviour: new connection, rollback journal, commit and close per save"""
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute(LEGACY_INSERT, (datetime.now().isoformat(), f"claim {i}", 'true', 0.9, 'bench'))
+    conn.commit()
+    conn.close()
+
+
+def run(label: str, save, reader, threads: int, writes: int):
+    stop = threading.Event()
+    reads = [0]
+    
+    def read_loop():
+        while not stop.is_set():
+            reader()
+            reads[0] += 1
+    
+    def write_loop(offset: int):
+        for i in range(writes):
+            save(offset * writes + i)
+    
+    reader_thread = threading.Thread(target=read_loop)
+    workers = [threading.Thread(target=write_loop, args=(t,)) for t in range(threads)]
+    
+    start = time.perf_counter()
+    reader_thread.start()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    reader_thread.join()
+    
+    total = threads * writes
+    print(f"{label:<10} {total:>7} writes in {elapsed:6.2f}s  "
+          f"{total / elapsed:>9.0f} writes/s  {reads[0] / elapsed:>7.0f} reads/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--writes', type=int, default=500, help='writes per thread')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, 'legacy.db')
+        conn = sqlite3.connect(legacy_path)
+        conn.execute(LEGACY_SCHEMA)
+        conn.close()
+        
+        def legacy_read():
+            conn = sqlite3.connect(legacy_path, timeout=30)
+            conn.execute('SELECT COUNT(*), AVG(confidence) FROM analysis_history').fetchone()
+            conn.close()
+        
+        run('legacy', lambda i: legacy_save(legacy_path, i), legacy_read, args.threads, args.writes)
+        
+        pooled_db = AnalysisDatabase(os.path.join(tmp, 'pooled', 'history.db'))
+        run('pooled',
+            lambda i: pooled_db.save_analysis(f"claim {i}", 'true', 0.9, 'bench'),
+            pooled_db.get_analytics, args.threads, args.writes)
+        pooled_db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Query benchmark for analysis_history at scale.
+
+Fills a scratch database with synthetic analyses (10M by default) and times
+the recent-history and aggregate queries used by the UI.
+    
+    python benchmarks/bench_history_queries.py --rows 10000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data.database import AnalysisDatabase, now_ms
+from src.utils.helpers import generate_claim_hash
+
+VERDICTS = ['true', 'false', 'misleading', 'unverifiable']
+MODELS = ['professional-ensemble', 'deberta', 'roberta', 'electra', 'bert']
+
+
+def fill(db: AnalysisDatabase, rows: int, distinct_claims: int, batch: int = 50000):
+    rng = random.Random(42)
+    end = now_ms()
+    start = end - 365 * 24 * 3600 * 1000
+    step = (end - start) // rows
+    began = time.perf_counter()
+    for offset in range(0, rows, batch):
+        db.save_analyses([
+            (start + (offset + i) * step, f"synthetic claim number {rng.randrange(distinct_claims)}",
+             rng.choice(VERDICTS), rng.random(), rng.choice(MODELS))
+            for i in range(min(batch, rows - offset))
+        ])
+        done = offset + batch
+        if done % (batch * 20) == 0:
+            print(f"  loaded {done:,} rows ({done / (time.perf_counter() - began):,.0f} rows/s)")
+
+
+def timed(label: str, fn, repeat: int = 20):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    print(f"{label:<40} {(time.perf_counter() - start) / repeat * 1000:9.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--distinct-claims', type=int, default=1_000_000)
+    parser.add_argument('--db', help='reuse an existing benchmark database instead of a scratch one')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db or os.path.join(tmp, 'history.db')
+        db = AnalysisDatabase(path)
+        existing = db.get_analytics()['total_analyses']
+        if existing < args.rows:
+            print(f"Loading {args.rows - existing:,} rows into {path}")
+            fill(db, args.rows - existing, args.distinct_claims)
+        
+        conn = db._connection()
+        day_ago = now_ms() - 24 * 3600 * 1000
+        claim_hash = generate_claim_hash('synthetic claim number 7')
+        
+        timed('get_recent_analyses(10)', lambda: db.get_recent_analyses(10))
+        timed('get_analytics()', db.get_analytics)
+        timed('get_analysis_count_by_model()', db.get_analysis_count_by_model)
+        timed('verdict counts, last 24h', lambda: conn.execute('''
+            SELECT verdict, COUNT(*) FROM analysis_history WHERE timestamp_ms >= ? GROUP BY verdict
+        ''', (day_ago,)).fetchall())
+        timed('history of one claim (text_hash)', lambda: conn.execute('''
+            SELECT timestamp_ms, verdict, confidence FROM analysis_history
+            WHERE text_hash = ? ORDER BY timestamp_ms DESC LIMIT 20
+        ''', (claim_hash,)).fetchall())
+        timed('search_history, every claim matches', lambda: db.search_history('synthetic claim number 7', limit=10))
+        timed('full scan COUNT/AVG (pre-counter path)', lambda: conn.execute(
+            'SELECT COUNT(*), AVG(confidence) FROM analysis_history'
+        ).fetchone(), repeat=3)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
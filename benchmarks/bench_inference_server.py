@@ -0,0 +1,130 @@
+"""
+Throughput scaling of the pre-forking inference server with worker count.
+
+For each worker count the server is started on a temporary socket and
+driven by a fixed number of client threads; the table shows throughput,
+speedup over the in-process baseline, latency and the workers' proportional memory
+(PSS), which stays near one model copy thanks to copy-on-write. The first
+row is the in-process baseline: the same client threads calling the model
+directly, serialised by the GIL.
+    
+    python benchmarks/bench_inference_server.py --workers 1 2 4 8 --clients 16 --duration 10
+
+--model defaults to the real ensemble; CPUBoundModel below is a pure-Python
+stand-in for machines without the transformer weights.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.bulk import DEFAULT_MODEL, load_model
+from src.core.inference_server import InferenceClient
+
+CLAIMS = [
+    "The Earth is flat",
+    "Vaccines cause autism",
+    "The moon landing was staged",
+    "Climate change is caused by human activity",
+]
+
+
+class CPUBoundModel:
+    """Holds the GIL for a few milliseconds per claim, like tokenisation plus a small forward pass"""
+    
+    def __init__(self):
+        self.weights = np.random.default_rng(0).random((2048, 2048))   # 32 MB to share copy-on-write
+    
+    def ensemble_predict(self, text):
+        start = time.perf_counter()
+        total = 0
+        for i in range(60000):
+            total += i * len(text)
+        return SimpleNamespace(verdict='false', confidence=0.9, model_used='cpu-bound', probabilities={},
+                               features={}, reasoning='', processing_time=time.perf_counter() - start)
+
+
+def drive(predict, clients: int, duration: float):
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    
+    def client(i):
+        local = []
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            predict(CLAIMS[i % len(CLAIMS)])
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+    
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies) / (time.perf_counter() - start), np.array(latencies) * 1000
+
+
+def pss_mb(pid: int) -> float:
+    """Proportional set size of a process and its children, in MB (Linux only)"""
+    total = 0
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids += [int(child) for child in f.read().split()]
+        for process in pids:
+            with open(f"/proc/{process}/smaps_rollup") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith('Pss:'))
+    except (OSError, StopIteration):
+        return float('nan')
+    return total / 1024
+
+
+def report(label, throughput, latencies, baseline, memory):
+    print(f"{label:>14} {throughput:>9.1f} {throughput / baseline:>8.2f}x "
+          f"{np.percentile(latencies, 50):>8.1f} {np.percentile(latencies, 99):>8.1f} {memory:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    args = parser.parse_args()
+    
+    print(f"{'workers':>14} {'req/s':>9} {'speedup':>9} {'p50 ms':>8} {'p99 ms':>8} {'PSS MB':>9}")
+    model = load_model(args.model)
+    baseline, latencies = drive(model.ensemble_predict, args.clients, args.duration)
+    report('in-process', baseline, latencies, baseline, float('nan'))
+    del model
+    
+    for workers in args.workers:
+        socket_path = os.path.join(tempfile.mkdtemp(), 'inference.sock')
+        server = subprocess.Popen([sys.executable, '-m', 'src.core.inference_server', '--workers', str(workers),
+                                   '--socket', socket_path, '--model', args.model],
+                                  cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  stderr=subprocess.DEVNULL)
+        try:
+            client = InferenceClient(socket_path)
+            if not client.wait_ready(timeout=600):
+                raise RuntimeError(f"Server with {workers} workers did not start")
+            throughput, latencies = drive(client.ensemble_predict, args.clients, args.duration)
+            report(str(workers), throughput, latencies, baseline, pss_mb(server.pid))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Load test for the HTTP verification service.
+
+Runs closed-loop clients against a running server and reports throughput
+and latency percentiles:
+    
+    python -m src.api.server --port 8080 &
+    python benchmarks/load_test_server.py --url http://127.0.0.1:8080 --concurrency 32 --duration 30
+
+With --stub the script starts its own server on localhost with stand-in
+components (fixed-latency model and sources), so the service overhead can
+be measured without loading the transformer models.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+from aiohttp import ClientSession, TCPConnector, web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.api.server import create_app
+from src.core.pipeline import AnalysisPipeline
+
+CLAIMS = [
+    "The Earth is flat",
+    "Vaccines cause autism",
+    "The moon landing was staged",
+    "Drinking water is healthy",
+    "Climate change is caused by human activity",
+]
+
+
+class StandIn:
+    """Fixed-latency model, knowledge graph and multi-source stand-in"""
+    
+    def __init__(self, latency: float):
+        self.latency = latency
+    
+    def ensemble_predict(self, text):
+        time.sleep(self.latency)
+        return SimpleNamespace(verdict='false', confidence=0.8, model_used='stand-in', probabilities={},
+                               features={}, reasoning='', processing_time=self.latency)
+    
+    def extract_entities(self, text):
+        return text.split()[:3]
+    
+    def verify_against_knowledge(self, text, entities):
+        time.sleep(self.latency)
+        return {'entities': entities}
+    
+    def verify_claim(self, text):
+        time.sleep(self.latency)
+        return {'verdict': 'false'}
+
+
+async def client(session, url, mode, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        if mode == 'batch':
+            request = session.post(f"{url}/v1/verify/batch", json={'claims': random.sample(CLAIMS, 3)})
+        else:
+            request = session.post(f"{url}/v1/verify", json={'text': random.choice(CLAIMS)})
+        async with request as response:
+            await response.read()
+            status = response.status
+        if status != 200:
+            errors[status] = errors.get(status, 0) + 1
+            # Back off briefly when shed instead of hammering the server
+            await asyncio.sleep(0.05 if status == 503 else 0)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(args):
+    runner = None
+    url = args.url
+    if args.stub:
+        component = StandIn(args.stub_latency)
+        app = create_app(AnalysisPipeline(component, component, component), max_concurrency=args.max_concurrency)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    
+    latencies, errors = [], {}
+    async with ClientSession(connector=TCPConnector(limit=args.concurrency)) as session:
+        deadline = time.perf_counter() + args.duration
+        start = time.perf_counter()
+        await asyncio.gather(*(client(session, url, args.mode, deadline, latencies, errors)
+                               for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+    
+    if runner is not None:
+        await runner.cleanup()
+    
+    lat = np.array(latencies) * 1000
+    print(f"url={url} mode={args.mode} concurrency={args.concurrency} duration={elapsed:.1f}s")
+    print(f"requests ok={len(lat)} errors={errors} throughput={len(lat) / elapsed:.1f} req/s")
+    if len(lat):
+        print("latency ms: " + ' '.join(f"p{q}={np.percentile(lat, q):.1f}" for q in (50, 90, 99)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8080')
+    parser.add_argument('--mode', choices=['single', 'batch'], default='single')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--stub', action='store_true', help='Start a local server with stand-in components')
+    parser.add_argument('--stub-latency', type=float, default=0.05)
+    parser.add_argument('--max-concurrency', type=int, default=16)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -57,6 +57,16 @@ class AppConfig:
         # Application settings
         self.MAX_INPUT_LENGTH = 1000
         self.CACHE_DURATION = 3600  # 1 hour
+        # Unix socket of a running src.core.inference_server; unset loads the models in-process
+        self.INFERENCE_SOCKET = os.getenv('NEXUS_INFERENCE_SOCKET')
+        # Comma-separated inference node addresses (host:port) to shard across; overrides the socket
+        self.INFERENCE_NODES = [node for node in os.getenv('NEXUS_INFERENCE_NODES', '').split(',') if node]
+        # History kept in the hot table, and archived history kept at all (unset keeps it forever)
+        self.HISTORY_HOT_DAYS = int(os.getenv('NEXUS_HISTORY_HOT_DAYS', '35'))
+        self.HISTORY_RETENTION_DAYS = int(os.getenv('NEXUS_HISTORY_RETENTION_DAYS')) \
+            if os.getenv('NEXUS_HISTORY_RETENTION_DAYS') else None
+        # Concurrent model calls when the models run in this process rather than an inference server
+        self.INFERENCE_SLOTS = int(os.getenv('NEXUS_INFERENCE_SLOTS', '4'))
         self.LOG_LEVEL = 'INFO'
 
 # Global configuration instance
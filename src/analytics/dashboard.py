@@ -5,6 +5,11 @@ import pandas as pd
 from typing import Dict, List
 import numpy as np
 
+from src.analytics.downsampling import lttb_indices
+
+# Upper bound on points per trace sent to the browser
+MAX_PLOT_POINTS = 2000
+
 class AdvancedDashboard:
     """
     Advanced analytics dashboard for truth verification
@@ -126,34 +131,45 @@ class AdvancedDashboard:
         
         return fig
     
-    def create_timeline_analysis(self, historical_data: List) -> go.Figure:
-        """Create timeline analysis of similar claims"""
-        # Mock data for demonstration
-        dates = pd.date_range('2023-01-01', periods=12, freq='M')
-        claims_count = [5, 8, 12, 7, 15, 20, 18, 22, 25, 30, 28, 32]
-        accuracy_trend = [0.6, 0.65, 0.7, 0.68, 0.72, 0.75, 0.78, 0.8, 0.82, 0.85, 0.83, 0.87]
-        
+    def create_timeline_analysis(self, historical_data: Dict) -> go.Figure:
+        """Create timeline of analysis volume and confidence from database rollups"""
         fig = make_subplots(specs=[[{"secondary_y": True}]])
         
-        # Claims count
+        if not historical_data or not len(historical_data.get('bucket_ms', [])):
+            fig.add_annotation(text="No analysis history yet", showarrow=False, xref="paper", yref="paper", x=0.5, y=0.5)
+            fig.update_layout(title="Analysis Timeline", height=400)
+            return fig
+        
+        bucket_ms = np.asarray(historical_data['bucket_ms'])
+        counts = np.asarray(historical_data['count'])
+        avg_confidence = np.asarray(historical_data['avg_confidence'])
+        
+        # Never hand Plotly more than MAX_PLOT_POINTS, whatever the caller passed
+        if len(bucket_ms) > MAX_PLOT_POINTS:
+            keep = lttb_indices(bucket_ms, counts, MAX_PLOT_POINTS)
+            bucket_ms, counts, avg_confidence = bucket_ms[keep], counts[keep], avg_confidence[keep]
+        dates = pd.to_datetime(bucket_ms, unit='ms')
+        
+        # Analysis volume
         fig.add_trace(
-            go.Scatter(x=dates, y=claims_count, name="Similar Claims", line=dict(color='blue')),
+            go.Scatter(x=dates, y=counts, name="Analyses", line=dict(color='blue')),
             secondary_y=False,
         )
         
-        # Accuracy trend
+        # Confidence trend
         fig.add_trace(
-            go.Scatter(x=dates, y=accuracy_trend, name="Accuracy Trend", line=dict(color='green')),
+            go.Scatter(x=dates, y=avg_confidence, name="Avg Confidence", line=dict(color='green')),
             secondary_y=True,
         )
         
+        width = {60000: 'minute', 3600000: 'hour', 86400000: 'day'}.get(historical_data.get('width_ms'), 'bucket')
         fig.update_layout(
-            title="Historical Analysis of Similar Claims",
+            title=f"Analysis Timeline (per {width}{', downsampled' if historical_data.get('downsampled') else ''})",
             xaxis_title="Date",
             height=400
         )
         
-        fig.update_yaxes(title_text="Number of Claims", secondary_y=False)
-        fig.update_yaxes(title_text="Accuracy", secondary_y=True)
+        fig.update_yaxes(title_text="Analyses", secondary_y=False)
+        fig.update_yaxes(title_text="Avg Confidence", secondary_y=True)
         
         return fig
\ No newline at end of file
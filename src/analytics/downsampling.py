@@ -0,0 +1,51 @@
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of ``n_out`` points that keep the visual shape.
+
+    The first and last points are always kept. Every bucket in between
+    contributes the point forming the largest triangle with the previously
+    chosen point and the mean of the next bucket.
+    """
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][:max(n_out, 0)], dtype=np.int64)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[end:next_end].mean() if next_end > end else x[-1]
+        next_y = y[end:next_end].mean() if next_end > end else y[-1]
+        # Twice the triangle area for every candidate in the bucket at once
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+    return selected
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Min/max decimation: the extremes of ``n_out // 2`` equal buckets, in order"""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    buckets = max(n_out // 2, 1)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    y = np.asarray(y)
+    indices = set()
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            indices.add(start + int(np.argmin(y[start:end])))
+            indices.add(start + int(np.argmax(y[start:end])))
+    return np.array(sorted(indices), dtype=np.int64)
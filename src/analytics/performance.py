@@ -0,0 +1,374 @@
+import numpy as np
+from typing import Dict, List, Optional
+import hashlib
+import json
+import math
+import struct
+import threading
+import time
+
+
+def hash64(key: str) -> int:
+    """Stable 64-bit hash; hex digests such as claim hashes are used directly"""
+    if len(key) >= 16:
+        try:
+            return int(key[:16], 16)
+        except ValueError:
+            pass
+    return int(hashlib.md5(key.encode('utf-8')).hexdigest()[:16], 16)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter.
+    
+    2**p one-byte registers (16 KB at the default p=14) give roughly
+    1.04/sqrt(2**p) ~ 0.8% relative error. Sketches merge by register-wise max.
+    """
+    
+    def __init__(self, p: int = 14):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+    
+    def add(self, key: str):
+        self.add_hash(hash64(key))
+    
+    def add_hash(self, value: int):
+        index = value >> (64 - self.p)
+        remainder = value & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+    
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        if other.p != self.p:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+    
+    def count(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * self.m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = self.m * math.log(self.m / zeros)
+        return int(round(estimate))
+    
+    def to_bytes(self) -> bytes:
+        return struct.pack('<B', self.p) + self.registers.tobytes()
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'HyperLogLog':
+        sketch = cls(data[0])
+        sketch.registers = np.frombuffer(data, dtype=np.uint8, offset=1).copy()
+        return sketch
+
+
+class TDigest:
+    """
+    Merging t-digest for streaming quantiles.
+    
+    Centroids are compressed with the k2 (logit) scale function, so tail
+    quantiles such as p99 are resolved by small centroids while the middle
+    of the distribution is summarised coarsely.
+    Digests merge by re-compressing the union of their centroids.
+    """
+    
+    def __init__(self, compression: float = 100):
+        self.compression = compression
+        self.means = np.array([], dtype=np.float64)
+        self.weights = np.array([], dtype=np.float64)
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer = []
+    
+    def add(self, value: float, weight: float = 1.0):
+        self._buffer.append((value, weight))
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= 10 * self.compression:
+            self._compress()
+    
+    def merge(self, other: 'TDigest') -> 'TDigest':
+        other._compress()
+        self._buffer.extend(zip(other.means.tolist(), other.weights.tolist()))
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+    
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum()) + sum(weight for _, weight in self._buffer)
+    
+    def _k(self, q: float, total: float) -> float:
+        """k2 scale function: centroid size limit proportional to q(1-q)"""
+        q = min(max(q, 1e-12), 1 - 1e-12)
+        normalizer = 4 * math.log(max(total / self.compression, 1.0)) + 24
+        return self.compression / normalizer * math.log(q / (1 - q))
+    
+    def _compress(self):
+        if not self._buffer:
+            return
+        buffered = np.array(self._buffer, dtype=np.float64)
+        self._buffer = []
+        means = np.concatenate([self.means, buffered[:, 0]])
+        weights = np.concatenate([self.weights, buffered[:, 1]])
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        
+        merged_means, merged_weights = [means[0]], [weights[0]]
+        cumulative = 0.0
+        k_limit = self._k(0.0, total) + 1
+        for mean, weight in zip(means[1:].tolist(), weights[1:].tolist()):
+            q = (cumulative + merged_weights[-1] + weight) / total
+            if self._k(q, total) <= k_limit:
+                combined = merged_weights[-1] + weight
+                merged_means[-1] += (mean - merged_means[-1]) * weight / combined
+                merged_weights[-1] = combined
+            else:
+                cumulative += merged_weights[-1]
+                k_limit = self._k(cumulative / total, total) + 1
+                merged_means.append(mean)
+                merged_weights.append(weight)
+        self.means = np.array(merged_means)
+        self.weights = np.array(merged_weights)
+    
+    def quantile(self, q: float) -> float:
+        """Estimated value at quantile ``q`` in [0, 1]; NaN for an empty digest"""
+        self._compress()
+        if not len(self.means):
+            return math.nan
+        if len(self.means) == 1:
+            return float(self.means[0])
+        total = self.weights.sum()
+        # Interpolate between centroid centres, anchored at the exact min and max
+        centres = np.cumsum(self.weights) - self.weights / 2
+        positions = np.concatenate([[0.0], centres, [total]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        return float(np.interp(q * total, positions, values))
+    
+    def to_bytes(self) -> bytes:
+        self._compress()
+        header = struct.pack('<dddI', self.compression, self.min, self.max, len(self.means))
+        return header + self.means.tobytes() + self.weights.tobytes()
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'TDigest':
+        compression, minimum, maximum, size = struct.unpack_from('<dddI', data)
+        offset = struct.calcsize('<dddI')
+        digest = cls(compression)
+        digest.min, digest.max = minimum, maximum
+        digest.means = np.frombuffer(data, dtype=np.float64, count=size, offset=offset).copy()
+        digest.weights = np.frombuffer(data, dtype=np.float64, count=size, offset=offset + 8 * size).copy()
+        return digest
+
+
+class CountMinSketch:
+    """
+    Count-min sketch with a small heavy-hitter candidate list.
+    
+    Estimates never undercount and overcount by at most e/width of the total
+    with probability 1 - exp(-depth). The ``top_k`` keys with the highest
+    estimates are tracked so heavy hitters can be listed without a scan.
+    """
+    
+    def __init__(self, width: int = 2048, depth: int = 4, top_k: int = 50):
+        self.width = width
+        self.depth = depth
+        self.top_k = top_k
+        self.table = np.zeros((depth, width), dtype=np.uint32)
+        self.heavy_hitters = {}
+    
+    def _indexes(self, key: str) -> List[int]:
+        digest = hashlib.md5(key.encode('utf-8')).digest()
+        # Kirsch-Mitzenmacher: depth hashes from two 64-bit halves
+        h1, h2 = struct.unpack('<QQ', digest)
+        return [(h1 + row * h2) % self.width for row in range(self.depth)]
+    
+    def add(self, key: str, count: int = 1):
+        self.add_many([key], count)
+    
+    def add_many(self, keys: List[str], count: int = 1):
+        """Add every key in one vectorised table update"""
+        if not keys:
+            return
+        indexes = np.array([self._indexes(key) for key in keys], dtype=np.int64)
+        rows = np.broadcast_to(np.arange(self.depth), indexes.shape)
+        np.add.at(self.table, (rows, indexes), count)
+        estimates = self.table[rows, indexes].min(axis=1)
+        self.heavy_hitters.update(zip(keys, estimates.tolist()))
+        if len(self.heavy_hitters) > 2 * self.top_k:
+            self._trim()
+    
+    def estimate(self, key: str) -> int:
+        return int(self.table[np.arange(self.depth), self._indexes(key)].min())
+    
+    def _trim(self):
+        self.heavy_hitters = dict(sorted(self.heavy_hitters.items(), key=lambda item: -item[1])[:self.top_k])
+    
+    def merge(self, other: 'CountMinSketch') -> 'CountMinSketch':
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Cannot merge count-min sketches with different dimensions")
+        self.table += other.table
+        for key in set(self.heavy_hitters) | set(other.heavy_hitters):
+            self.heavy_hitters[key] = self.estimate(key)
+        self._trim()
+        return self
+    
+    def top(self, k: int = 10) -> List[Dict]:
+        return [{'key': key, 'count': count}
+                for key, count in sorted(self.heavy_hitters.items(), key=lambda item: -item[1])[:k]]
+    
+    def to_bytes(self) -> bytes:
+        self._trim()
+        hitters = json.dumps(self.heavy_hitters).encode('utf-8')
+        return struct.pack('<III', self.width, self.depth, self.top_k) + self.table.tobytes() + hitters
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'CountMinSketch':
+        width, depth, top_k = struct.unpack_from('<III', data)
+        offset = struct.calcsize('<III')
+        sketch = cls(width, depth, top_k)
+        sketch.table = np.frombuffer(data, dtype=np.uint32, count=width * depth, offset=offset).reshape(depth, width).copy()
+        sketch.heavy_hitters = json.loads(data[offset + 4 * width * depth:].decode('utf-8'))
+        return sketch
+
+
+# Persisted sketch kinds, by the name stored in the analytics_sketches table
+SKETCH_TYPES = {
+    'distinct_claims': HyperLogLog,
+    'processing_time': TDigest,
+    'claim_frequency': CountMinSketch
+}
+
+SKETCH_BUCKET_MS = 86400000
+SKETCH_FLUSH_RECORDS = 5000
+SKETCH_FLUSH_INTERVAL = 10.0
+
+
+class SketchStore:
+    """
+    Per-day sketches persisted in the analytics_sketches table.
+    
+    ``add`` folds new analyses into in-memory delta sketches; ``flush``
+    merges the deltas into the stored blobs once ``flush_records`` records
+    or ``flush_interval`` seconds have accumulated, so a burst of inserts
+    rewrites each blob once rather than once per insert. Queries merge the
+    buckets in a range, plus this process's pending deltas, which costs the
+    same however many analyses those buckets hold.
+    """
+    
+    def __init__(self, bucket_ms: int = SKETCH_BUCKET_MS, flush_records: int = SKETCH_FLUSH_RECORDS,
+                 flush_interval: float = SKETCH_FLUSH_INTERVAL):
+        self.bucket_ms = bucket_ms
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self._pending: Dict[tuple, object] = {}
+        self._pending_records = 0
+        self._pending_since = None
+        self._lock = threading.Lock()
+    
+    def _load(self, conn, name: str, key: str, bucket_ms: int):
+        row = conn.execute(
+            'SELECT data FROM analytics_sketches WHERE sketch = ? AND key = ? AND bucket_ms = ?',
+            (name, key, bucket_ms)
+        ).fetchone()
+        return SKETCH_TYPES[name].from_bytes(row[0]) if row else SKETCH_TYPES[name]()
+    
+    def _store(self, conn, name: str, key: str, bucket_ms: int, sketch):
+        conn.execute('''
+            INSERT INTO analytics_sketches (sketch, key, bucket_ms, data) VALUES (?, ?, ?, ?)
+            ON CONFLICT(sketch, key, bucket_ms) DO UPDATE SET data = excluded.data
+        ''', (name, key, bucket_ms, sketch.to_bytes()))
+    
+    def _fold(self, sketches: Dict[tuple, object], records: List[tuple]):
+        """Fold (timestamp_ms, text_hash, model_used, processing_time_ms or None) records into ``sketches``"""
+        def sketch(name: str, key: str, bucket_ms: int):
+            if (name, key, bucket_ms) not in sketches:
+                sketches[name, key, bucket_ms] = SKETCH_TYPES[name]()
+            return sketches[name, key, bucket_ms]
+        
+        buckets = {}
+        for record in records:
+            buckets.setdefault(record[0] - record[0] % self.bucket_ms, []).append(record)
+        
+        for bucket_ms, bucket_records in buckets.items():
+            hashes = [record[1] for record in bucket_records]
+            distinct = sketch('distinct_claims', '', bucket_ms)
+            for text_hash in hashes:
+                distinct.add_hash(hash64(text_hash))
+            sketch('claim_frequency', '', bucket_ms).add_many(hashes)
+            for _, _, model_used, processing_time_ms in bucket_records:
+                if processing_time_ms is not None:
+                    sketch('processing_time', model_used, bucket_ms).add(processing_time_ms)
+    
+    def _write(self, conn, sketches: Dict[tuple, object]):
+        """Merge delta sketches into the stored ones, in the caller's transaction"""
+        for (name, key, bucket_ms), delta in sketches.items():
+            self._store(conn, name, key, bucket_ms, self._load(conn, name, key, bucket_ms).merge(delta))
+    
+    def update(self, conn, records: List[tuple]):
+        """Fold records straight into the stored buckets, in the caller's transaction (used by backfills)"""
+        sketches = {}
+        self._fold(sketches, records)
+        self._write(conn, sketches)
+    
+    def add(self, records: List[tuple]):
+        """Fold records into the pending in-memory deltas"""
+        with self._lock:
+            self._fold(self._pending, records)
+            self._pending_records += len(records)
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+    
+    @property
+    def pending(self) -> bool:
+        """Whether any deltas are waiting to be flushed"""
+        return bool(self._pending)
+    
+    def flush(self, conn, force: bool = False) -> bool:
+        """
+        Write the pending deltas in their own transaction if enough have built up (or ``force``).
+        
+        Deltas merge into whatever is stored, so several processes can
+        flush into the same buckets. The lock is held until the commit, so
+        queries never miss deltas in flight; on failure they are kept for
+        the next flush.
+        """
+        with self._lock:
+            if not self._pending or not (force or self._pending_records >= self.flush_records
+                                         or time.monotonic() - self._pending_since >= self.flush_interval):
+                return False
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._write(conn, self._pending)
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            self._pending, self._pending_records, self._pending_since = {}, 0, None
+            return True
+    
+    def merged(self, conn, name: str, key: Optional[str] = '', since_ms: Optional[int] = None,
+               until_ms: Optional[int] = None):
+        """Merge every bucket overlapping [since_ms, until_ms); ``key=None`` merges all keys"""
+        since_ms = since_ms - since_ms % self.bucket_ms if since_ms is not None else 0
+        until_ms = until_ms if until_ms is not None else 2 ** 62
+        query = 'SELECT data FROM analytics_sketches WHERE sketch = ? AND bucket_ms >= ? AND bucket_ms < ?'
+        params = [name, since_ms, until_ms]
+        if key is not None:
+            query += ' AND key = ?'
+            params.append(key)
+        
+        result = SKETCH_TYPES[name]()
+        for (data,) in conn.execute(query, params):
+            result.merge(SKETCH_TYPES[name].from_bytes(data))
+        with self._lock:
+            for (pending_name, pending_key, bucket_ms), delta in self._pending.items():
+                if pending_name == name and key in (None, pending_key) and since_ms <= bucket_ms < until_ms:
+                    result.merge(delta)
+        return result
@@ -1,46 +1,171 @@
 import requests
 import os
-from typing import Dict, List
+import logging
+from typing import Dict, List, Optional
 import time
 
+from concurrent.futures import ThreadPoolExecutor
+
+from src.data.claim_review_index import DEFAULT_INDEX_PATH, ClaimReviewIndex
+from src.utils.cache import StaleWhileRevalidateCache
+from src.utils.helpers import normalize_claim
+from src.utils.http_client import DEFAULT_POOL_MAXSIZE, PooledHTTPClient, get_http_client
+
 class FactCheckAPI:
     """Integrate with real fact-checking APIs"""
     
-    def __init__(self):
+    def __init__(self, http_client: Optional[PooledHTTPClient] = None,
+                 claim_index: Optional[ClaimReviewIndex] = None):
         self.news_api_key = os.getenv('NEWS_API_KEY', 'demo_key')
+        self.google_api_key = os.getenv('GOOGLE_FACT_CHECK_API_KEY', '')
         self.google_fact_check_url = "https://factchecktools.googleapis.com/v1alpha1/claims:search"
+        self.news_api_url = "https://newsapi.org/v2/everything"
+        self.http = http_client or get_http_client()
+        # Local ClaimReview index, consulted before any network call
+        if claim_index is None and os.path.exists(DEFAULT_INDEX_PATH):
+            claim_index = ClaimReviewIndex(DEFAULT_INDEX_PATH)
+        self.claim_index = claim_index
+        # Fact-check ratings change slowly, news coverage faster
+        self.caches = {
+            'google_fact_check': StaleWhileRevalidateCache(ttl=24 * 3600),
+            'news_api': StaleWhileRevalidateCache(ttl=15 * 60)
+        }
     
     def check_google_fact_check(self, query: str) -> List[Dict]:
-        """Check claims against Google Fact Check API"""
-        # This would require actual API key setup
-        # For demo, return structured mock data
-        return [{
-            'claim': query,
-            'claimant': 'Various sources',
-            'rating': 'Mostly True',
-            'url': 'https://example.com/factcheck',
-            'review_date': '2024-01-15'
-        }]
+        """Check claims against the local ClaimReview index, then Google Fact Check API"""
+        try:
+            return self._google_fact_checks(query)
+        except requests.RequestException as e:
+            logging.error(f"Google Fact Check query failed: {e}")
+            return []
+    
+    def _google_fact_checks(self, query: str) -> List[Dict]:
+        """``check_google_fact_check``, raising when the API cannot be reached"""
+        if self.claim_index is not None:
+            matches = [m for m in self.claim_index.search(query) if m['score'] >= 0.5]
+            if matches:
+                return [{
+                    'claim': match['claim'],
+                    'claimant': match['claimant'],
+                    'rating': match['rating'],
+                    'url': match['url'],
+                    'review_date': match['review_date']
+                } for match in matches]
+        
+        if not self.google_api_key:
+            # No API key configured - return structured mock data
+            return [{
+                'claim': query,
+                'claimant': 'Various sources',
+                'rating': 'Mostly True',
+                'url': 'https://example.com/factcheck',
+                'review_date': '2024-01-15'
+            }]
+        
+        data = self.http.get_json(self.google_fact_check_url, params={
+            'query': query,
+            'key': self.google_api_key,
+            'pageSize': 10
+        })
+        
+        fact_checks = []
+        for claim in data.get('claims', []):
+            for review in claim.get('claimReview', []):
+                fact_checks.append({
+                    'claim': claim.get('text', query),
+                    'claimant': claim.get('claimant', 'Unknown'),
+                    'rating': review.get('textualRating', 'Unrated'),
+                    'url': review.get('url', ''),
+                    'review_date': review.get('reviewDate', '')
+                })
+        return fact_checks
     
     def check_news_api(self, query: str) -> List[Dict]:
         """Check news coverage"""
-        # Mock implementation - in real scenario, integrate with NewsAPI
+        try:
+            return self._news_articles(query)
+        except requests.RequestException as e:
+            logging.error(f"NewsAPI query failed: {e}")
+            return []
+    
+    def _news_articles(self, query: str) -> List[Dict]:
+        """``check_news_api``, raising when the API cannot be reached"""
+        if self.news_api_key == 'demo_key':
+            # Mock implementation - no NewsAPI key configured
+            return [{
+                'source': 'Reuters',
+                'title': f'Fact Check: {query}',
+                'description': 'Multiple fact-checking organizations have reviewed this claim.',
+                'url': 'https://reuters.com/factcheck',
+                'published_at': '2024-01-15T10:30:00Z'
+            }]
+        
+        data = self.http.get_json(self.news_api_url, params={
+            'q': query,
+            'pageSize': 10,
+            'apiKey': self.news_api_key
+        })
+        
         return [{
-            'source': 'Reuters',
-            'title': f'Fact Check: {query}',
-            'description': 'Multiple fact-checking organizations have reviewed this claim.',
-            'url': 'https://reuters.com/factcheck',
-            'published_at': '2024-01-15T10:30:00Z'
-        }]
+            'source': (article.get('source') or {}).get('name', 'Unknown'),
+            'title': article.get('title', ''),
+            'description': article.get('description', ''),
+            'url': article.get('url', ''),
+            'published_at': article.get('publishedAt', '')
+        } for article in data.get('articles', [])]
     
     def get_credibility_score(self, statement: str) -> Dict:
         """Calculate credibility score from multiple sources"""
-        fact_checks = self.check_google_fact_check(statement)
-        news_articles = self.check_news_api(statement)
+        key = normalize_claim(statement)
+        fact_checks = self._cached('google_fact_check', key, lambda: self._google_fact_checks(statement))
+        news_articles = self._cached('news_api', key, lambda: self._news_articles(statement))
         
         return {
             'fact_check_rating': fact_checks[0]['rating'] if fact_checks else 'Unrated',
             'news_coverage': len(news_articles),
             'credibility_score': 85 if fact_checks else 50,
             'sources_checked': len(fact_checks) + len(news_articles)
-        }
\ No newline at end of file
+        }
+    
+    def _cached(self, source: str, key: str, loader) -> List[Dict]:
+        """
+        Serve ``source``'s cache, loading on a miss.
+        
+        A failed lookup counts as no results for this call but is never
+        cached, so the next call tries the API again; a failed background
+        refresh keeps serving the previous results.
+        """
+        try:
+            return self.caches[source].get_or_load(key, loader)
+        except requests.RequestException as e:
+            logging.error(f"{source} lookup failed: {e}")
+            return []
+    
+    def verify_claims(self, claims: List[str]) -> List[Dict]:
+        """
+        Credibility scores for many claims, in input order.
+        
+        Identical claims (after normalization) are looked up once. Neither
+        Google Fact Check search nor NewsAPI can answer several independent
+        claims in one request, so the unique claims are fanned out
+        concurrently over the pooled connections instead.
+        """
+        unique_claims = {}
+        for claim in claims:
+            unique_claims.setdefault(normalize_claim(claim), claim)
+        
+        with ThreadPoolExecutor(max_workers=DEFAULT_POOL_MAXSIZE) as executor:
+            scores = dict(zip(
+                unique_claims.keys(),
+                executor.map(self.get_credibility_score, unique_claims.values())
+            ))
+        
+        return [scores[normalize_claim(claim)] for claim in claims]
+    
+    def get_cache_metrics(self) -> Dict:
+        """Hit ratio and staleness of each source's response cache"""
+        return {name: cache.get_metrics() for name, cache in self.caches.items()}
+    
+    def get_connection_stats(self) -> Dict:
+        """Connection reuse statistics of the shared HTTP pool"""
+        return self.http.get_stats()
@@ -0,0 +1,349 @@
+import argparse
+import asyncio
+import dataclasses
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from src.core.pipeline import AnalysisPipeline, get_single_flight_metrics
+from src.core.scheduler import BULK, INTERACTIVE, InferenceScheduler, SchedulerBusyError, ScheduledModel
+from src.utils.deadline import Deadline
+from src.utils.helpers import clean_text
+
+DEFAULT_OPTIONS = {'knowledge_graph': True, 'multi_source': True, 'deep_analysis': False}
+MAX_TEXT_LENGTH = 1000
+MAX_BATCH_SIZE = 100
+
+
+class ServiceBusyError(Exception):
+    """Raised when every analysis slot is taken and the wait queue is full"""
+    pass
+
+
+def to_jsonable(value):
+    """Convert pipeline results (dataclasses, numpy scalars, dicts) into JSON-ready values"""
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {f.name: to_jsonable(getattr(value, f.name)) for f in dataclasses.fields(value)}
+    if isinstance(value, dict):
+        return {str(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if hasattr(value, '__dict__'):
+        return to_jsonable(vars(value))
+    return value
+
+
+class _Reservation:
+    """
+    Places in ``VerificationService``'s queue reserved for the claims of one batch or stream.
+    
+    Each claim takes one as it starts; ``give_back`` returns the rest
+    when the request ends early, and turns any claim starting after
+    that away.
+    """
+    
+    def __init__(self, service: 'VerificationService', priority: str, count: int):
+        service._admit(priority, count)
+        self.service = service
+        self.lane = service._lane(priority)
+        self.unstarted = count
+        self.closed = False
+    
+    def take(self):
+        if self.closed:
+            raise asyncio.CancelledError()
+        self.unstarted -= 1
+    
+    def give_back(self):
+        if not self.closed:
+            self.closed = True
+            self.service._reserved[self.lane] -= self.unstarted
+
+
+class VerificationService:
+    """
+    Async front end for ``AnalysisPipeline``.
+    
+    At most ``max_concurrency`` analyses run at once on a dedicated thread
+    pool; up to ``max_queue`` more wait for a slot and anything beyond that
+    is rejected with 503 so overload never builds an unbounded backlog. A
+    batch or stream is admitted only if all of its claims fit. One
+    pipeline, and so one set of loaded models and caches, serves every
+    request.
+    
+    With a ``scheduler`` (the one the pipeline's model runs behind),
+    single claims are scheduled as interactive and batch or stream claims
+    as bulk, and a full class queue is rejected with 503 as well. Each
+    class then also gets its own slots and thread pool here, so a large
+    batch waiting on the model cannot hold every slot in front of it.
+    """
+    
+    def __init__(self, pipeline: AnalysisPipeline, database=None, max_concurrency: int = 8,
+                 max_queue: int = 64, default_options: Optional[Dict] = None,
+                 scheduler: Optional[InferenceScheduler] = None):
+        self.pipeline = pipeline
+        self.database = database
+        self.scheduler = scheduler
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.default_options = {**DEFAULT_OPTIONS, **(default_options or {})}
+        lanes = [INTERACTIVE, BULK] if scheduler is not None else [INTERACTIVE]
+        self.executors = {
+            lane: ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=f'verify-{lane}')
+            for lane in lanes
+        }
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight = {lane: 0 for lane in lanes}
+        self._waiting = {lane: 0 for lane in lanes}
+        self._reserved = {lane: 0 for lane in lanes}
+        self.metrics = {'requests': 0, 'analyses': 0, 'rejected': 0, 'failures': 0}
+    
+    def _lane(self, priority: str) -> str:
+        """Slots and thread pool a claim waits in: one per class with a scheduler, otherwise shared"""
+        return priority if priority in self.executors else INTERACTIVE
+    
+    def _admit(self, priority: str = INTERACTIVE, count: int = 1):
+        """Reserve a place for ``count`` claims, running or queued, or reject them all"""
+        lane = self._lane(priority)
+        if lane not in self._semaphores:
+            self._semaphores[lane] = asyncio.Semaphore(self.max_concurrency)
+        load = self._in_flight[lane] + self._waiting[lane] + self._reserved[lane]
+        if load + count > self.max_concurrency + self.max_queue:
+            self.metrics['rejected'] += 1
+            raise ServiceBusyError("Verification service is at capacity")
+        self._reserved[lane] += count
+    
+    async def verify(self, text: str, options: Optional[Dict] = None, admitted: bool = False,
+                     priority: str = INTERACTIVE) -> Dict:
+        """
+        Run the pipeline for one claim without blocking the event loop.
+        
+        ``admitted`` means the claim's place was already reserved by
+        ``_admit``, as for each claim of a batch. An ``options['budget_ms']``
+        latency budget starts counting now, so time spent queued comes out
+        of it.
+        """
+        lane = self._lane(priority)
+        if not admitted:
+            self._admit(priority)
+        try:
+            if self.scheduler is not None:
+                self.scheduler.check_admission(priority)
+            options = {**self.default_options, **(options or {}), 'priority': priority}
+            deadline = Deadline.from_ms(options.get('budget_ms'))
+            self._waiting[lane] += 1
+        finally:
+            self._reserved[lane] -= 1
+        
+        semaphore = self._semaphores[lane]
+        try:
+            await semaphore.acquire()
+        finally:
+            self._waiting[lane] -= 1
+        self._in_flight[lane] += 1
+        try:
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(self.executors[lane], self.pipeline.analyze_shared, text, options,
+                                                 deadline)
+        finally:
+            self._in_flight[lane] -= 1
+            semaphore.release()
+        
+        self.metrics['analyses'] += 1
+        ai_result = results.get('ai_analysis')
+        if ai_result is not None and self.database is not None:
+            self.database.enqueue_prediction(text, ai_result)
+        return {'text': text, **to_jsonable(results)}
+    
+    def _json_object(self, value, what: str = 'request body') -> Dict:
+        if not isinstance(value, dict):
+            raise web.HTTPBadRequest(text=json.dumps({'error': f"{what} must be a JSON object"}),
+                                     content_type='application/json')
+        return value
+    
+    def _validate(self, text) -> str:
+        if not isinstance(text, str) or not clean_text(text):
+            raise web.HTTPBadRequest(text=json.dumps({'error': 'text must be a non-empty string'}),
+                                     content_type='application/json')
+        if len(text) > MAX_TEXT_LENGTH:
+            raise web.HTTPRequestEntityTooLarge(MAX_TEXT_LENGTH, len(text))
+        return clean_text(text)
+    
+    def _validate_options(self, options) -> Optional[Dict]:
+        error = None
+        if options is not None and not isinstance(options, dict):
+            error = 'options must be an object'
+        elif options and options.get('budget_ms') is not None:
+            budget_ms = options['budget_ms']
+            if isinstance(budget_ms, bool) or not isinstance(budget_ms, (int, float)) or budget_ms < 0:
+                error = 'budget_ms must be a non-negative number of milliseconds'
+        if error:
+            raise web.HTTPBadRequest(text=json.dumps({'error': error}), content_type='application/json')
+        return options
+    
+    async def _read_claims(self, request: web.Request) -> Tuple[List[str], Optional[Dict]]:
+        """Claims and options from a JSON body {"claims": [...]} or an NDJSON body of {"text": ...} lines"""
+        options = None
+        if request.content_type == 'application/x-ndjson':
+            body = await request.text()
+            claims = [self._json_object(json.loads(line), 'each NDJSON line').get('text')
+                      for line in body.splitlines() if line.strip()]
+        else:
+            payload = self._json_object(await request.json())
+            claims, options = payload.get('claims', []), payload.get('options')
+        if not isinstance(claims, list) or not claims:
+            raise web.HTTPBadRequest(text=json.dumps({'error': 'claims must be a non-empty list'}),
+                                     content_type='application/json')
+        if len(claims) > MAX_BATCH_SIZE:
+            raise web.HTTPRequestEntityTooLarge(MAX_BATCH_SIZE, len(claims))
+        return [self._validate(claim) for claim in claims], self._validate_options(options)
+    
+    async def _verify_or_error(self, text: str, options: Optional[Dict]) -> Dict:
+        try:
+            return await self.verify(text, options, admitted=True, priority=BULK)
+        except (ServiceBusyError, SchedulerBusyError) as e:
+            return {'text': text, 'error': str(e), 'status': 503}
+        except Exception as e:
+            self.metrics['failures'] += 1
+            logging.error(f"Verification failed for claim: {e}")
+            return {'text': text, 'error': str(e), 'status': 500}
+    
+    async def handle_verify(self, request: web.Request) -> web.Response:
+        self.metrics['requests'] += 1
+        payload = self._json_object(await request.json())
+        text = self._validate(payload.get('text'))
+        options = self._validate_options(payload.get('options'))
+        try:
+            return web.json_response(await self.verify(text, options))
+        except (ServiceBusyError, SchedulerBusyError) as e:
+            return web.json_response({'error': str(e)}, status=503, headers={'Retry-After': '1'})
+    
+    async def handle_batch(self, request: web.Request) -> web.Response:
+        """Verify claims concurrently; results come back in request order"""
+        self.metrics['requests'] += 1
+        claims, options = await self._read_claims(request)
+        # Analyse each distinct claim once
+        unique = list(dict.fromkeys(claims))
+        try:
+            reservation = _Reservation(self, BULK, len(unique))
+        except ServiceBusyError as e:
+            return web.json_response({'error': str(e)}, status=503, headers={'Retry-After': '1'})
+        
+        async def verify_one(claim: str):
+            reservation.take()
+            return await self._verify_or_error(claim, options)
+        
+        try:
+            results = await asyncio.gather(*(verify_one(claim) for claim in unique))
+        finally:
+            reservation.give_back()
+        by_claim = dict(zip(unique, results))
+        return web.json_response({'results': [by_claim[claim] for claim in claims]})
+    
+    async def handle_stream(self, request: web.Request) -> web.StreamResponse:
+        """Stream one NDJSON line per claim as soon as its analysis finishes"""
+        self.metrics['requests'] += 1
+        claims, options = await self._read_claims(request)
+        try:
+            reservation = _Reservation(self, BULK, len(claims))
+        except ServiceBusyError as e:
+            return web.json_response({'error': str(e)}, status=503, headers={'Retry-After': '1'})
+        
+        async def indexed(index: int, claim: str):
+            reservation.take()
+            return index, await self._verify_or_error(claim, options)
+        
+        try:
+            response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+            await response.prepare(request)
+            for next_done in asyncio.as_completed([indexed(i, claim) for i, claim in enumerate(claims)]):
+                index, result = await next_done
+                await response.write((json.dumps({'index': index, **result}) + '\n').encode('utf-8'))
+            await response.write_eof()
+        finally:
+            reservation.give_back()
+        return response
+    
+    async def handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            'status': 'ok',
+            'in_flight': sum(self._in_flight.values()),
+            'waiting': sum(self._waiting.values()),
+            **self.metrics,
+            'single_flight': get_single_flight_metrics(),
+            'scheduler': self.scheduler.get_status() if self.scheduler is not None else None
+        })
+    
+    def shutdown(self):
+        for executor in self.executors.values():
+            executor.shutdown(wait=False)
+
+
+SERVICE_KEY = web.AppKey('service', VerificationService)
+
+
+@web.middleware
+async def json_errors(request: web.Request, handler):
+    """Report request bodies that are not valid JSON as 400 instead of 500"""
+    try:
+        return await handler(request)
+    except json.JSONDecodeError as e:
+        return web.json_response({'error': f"Malformed request body: {e}"}, status=400)
+
+
+def create_app(pipeline: AnalysisPipeline, database=None, **service_options) -> web.Application:
+    """Build the aiohttp application around an existing pipeline (and its loaded models)"""
+    service = VerificationService(pipeline, database, **service_options)
+    app = web.Application(client_max_size=1024 ** 2, middlewares=[json_errors])
+    app[SERVICE_KEY] = service
+    app.router.add_get('/health', service.handle_health)
+    app.router.add_post('/v1/verify', service.handle_verify)
+    app.router.add_post('/v1/verify/batch', service.handle_batch)
+    app.router.add_post('/v1/verify/stream', service.handle_stream)
+    
+    async def on_cleanup(app):
+        service.shutdown()
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def build_default_pipeline(scheduler: Optional[InferenceScheduler] = None) -> AnalysisPipeline:
+    """Load the same components the Streamlit verifier uses, with the model behind ``scheduler`` if given"""
+    from src.analytics.explainable_ai import ExplainableAI
+    from src.core.ensemble_ai import ProfessionalEnsembleAI
+    from src.core.knowledge_graph import KnowledgeGraphVerifier
+    from src.core.multi_source import MultiSourceVerifier
+    
+    ai_system = ProfessionalEnsembleAI()
+    if scheduler is not None:
+        ai_system = ScheduledModel(ai_system, scheduler)
+    return AnalysisPipeline(ai_system, KnowledgeGraphVerifier(), MultiSourceVerifier(), ExplainableAI())
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="HTTP/JSON fact verification service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-concurrency', type=int, default=8)
+    parser.add_argument('--max-queue', type=int, default=64)
+    parser.add_argument('--inference-slots', type=int, default=4,
+                        help="Concurrent model calls, shared between interactive and bulk claims")
+    parser.add_argument('--db', default='data/analysis_history.db')
+    args = parser.parse_args(argv)
+    
+    from src.data.database import AnalysisDatabase
+    
+    logging.basicConfig(level=logging.INFO)
+    scheduler = InferenceScheduler(args.inference_slots)
+    app = create_app(build_default_pipeline(scheduler), AnalysisDatabase(args.db),
+                     max_concurrency=args.max_concurrency, max_queue=args.max_queue, scheduler=scheduler)
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Bulk claim verification from the command line.
+
+Streams a JSONL or CSV file of claims through a pool of worker processes
+and writes one JSON result per input record, in input order:
+
+    python -m src.core.bulk claims.jsonl results.jsonl --workers 4 --batch-size 32
+
+Each worker loads the ensemble once and predicts whole batches. At most
+``workers * window`` batches are in flight, so memory stays bounded no
+matter how large the input is. With NEXUS_INFERENCE_NODES or
+NEXUS_INFERENCE_SOCKET set, workers send their batches to those
+inference servers instead, where they queue as bulk work behind the
+app's interactive calls.
+"""
+import argparse
+import csv
+import importlib
+import io
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+DEFAULT_MODEL = 'src.core.ensemble_ai:ProfessionalEnsembleAI'
+DEFAULT_BATCH_SIZE = 32
+PROGRESS_INTERVAL = 1.0
+RESULT_FIELDS = ('verdict', 'confidence', 'model_used', 'reasoning', 'processing_time')
+
+_worker_model = None
+
+
+def load_model(spec: str):
+    """Instantiate a model from a ``module:Class`` spec"""
+    module_name, _, attr = spec.partition(':')
+    return getattr(importlib.import_module(module_name), attr)()
+
+
+def load_bulk_model(spec: str):
+    """The shared inference servers when NEXUS_INFERENCE_NODES or NEXUS_INFERENCE_SOCKET is set, else ``spec``"""
+    # Imported here: the inference server itself loads models through this module
+    from src.core.inference_server import InferenceClient
+    from src.core.router import ShardedInferenceRouter
+    
+    nodes = [node for node in os.getenv('NEXUS_INFERENCE_NODES', '').split(',') if node]
+    if nodes:
+        return ShardedInferenceRouter(nodes).start()
+    if os.getenv('NEXUS_INFERENCE_SOCKET'):
+        return InferenceClient(os.environ['NEXUS_INFERENCE_SOCKET'])
+    return load_model(spec)
+
+
+def _init_worker(model_spec: str, threads: int):
+    """Load the model once per worker process"""
+    global _worker_model
+    try:
+        import torch
+        # N processes each using every core would oversubscribe the CPU
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_model = load_bulk_model(model_spec)
+
+
+def _result_record(line: int, record: Dict, prediction=None, error: Optional[str] = None) -> Dict:
+    """Every output record has ``line``, the RESULT_FIELDS (None when it failed) and ``error``"""
+    return {**record, 'line': line, **{name: getattr(prediction, name, None) for name in RESULT_FIELDS},
+            'error': error}
+
+
+def verify_records(model, batch: List[Tuple[int, Dict, Optional[str]]], text_field: str = 'text') -> List[Dict]:
+    """Verify one batch of ``read_records`` items, keeping one output record per input record"""
+    texts = [text for _, _, text in batch if text]
+    predictions, error = [], None
+    try:
+        if hasattr(model, 'ensemble_predict_batch'):
+            predictions = model.ensemble_predict_batch(texts, batch_size=max(len(texts), 1))
+        else:
+            predictions = [model.ensemble_predict(text) for text in texts]
+    except Exception as e:
+        logging.error(f"Batch verification failed: {e}")
+        error = str(e)
+    
+    output = []
+    remaining = iter(predictions)
+    for line, record, text in batch:
+        if not text:
+            # Unparseable lines come with their own error
+            output.append(_result_record(line, record, error=record.get('error') or f"missing or empty '{text_field}'"))
+        elif error is None:
+            output.append(_result_record(line, record, next(remaining)))
+        else:
+            output.append(_result_record(line, record, error=error))
+    return output
+
+
+def _verify_batch(batch: List[Tuple[int, Dict, Optional[str]]], text_field: str) -> List[Dict]:
+    """Worker entry point"""
+    return verify_records(_worker_model, batch, text_field)
+
+
+def read_records(stream: Iterable[str], fmt: str, text_field: str = 'text', first_line: Optional[int] = None,
+                 fieldnames: Optional[List[str]] = None) -> Iterator[Tuple[int, Dict, Optional[str]]]:
+    """
+    Yield (line number, record, claim text) lazily from a JSONL or CSV stream.
+    
+    ``first_line`` and ``fieldnames`` let a reader start mid-file, after the
+    CSV header.
+    """
+    if fmt == 'csv':
+        for line, record in enumerate(csv.DictReader(stream, fieldnames=fieldnames), start=first_line or 2):
+            yield line, record, (record.get(text_field) or '').strip() or None
+        return
+    
+    for line, raw in enumerate(stream, start=first_line or 1):
+        if not raw.strip():
+            continue
+        try:
+            record = json.loads(raw)
+        except json.JSONDecodeError as e:
+            yield line, {'line': line, 'error': f"invalid JSON: {e}"}, None
+            continue
+        # Bare strings are claims; other non-objects are reported as missing text
+        if isinstance(record, str):
+            record = {text_field: record}
+        elif not isinstance(record, dict):
+            record = {'value': record}
+        text = record.get(text_field)
+        yield line, record, (text.strip() or None) if isinstance(text, str) else None
+
+
+def iter_batches(records: Iterator, batch_size: int) -> Iterator[List]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class BulkVerifier:
+    """
+    Fan batches of claims out to worker processes and write results in order.
+    
+    Batches are submitted into a sliding window; the oldest batch is always
+    written first, so output order matches input order while later batches
+    keep the workers busy.
+    """
+    
+    def __init__(self, model: str = DEFAULT_MODEL, workers: int = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 window: int = 2, text_field: str = 'text', threads_per_worker: int = 1):
+        self.model = model
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.batch_size = batch_size
+        self.max_pending = self.workers * window
+        self.text_field = text_field
+        self.threads_per_worker = threads_per_worker
+        self.stats = {'records': 0, 'errors': 0, 'elapsed': 0.0}
+    
+    def run(self, source: TextIO, sink: TextIO, fmt: str = 'jsonl', progress: Optional[TextIO] = None) -> Dict:
+        start = last_report = time.perf_counter()
+        pending = deque()
+        
+        def drain_one():
+            nonlocal last_report
+            for result in pending.popleft().result():
+                sink.write(json.dumps(result, ensure_ascii=False, default=str) + '\n')
+                self.stats['records'] += 1
+                self.stats['errors'] += result['error'] is not None
+            now = time.perf_counter()
+            if progress and now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                self._report(progress, now - start)
+        
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.model, self.threads_per_worker)) as pool:
+            for batch in iter_batches(read_records(source, fmt, self.text_field), self.batch_size):
+                if len(pending) >= self.max_pending:
+                    drain_one()
+                pending.append(pool.submit(_verify_batch, batch, self.text_field))
+            while pending:
+                drain_one()
+        
+        sink.flush()
+        self.stats['elapsed'] = time.perf_counter() - start
+        if progress:
+            self._report(progress, self.stats['elapsed'], final=True)
+        return self.stats
+    
+    def _report(self, stream: TextIO, elapsed: float, final: bool = False):
+        rate = self.stats['records'] / elapsed if elapsed else 0.0
+        stream.write(f"\rverified {self.stats['records']:,} claims | {rate:,.1f} claims/s | "
+                     f"{self.stats['errors']:,} errors | {elapsed:,.0f}s" + ('\n' if final else ''))
+        stream.flush()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Verify a JSONL or CSV file of claims in bulk")
+    parser.add_argument('input', help="JSONL or CSV file of claims ('-' for stdin)")
+    parser.add_argument('output', help="JSONL results file ('-' for stdout)")
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help="Input format (default: from the file extension)")
+    parser.add_argument('--text-field', default='text')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--threads-per-worker', type=int, default=1)
+    parser.add_argument('--model', default=DEFAULT_MODEL, help="Model to load in each worker, as module:Class")
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args(argv)
+    
+    fmt = args.format or ('csv' if args.input.lower().endswith('.csv') else 'jsonl')
+    source = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='') if args.input == '-' \
+        else open(args.input, encoding='utf-8', newline='')
+    sink = sys.stdout if args.output == '-' else open(args.output + '.tmp', 'w', encoding='utf-8')
+    
+    verifier = BulkVerifier(args.model, args.workers, args.batch_size, text_field=args.text_field,
+                            threads_per_worker=args.threads_per_worker)
+    try:
+        verifier.run(source, sink, fmt, progress=None if args.quiet else sys.stderr)
+    finally:
+        source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    if sink is not sys.stdout:
+        os.replace(args.output + '.tmp', args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,14 @@
 import torch
 import numpy as np
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import logging
-from dataclasses import dataclass
 import re
 import pandas as pd
 import time
 
-@dataclass
-class PredictionResult:
-    verdict: str
-    confidence: float
-    model_used: str
-    probabilities: Dict[str, float]
-    features: Dict[str, float]
-    reasoning: str
-    processing_time: float
+from src.core.prediction import PredictionResult
+from src.utils.deadline import Deadline
 
 class ProfessionalEnsembleAI:
     """
@@ -42,6 +34,9 @@ class ProfessionalEnsembleAI:
         # Performance tracking - FIXED: Initialize performance_metrics properly
         self.performance_metrics = {}
         self.total_predictions = 0
+        
+        # Per-model latency estimates (seconds), refined as predictions run
+        self.model_latency = {name: stats['latency'] for name, stats in self.get_model_performance().items()}
     
     def _load_professional_models(self):
         """Load models with professional error handling"""
@@ -96,15 +91,15 @@ class ProfessionalEnsembleAI:
             3: 'unverifiable'
         }
     
-    def ensemble_predict(self, text: str) -> PredictionResult:
-        """Professional prediction with comprehensive analysis"""
+    def ensemble_predict(self, text: str, deadline: Optional[Deadline] = None) -> PredictionResult:
+        """Professional prediction with comprehensive analysis, within ``deadline`` when given"""
         start_time = time.time()
         
         # Enhanced feature analysis
         features = self._comprehensive_feature_analysis(text)
         
         # Get ensemble predictions
-        ensemble_result = self._professional_ensemble_predict(text, features)
+        ensemble_result = self._professional_ensemble_predict(text, features, deadline=deadline)
         
         # Generate professional reasoning
         reasoning = self._generate_professional_reasoning(ensemble_result, features, text)
@@ -124,15 +119,78 @@ class ProfessionalEnsembleAI:
             processing_time=processing_time
         )
     
-    def _professional_ensemble_predict(self, text: str, features: Dict) -> Dict:
-        """Professional ensemble prediction"""
+    def ensemble_predict_batch(self, texts: List[str], batch_size: int = 16) -> List[PredictionResult]:
+        """
+        Predict many claims with one padded forward pass per model per batch.
+        
+        Gives the same verdicts as calling ``ensemble_predict`` on each text;
+        ``processing_time`` is the batch time shared out per claim.
+        """
+        results = []
+        for offset in range(0, len(texts), batch_size):
+            chunk = texts[offset:offset + batch_size]
+            start_time = time.time()
+            
+            model_outputs = {
+                model_name: self._batch_model_predict(chunk, model_name)
+                for model_name in self.ensemble_weights
+                if model_name in self.models and model_name in self.tokenizers
+            }
+            
+            chunk_results = []
+            for i, text in enumerate(chunk):
+                features = self._comprehensive_feature_analysis(text)
+                ensemble_result = self._professional_ensemble_predict(
+                    text, features, {model_name: outputs[i] for model_name, outputs in model_outputs.items()}
+                )
+                chunk_results.append(PredictionResult(
+                    verdict=ensemble_result['verdict'],
+                    confidence=ensemble_result['confidence'],
+                    model_used='professional-ensemble',
+                    probabilities=ensemble_result['probabilities'],
+                    features=features,
+                    reasoning=self._generate_professional_reasoning(ensemble_result, features, text),
+                    processing_time=0.0
+                ))
+            
+            per_claim = (time.time() - start_time) / len(chunk)
+            for result in chunk_results:
+                result.processing_time = per_claim
+            results.extend(chunk_results)
+            self.total_predictions += len(chunk)
+        
+        return results
+    
+    def _professional_ensemble_predict(self, text: str, features: Dict,
+                                       model_outputs: Dict[str, Tuple[str, float, Dict]] = None,
+                                       deadline: Optional[Deadline] = None) -> Dict:
+        """
+        Professional ensemble prediction, optionally from precomputed per-model outputs.
+        
+        Models run in order of ensemble weight. Under a ``deadline`` the
+        highest-weighted model always runs, but any later model whose
+        expected latency no longer fits the remaining budget is dropped and
+        the remaining weights are renormalised.
+        """
         all_predictions = []
+        skipped_models = []
+        used_weight = 0.0
         weighted_confidences = {'true': 0.0, 'false': 0.0, 'misleading': 0.0, 'unverifiable': 0.0}
         
-        for model_name, weight in self.ensemble_weights.items():
+        # Highest weight first, whatever order the weights were declared in
+        for model_name, weight in sorted(self.ensemble_weights.items(), key=lambda item: item[1], reverse=True):
             # FIXED: Check if model exists before using it
             if model_name in self.models and model_name in self.tokenizers:
-                verdict, confidence, probabilities = self._single_model_predict(text, model_name)
+                if model_outputs is not None and model_name in model_outputs:
+                    verdict, confidence, probabilities = model_outputs[model_name]
+                elif (deadline is not None and all_predictions
+                      and not deadline.allows(self.model_latency.get(model_name, 0.0))):
+                    skipped_models.append(model_name)
+                    deadline.skip(f"model:{model_name}")
+                    continue
+                else:
+                    verdict, confidence, probabilities = self._single_model_predict(text, model_name)
+                used_weight += weight
                 
                 # FIXED: Safely update performance metrics
                 if model_name in self.performance_metrics:
@@ -159,6 +217,11 @@ class ProfessionalEnsembleAI:
                 for key in weighted_confidences.keys():
                     weighted_confidences[key] += probabilities.get(key, 0) * weight * calibrated_confidence
         
+        # Dropped models leave the survivors' weights summing to less than one
+        if skipped_models and used_weight > 0:
+            for key in weighted_confidences:
+                weighted_confidences[key] /= used_weight
+        
         # Determine final verdict
         final_verdict = max(weighted_confidences.items(), key=lambda x: x[1])
         final_confidence = final_verdict[1]
@@ -173,7 +236,8 @@ class ProfessionalEnsembleAI:
             'verdict': final_verdict,
             'confidence': min(final_confidence, 0.95),
             'probabilities': {model['model']: model['probabilities'] for model in all_predictions},
-            'model_breakdown': all_predictions
+            'model_breakdown': all_predictions,
+            'skipped_models': skipped_models
         }
     
     def _single_model_predict(self, text: str, model_name: str) -> Tuple[str, float, Dict]:
@@ -181,7 +245,8 @@ class ProfessionalEnsembleAI:
         try:
             if model_name not in self.models or model_name not in self.tokenizers:
                 return self._get_fallback_prediction(text, model_name)
-                
+            
+            start_time = time.time()
             inputs = self._preprocess_text(text, model_name)
             model = self.models[model_name]
             
@@ -191,6 +256,10 @@ class ProfessionalEnsembleAI:
                 predicted_class = torch.argmax(probabilities, dim=1).item()
                 confidence = probabilities[0][predicted_class].item()
             
+            # Exponentially weighted latency, used to decide which models fit a deadline
+            elapsed = time.time() - start_time
+            self.model_latency[model_name] = 0.8 * self.model_latency.get(model_name, elapsed) + 0.2 * elapsed
+            
             verdict = self.verdict_map.get(predicted_class, 'unverifiable')
             
             prob_dict = {
@@ -206,6 +275,27 @@ class ProfessionalEnsembleAI:
             print(f"❌ Prediction failed for {model_name}: {e}")
             return self._get_fallback_prediction(text, model_name)
     
+    def _batch_model_predict(self, texts: List[str], model_name: str) -> List[Tuple[str, float, Dict]]:
+        """Single model prediction for a padded batch of texts"""
+        try:
+            inputs = self._preprocess_text(texts, model_name)
+            
+            with torch.no_grad():
+                outputs = self.models[model_name](**inputs)
+                probabilities = torch.nn.functional.softmax(outputs.logits, dim=-1).cpu().numpy()
+            
+            predictions = []
+            for row in probabilities:
+                predicted_class = int(np.argmax(row))
+                prob_dict = {self.verdict_map[i]: float(row[i]) for i in range(len(self.verdict_map))}
+                predictions.append((self.verdict_map.get(predicted_class, 'unverifiable'),
+                                    float(row[predicted_class]), prob_dict))
+            return predictions
+        
+        except Exception as e:
+            print(f"❌ Batch prediction failed for {model_name}: {e}")
+            return [self._get_fallback_prediction(text, model_name) for text in texts]
+    
     def _get_fallback_prediction(self, text: str, model_name: str) -> Tuple[str, float, Dict]:
         """Intelligent fallback prediction"""
         text_lower = text.lower()
@@ -305,10 +395,13 @@ class ProfessionalEnsembleAI:
         
         return " ".join(reasoning_parts)
     
-    def _preprocess_text(self, text: str, model_name: str) -> Dict:
-        """Professional text preprocessing"""
+    def _preprocess_text(self, text, model_name: str) -> Dict:
+        """Professional text preprocessing for one text or a list of texts"""
         tokenizer = self.tokenizers[model_name]
-        cleaned_text = re.sub(r'\s+', ' ', text.strip())[:512]
+        if isinstance(text, list):
+            cleaned_text = [re.sub(r'\s+', ' ', item.strip())[:512] for item in text]
+        else:
+            cleaned_text = re.sub(r'\s+', ' ', text.strip())[:512]
         
         inputs = tokenizer(
             cleaned_text,
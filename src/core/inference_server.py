@@ -0,0 +1,427 @@
+"""
+Pre-forking inference server on a Unix socket.
+
+The parent process loads the ensemble once and then forks worker
+processes that inherit the loaded weights copy-on-write, so N workers cost
+roughly one copy of the model while each runs inference outside the
+others' GIL. The parent accepts every connection and hands each
+prediction to an idle worker over that worker's socket pair, so the
+node's prediction cache lives in one place and every worker's results
+land in it. Predictions queue for a worker in the parent's
+``InferenceScheduler``, so the app's interactive calls and bulk jobs
+sharing a node are weighed against each other there.
+    
+    python -m src.core.inference_server --workers 4 --socket /tmp/nexus-inference.sock
+
+Set NEXUS_INFERENCE_SOCKET to the socket path and the app sends
+predictions there instead of loading the models itself. A ``host:port``
+address listens on TCP instead, for nodes behind ``src.core.router``.
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import queue
+import signal
+import socket
+import struct
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from src.core.bulk import DEFAULT_MODEL, load_model
+from src.core.prediction import PredictionResult
+from src.core.scheduler import BULK, INTERACTIVE, InferenceScheduler, SchedulerBusyError
+from src.utils.cache import StaleWhileRevalidateCache
+from src.utils.deadline import Deadline
+from src.utils.helpers import generate_claim_hash
+
+DEFAULT_SOCKET = '/tmp/nexus-inference.sock'
+DEFAULT_CACHE_SIZE = 10000
+PREDICTION_TTL = 3600
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+PREDICTION_FIELDS = ('verdict', 'confidence', 'model_used', 'probabilities', 'features', 'reasoning',
+                     'processing_time')
+_HEADER = struct.Struct('!I')
+
+
+class InferenceTimeoutError(Exception):
+    """
+    A connected inference server did not answer within the client timeout.
+    
+    Deliberately not an ``OSError``: the node is slow or busy, not
+    unreachable, so callers should not treat it as down.
+    """
+    pass
+
+
+def send_frame(sock: socket.socket, message: Dict):
+    """Write one length-prefixed JSON message"""
+    body = json.dumps(message, default=float).encode('utf-8')
+    sock.sendall(_HEADER.pack(len(body)) + body)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> Optional[bytes]:
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            return None
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+
+def recv_frame(sock: socket.socket) -> Optional[Dict]:
+    """Read one length-prefixed JSON message; None when the peer closed the connection"""
+    header = _recv_exactly(sock, _HEADER.size)
+    if header is None:
+        return None
+    size, = _HEADER.unpack(header)
+    if size > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame of {size} bytes exceeds the {MAX_FRAME_BYTES} byte limit")
+    body = _recv_exactly(sock, size)
+    if body is None:
+        return None
+    return json.loads(body)
+
+
+def parse_address(address: str) -> Tuple[int, object]:
+    """Socket family and address: ``host:port`` is TCP, anything else a Unix socket path"""
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and '/' not in address:
+        return socket.AF_INET, (host or '127.0.0.1', int(port))
+    return socket.AF_UNIX, address
+
+
+def encode_prediction(prediction) -> Dict:
+    return {name: getattr(prediction, name, None) for name in PREDICTION_FIELDS}
+
+
+class PreforkInferenceServer:
+    """
+    Load a model once, then serve it from ``workers`` forked processes.
+    
+    ``gc.freeze()`` before forking moves every object created while loading
+    into a permanent generation, so garbage collection in the workers never
+    writes to (and un-shares) the pages holding them. Dead workers are
+    replaced; SIGTERM or SIGINT stops the whole group.
+    
+    The parent keeps one LRU of recent predictions keyed on the normalized
+    claim hash and only sends the misses to a worker, so a repeated claim
+    is a hit whichever worker ran it first. The cache-affinity router
+    keeps each node's cache warm.
+    """
+    
+    def __init__(self, model: str = DEFAULT_MODEL, address: str = DEFAULT_SOCKET,
+                 workers: Optional[int] = None, threads_per_worker: int = 1, backlog: int = 256,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        self.model_spec = model
+        self.address = address
+        self.family, self.bind_address = parse_address(address)
+        self.workers = workers or os.cpu_count() or 1
+        self.threads_per_worker = threads_per_worker
+        self.backlog = backlog
+        self.cache = StaleWhileRevalidateCache(ttl=PREDICTION_TTL, stale_ttl=0, max_entries=cache_size)
+        self.scheduler = InferenceScheduler(self.workers)
+        self.model = None
+        self.listener = None
+        self.children: Dict[int, socket.socket] = {}
+        self._idle = queue.Queue()
+        self._stopping = False
+    
+    def start(self):
+        """Load the model and bind the socket in the parent, fork the workers, then start accepting"""
+        self.model = load_model(self.model_spec)
+        self.listener = socket.socket(self.family, socket.SOCK_STREAM)
+        if self.family == socket.AF_UNIX:
+            if os.path.exists(self.bind_address):
+                os.unlink(self.bind_address)
+            self.listener.bind(self.bind_address)
+            os.chmod(self.bind_address, 0o600)
+        else:
+            self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.listener.bind(self.bind_address)
+        self.listener.listen(self.backlog)
+        
+        gc.collect()
+        gc.freeze()
+        for _ in range(self.workers):
+            self._spawn()
+        threading.Thread(target=self._accept_loop, daemon=True, name='inference-accept').start()
+        logging.info(f"Serving {self.model_spec} on {self.address} with {self.workers} workers")
+    
+    def _spawn(self):
+        parent_end, child_end = socket.socketpair()
+        # A replacement is forked while the accept threads run; the child only
+        # touches its own socket and the model, never a lock they may hold
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                parent_end.close()
+                self._worker_main(child_end)
+            except BaseException as e:
+                logging.error(f"Inference worker {os.getpid()} crashed: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+        child_end.close()
+        self.children[pid] = parent_end
+        self._idle.put((pid, parent_end))
+    
+    def serve_forever(self):
+        """Supervise the workers until signalled"""
+        signal.signal(signal.SIGTERM, self._signal_stop)
+        signal.signal(signal.SIGINT, self._signal_stop)
+        try:
+            while self.children:
+                try:
+                    pid, status = os.wait()
+                except ChildProcessError:
+                    break
+                except InterruptedError:
+                    continue
+                channel = self.children.pop(pid, None)
+                if channel is not None:
+                    channel.close()
+                if not self._stopping:
+                    logging.error(f"Inference worker {pid} exited with status {status}; restarting")
+                    time.sleep(0.1)
+                    self._spawn()
+        finally:
+            self.stop()
+    
+    def _signal_stop(self, signum, frame):
+        self._stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.children.pop(pid, None)
+    
+    def stop(self):
+        self._signal_stop(None, None)
+        if self.listener is not None:
+            try:
+                # Wakes the accept thread, which close() alone does not
+                self.listener.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.listener.close()
+            self.listener = None
+        if self.family == socket.AF_UNIX and os.path.exists(self.bind_address):
+            os.unlink(self.bind_address)
+    
+    def _worker_main(self, channel: socket.socket):
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        self.listener.close()
+        for sibling in self.children.values():
+            sibling.close()
+        try:
+            import torch
+            # One intra-op thread per worker: the processes provide the parallelism
+            torch.set_num_threads(self.threads_per_worker)
+        except ImportError:
+            pass
+        # Serve the parent until it closes the socket pair
+        self._serve_connection(channel, self._execute)
+    
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                return                                  # listener closed by stop()
+            threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+    
+    def _serve_client(self, conn: socket.socket):
+        with conn:
+            self._serve_connection(conn, self.handle)
+    
+    def _serve_connection(self, conn: socket.socket, handler):
+        while True:
+            try:
+                request = recv_frame(conn)
+            except (OSError, ValueError) as e:
+                logging.error(f"Bad inference request: {e}")
+                return
+            if request is None:
+                return
+            try:
+                response = handler(request)
+            except SchedulerBusyError as e:
+                response = {'error': str(e), 'busy': True}
+            except Exception as e:
+                logging.error(f"Inference request failed: {e}")
+                response = {'error': str(e)}
+            send_frame(conn, response)
+    
+    def handle(self, request: Dict) -> Dict:
+        """Answer a client request in the parent"""
+        op = request.get('op')
+        if op == 'predict':
+            return {'results': self.predict(request['texts'], request.get('priority') or INTERACTIVE,
+                                            request.get('timeout'))}
+        if op == 'metrics':
+            return {**self._on_worker(request), 'cache': self.cache.get_metrics(),
+                    'scheduler': self.scheduler.get_status()}
+        if op == 'ping':
+            return self._on_worker(request)
+        raise ValueError(f"Unknown op {op!r}")
+    
+    def predict(self, texts: List[str], priority: str = INTERACTIVE, timeout: Optional[float] = None) -> List[Dict]:
+        """
+        Encoded predictions, sending only the claims not in the cache to a worker.
+        
+        The misses wait for a worker as ``priority``-class work costing one
+        unit per claim, for at most ``timeout`` seconds.
+        """
+        keys = [generate_claim_hash(text) for text in texts]
+        results = [self.cache.get(key, default=None) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            response = self.scheduler.run(priority, self._on_worker,
+                                          {'op': 'predict', 'texts': [texts[i] for i in missing]},
+                                          cost=len(missing), timeout=timeout)
+            for i, result in zip(missing, response['results']):
+                results[i] = result
+                self.cache.put(keys[i], result)
+        return results
+    
+    def _on_worker(self, request: Dict) -> Dict:
+        """Run one request on the next idle worker, waiting for one to free up"""
+        while True:
+            pid, channel = self._idle.get()
+            if self.children.get(pid) is channel:
+                break                                   # otherwise the worker exited since it went idle
+        try:
+            send_frame(channel, request)
+            response = recv_frame(channel)
+        except OSError:
+            response = None
+        if response is None:
+            # Leave it out of the idle queue; the supervisor reaps it and forks a replacement
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            raise ConnectionError(f"Inference worker {pid} died during a request")
+        self._idle.put((pid, channel))
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        return response
+    
+    def _execute(self, request: Dict) -> Dict:
+        """Answer a request from the parent in a worker"""
+        op = request.get('op')
+        if op == 'predict':
+            texts = request['texts']
+            if hasattr(self.model, 'ensemble_predict_batch'):
+                predictions = self.model.ensemble_predict_batch(texts, batch_size=len(texts))
+            else:
+                predictions = [self.model.ensemble_predict(text) for text in texts]
+            return {'results': [encode_prediction(prediction) for prediction in predictions]}
+        if op == 'metrics':
+            system = getattr(self.model, 'get_system_metrics', dict)
+            models = getattr(self.model, 'get_model_performance', dict)
+            return {'system': system(), 'models': models(), 'pid': os.getpid()}
+        if op == 'ping':
+            return {'ok': True, 'pid': os.getpid()}
+        raise ValueError(f"Unknown op {op!r}")
+
+
+class InferenceClient:
+    """
+    Stand-in for ``ProfessionalEnsembleAI`` that forwards to an inference server.
+    
+    Each call uses its own short-lived connection: a Unix socket connect
+    costs microseconds, and an idle pooled connection would pin a server
+    thread.
+    """
+    
+    def __init__(self, address: str = DEFAULT_SOCKET, timeout: float = 30.0):
+        self.address = address
+        self.family, self.connect_address = parse_address(address)
+        self.timeout = timeout
+    
+    def call(self, request: Dict) -> Dict:
+        """
+        Send one request and wait for its response.
+        
+        A connect that fails or times out raises an ``OSError`` (the server
+        is unreachable); a response slower than ``timeout`` raises
+        ``InferenceTimeoutError``.
+        """
+        with socket.socket(self.family, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.connect_address)
+            except socket.timeout as e:
+                raise ConnectionError(f"Connecting to inference server {self.address} timed out") from e
+            try:
+                send_frame(sock, request)
+                response = recv_frame(sock)
+            except socket.timeout as e:
+                raise InferenceTimeoutError(
+                    f"Inference server {self.address} did not answer within {self.timeout}s"
+                ) from e
+        if response is None:
+            raise ConnectionError("Inference server closed the connection")
+        if response.get('busy'):
+            raise SchedulerBusyError(response['error'])
+        if 'error' in response:
+            raise RuntimeError(f"Inference server error: {response['error']}")
+        return response
+    
+    def ensemble_predict_batch(self, texts: List[str], batch_size: int = 16, deadline: Optional[Deadline] = None,
+                               priority: str = BULK) -> List:
+        """Predict in requests of ``batch_size`` claims, scheduled on the server as ``priority`` work"""
+        results = []
+        for offset in range(0, len(texts), batch_size):
+            response = self.call({'op': 'predict', 'texts': texts[offset:offset + batch_size], 'priority': priority,
+                                  'timeout': None if deadline is None else deadline.timeout()})
+            results.extend(PredictionResult(**fields) for fields in response['results'])
+        return results
+    
+    def ensemble_predict(self, text: str, deadline: Optional[Deadline] = None, priority: str = INTERACTIVE):
+        return self.ensemble_predict_batch([text], 1, deadline, priority)[0]
+    
+    def get_system_metrics(self) -> Dict:
+        return self.call({'op': 'metrics'})['system']
+    
+    def get_model_performance(self) -> Dict:
+        return self.call({'op': 'metrics'})['models']
+    
+    def wait_ready(self, timeout: float = 60.0) -> bool:
+        """Poll until the server answers, e.g. while it is still loading the models"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                self.call({'op': 'ping'})
+                return True
+            except (OSError, InferenceTimeoutError):
+                time.sleep(0.1)
+        return False
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Pre-forking inference server")
+    parser.add_argument('--socket', '--listen', dest='address', default=DEFAULT_SOCKET,
+                        help="Unix socket path, or host:port to listen on TCP")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--threads-per-worker', type=int, default=1)
+    parser.add_argument('--model', default=DEFAULT_MODEL, help="Model to load, as module:Class")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE)
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO)
+    server = PreforkInferenceServer(args.model, args.address, args.workers, args.threads_per_worker,
+                                    cache_size=args.cache_size)
+    server.start()
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,15 @@
-import wikipedia
 import requests
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set
 import json
 import logging
 from dataclasses import dataclass
 import re
+import time
+
+from src.utils.deadline import Deadline
+from src.utils.http_client import PooledHTTPClient, get_http_client
+
+WIKIPEDIA_API_URL = 'https://en.wikipedia.org/w/api.php'
 
 @dataclass
 class KnowledgeEvidence:
@@ -20,9 +25,11 @@ class KnowledgeGraphVerifier:
     UPGRADED: Enhanced knowledge graph with real fact-checking capabilities
     """
     
-    def __init__(self):
+    def __init__(self, http_client: Optional[PooledHTTPClient] = None, wikipedia_api_url: str = WIKIPEDIA_API_URL):
         self.entity_cache = {}
         self.fact_patterns = self._load_fact_patterns()
+        self.http = http_client or get_http_client()
+        self.wikipedia_api_url = wikipedia_api_url
     
     def _load_fact_patterns(self) -> Dict:
         """UPGRADED: Load common fact patterns for better verification"""
@@ -102,35 +109,63 @@ class KnowledgeGraphVerifier:
         return entity not in insignificant and len(entity) > 2
     
     def query_wikipedia(self, entity: str) -> Dict:
-        """UPGRADED: Enhanced Wikipedia query with better error handling"""
+        """UPGRADED: Wikipedia lookup over the shared pooled HTTP client"""
         try:
-            wikipedia.set_rate_limiting(True)
             # Search for the entity first to get better results
-            search_results = wikipedia.search(entity, results=3)
+            search = self.http.get_json(self.wikipedia_api_url, params={
+                'action': 'query',
+                'list': 'search',
+                'srsearch': entity,
+                'srlimit': 3,
+                'format': 'json'
+            })
+            search_results = [hit['title'] for hit in search.get('query', {}).get('search', [])]
             if not search_results:
                 return {'error': 'No results found', 'title': entity}
             
             # Use the first search result
-            page_title = search_results[0]
-            page = wikipedia.page(page_title, auto_suggest=False)
+            data = self.http.get_json(self.wikipedia_api_url, params={
+                'action': 'query',
+                'prop': 'extracts|info|categories|pageprops',
+                'titles': search_results[0],
+                'explaintext': 1,
+                'inprop': 'url',
+                'cllimit': 5,
+                'redirects': 1,
+                'format': 'json'
+            })
+            page = next(iter(data.get('query', {}).get('pages', {}).values()), {})
+            
+            if 'missing' in page or not page:
+                return {'error': 'Page not found', 'title': entity}
+            if 'disambiguation' in page.get('pageprops', {}):
+                return {'error': f'Multiple matches: {search_results[1:3]}', 'title': entity}
+            
+            content = page.get('extract', '')
+            # The lead section ends where the first "== Heading ==" starts
+            summary = re.split(r'\n+==', content, maxsplit=1)[0].strip()
+            categories = [c['title'].replace('Category:', '', 1) for c in page.get('categories', [])]
             
             return {
-                'title': page.title,
-                'summary': page.summary[:400] + '...' if len(page.summary) > 400 else page.summary,
-                'url': page.url,
-                'categories': page.categories[:5],
-                'content': page.content[:1000] if len(page.content) > 1000 else page.content
+                'title': page['title'],
+                'summary': summary[:400] + '...' if len(summary) > 400 else summary,
+                'url': page.get('fullurl', ''),
+                'categories': categories[:5],
+                'content': content[:1000] if len(content) > 1000 else content
             }
-        except wikipedia.exceptions.DisambiguationError as e:
-            return {'error': f'Multiple matches: {e.options[:2]}', 'title': entity}
-        except wikipedia.exceptions.PageError:
-            return {'error': 'Page not found', 'title': entity}
         except Exception as e:
             logging.error(f"Wikipedia query error for {entity}: {e}")
             return {'error': 'Query failed', 'title': entity}
     
-    def verify_against_knowledge(self, text: str, entities: List[str]) -> KnowledgeEvidence:
-        """UPGRADED: Enhanced verification with fact pattern matching"""
+    def verify_against_knowledge(self, text: str, entities: List[str],
+                                 deadline: Optional[Deadline] = None) -> KnowledgeEvidence:
+        """
+        UPGRADED: Enhanced verification with fact pattern matching.
+        
+        Under a ``deadline`` an entity is only looked up while the slowest
+        lookup so far still fits in the remaining budget; the rest are
+        recorded as skipped and the evidence gathered so far is returned.
+        """
         supporting_facts = []
         contradicting_facts = []
         related_entities = []
@@ -140,8 +175,14 @@ class KnowledgeGraphVerifier:
         pattern_check = self._check_against_fact_patterns(text)
         
         # Then verify with Wikipedia for entities
+        slowest_lookup = 0.0
         for entity in entities[:4]:  # Limit to top 4 entities
+            if deadline is not None and (deadline.expired() or not deadline.allows(slowest_lookup)):
+                deadline.skip(f"entity:{entity}")
+                continue
+            start_time = time.monotonic()
             wiki_data = self.query_wikipedia(entity)
+            slowest_lookup = max(slowest_lookup, time.monotonic() - start_time)
             
             if 'error' not in wiki_data:
                 sources.append(wiki_data['url'])
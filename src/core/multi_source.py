@@ -1,8 +1,15 @@
+import re
 import time
-from typing import Dict, List
+from typing import Dict, List, Optional
 import logging
 from dataclasses import dataclass
 
+from src.core.knowledge_graph import WIKIPEDIA_API_URL
+from src.core.sources import FunctionSource, HTTPSource, SourceRegistry, SourceTimeoutError, VerificationSource
+from src.utils.deadline import Deadline
+from src.utils.helpers import normalize_claim
+from src.utils.http_client import PooledHTTPClient
+
 @dataclass
 class SourceResult:
     source: str
@@ -10,35 +17,117 @@ class SourceResult:
     confidence: float
     evidence: List[str]
     url: str
+    reliability: float = 1.0
+
+def wikipedia_search_params(claim: str) -> Dict:
+    return {'action': 'query', 'list': 'search', 'srsearch': claim, 'srlimit': 3, 'format': 'json'}
+
+def parse_wikipedia_search(data: Dict) -> Dict:
+    """Search hits are evidence without a stance, so a claim with matching articles is 'mixed'"""
+    hits = data.get('query', {}).get('search', [])
+    if not hits:
+        return {'verdict': 'unknown', 'confidence': 0.3, 'evidence': [], 'url': 'https://en.wikipedia.org'}
+    return {
+        'verdict': 'mixed',
+        'confidence': 0.5,
+        'evidence': [f"{hit['title']}: {re.sub(r'<[^>]+>', '', hit.get('snippet', ''))}" for hit in hits],
+        'url': 'https://en.wikipedia.org/wiki/' + hits[0]['title'].replace(' ', '_')
+    }
 
 class MultiSourceVerifier:
     """
-    Multi-source fact verification system - SYNCHRONOUS VERSION
+    Multi-source fact verification system.
+    
+    Sources are plugins registered in a ``SourceRegistry``; every source is
+    queried concurrently behind its own circuit breaker.
     """
     
-    def __init__(self):
-        self.sources = {
-            'wikipedia': self.query_wikipedia,
-            'news': self.query_news,
-            'fact_check': self.query_fact_check
-        }
+    def __init__(self, registry: Optional[SourceRegistry] = None, register_defaults: bool = True,
+                 http_client: Optional[PooledHTTPClient] = None, wikipedia_api_url: str = WIKIPEDIA_API_URL):
+        self.registry = registry or SourceRegistry()
+        self.http = http_client
+        self.wikipedia_api_url = wikipedia_api_url
+        if register_defaults:
+            self._register_default_sources()
     
-    def verify_claim(self, claim: str) -> Dict:
-        """Verify claim across multiple sources - SYNCHRONOUS VERSION"""
-        results = []
+    def _register_default_sources(self):
+        """Register the built-in sources with their declared cost, timeout and reliability"""
+        self.registry.register(HTTPSource(
+            'wikipedia', self.wikipedia_api_url, wikipedia_search_params, parse_wikipedia_search,
+            http_client=self.http, cost=1.0, timeout=5.0, reliability=0.8, hedge_after=0.5, cache_ttl=6 * 3600
+        ))
+        self.registry.register(FunctionSource(
+            'news', self.query_news, cost=2.0, timeout=5.0, reliability=0.7, cache_ttl=15 * 60
+        ))
+        self.registry.register(FunctionSource(
+            'fact_check', self.query_fact_check, cost=2.0, timeout=5.0, reliability=0.9,
+            cache_ttl=24 * 3600
+        ))
+    
+    def register_source(self, source: VerificationSource) -> VerificationSource:
+        """Plug an additional source into the verifier"""
+        return self.registry.register(source)
+    
+    def verify_claim(self, claim: str, deadline: Optional[Deadline] = None) -> Dict:
+        """Verify claim across all registered sources, aggregating those that answer before ``deadline``"""
+        if deadline is None:
+            outcomes = self.registry.query_all(claim)
+        else:
+            outcomes = self.registry.query_all(claim, timeout=deadline.timeout())
+            for name, outcome in outcomes.items():
+                if isinstance(outcome, SourceTimeoutError) and deadline.expired():
+                    deadline.skip(f"source:{name}")
+        return self._aggregate_results(self._to_source_results(outcomes), claim)
+    
+    def verify_claims(self, claims: List[str]) -> List[Dict]:
+        """
+        Verify many claims at once.
         
-        for source_name, query_func in self.sources.items():
+        Claims are deduplicated after normalization, grouped into batched
+        upstream calls for sources that accept several claims per request,
+        and all groups run concurrently. Results come back in input order.
+        """
+        unique_claims = {}
+        for claim in claims:
+            unique_claims.setdefault(normalize_claim(claim), claim)
+        keys = list(unique_claims.keys())
+        
+        futures = []
+        for name, source in self.registry.sources.items():
+            if source.batch_size <= 1:
+                for key in keys:
+                    futures.append((name, [key], False, self.registry.dispatcher.submit(
+                        self.registry.query, name, unique_claims[key]
+                    )))
+                continue
+            for i in range(0, len(keys), source.batch_size):
+                group = keys[i:i + source.batch_size]
+                futures.append((name, group, True, self.registry.dispatcher.submit(
+                    self.registry.query_batch, name, [unique_claims[key] for key in group]
+                )))
+        
+        outcomes = {key: {} for key in keys}
+        for name, group, batched, future in futures:
             try:
-                result = query_func(claim)
-                results.append(SourceResult(
-                    source=source_name,
-                    verdict=result.get('verdict', 'unknown'),
-                    confidence=result.get('confidence', 0.5),
-                    evidence=result.get('evidence', []),
-                    url=result.get('url', '')
-                ))
+                answers = future.result() if batched else [future.result()]
             except Exception as e:
-                logging.error(f"Error querying {source_name}: {e}")
+                answers = [e] * len(group)
+            for key, outcome in zip(group, answers):
+                outcomes[key][name] = outcome
+        
+        verified = {
+            key: self._aggregate_results(self._to_source_results(outcomes[key]), unique_claims[key])
+            for key in keys
+        }
+        return [verified[normalize_claim(claim)] for claim in claims]
+    
+    def _to_source_results(self, outcomes: Dict[str, object]) -> List[SourceResult]:
+        """Convert per-source answers or exceptions into SourceResults"""
+        results = []
+        
+        for source_name, outcome in outcomes.items():
+            if isinstance(outcome, Exception):
+                logging.error(f"Error querying {source_name}: {outcome}")
                 results.append(SourceResult(
                     source=source_name,
                     verdict='error',
@@ -46,38 +135,26 @@ class MultiSourceVerifier:
                     evidence=[],
                     url=''
                 ))
+                continue
+            
+            results.append(SourceResult(
+                source=source_name,
+                verdict=outcome.get('verdict', 'unknown'),
+                confidence=outcome.get('confidence', 0.5),
+                evidence=outcome.get('evidence', []),
+                url=outcome.get('url', ''),
+                reliability=self.registry.sources[source_name].reliability
+            ))
         
-        return self._aggregate_results(results, claim)
+        return results
     
-    def query_wikipedia(self, claim: str) -> Dict:
-        """Query Wikipedia for claim verification"""
-        # Simulate API call delay
-        time.sleep(0.2)
-        
-        # Mock implementation - analyze claim content
-        claim_lower = claim.lower()
-        
-        if any(word in claim_lower for word in ['earth', 'round', 'planet', 'science']):
-            return {
-                'verdict': 'supported',
-                'confidence': 0.8,
-                'evidence': ['Scientific consensus supports this claim'],
-                'url': 'https://en.wikipedia.org/wiki/Earth'
-            }
-        elif any(word in claim_lower for word in ['breaking', 'secret', 'urgent', 'shocking']):
-            return {
-                'verdict': 'contradicted',
-                'confidence': 0.7,
-                'evidence': ['No reliable sources support this sensational claim'],
-                'url': 'https://en.wikipedia.org'
-            }
-        else:
-            return {
-                'verdict': 'mixed',
-                'confidence': 0.5,
-                'evidence': ['Insufficient information for definitive verification'],
-                'url': 'https://en.wikipedia.org'
-            }
+    def get_source_status(self) -> Dict:
+        """Circuit breaker state and call statistics for every source"""
+        return self.registry.get_status()
+    
+    def get_cache_metrics(self) -> Dict:
+        """Hit ratio and staleness of each source's response cache"""
+        return {name: cache.get_metrics() for name, cache in self.registry.caches.items()}
     
     def query_news(self, claim: str) -> Dict:
         """Query news sources"""
@@ -161,7 +238,7 @@ class MultiSourceVerifier:
         weighted_sum = 0
         
         for result in valid_results:
-            weight = result.confidence
+            weight = result.confidence * result.reliability
             verdict_weight = verdict_weights.get(result.verdict, 0.0)
             
             weighted_sum += verdict_weight * weight
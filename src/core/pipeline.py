@@ -0,0 +1,395 @@
+import time
+import json
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.core.scheduler import SchedulerBusyError
+from src.utils.cache import SingleFlight
+from src.utils.deadline import Deadline
+from src.utils.helpers import accepts_keyword, generate_claim_hash
+
+# Seconds past the deadline that stages get to hand back the partial results they cut short
+DEADLINE_GRACE = 0.05
+
+_stage_executor = None
+_analysis_executor = None
+_stage_executor_lock = threading.Lock()
+
+# Module-level so identical claims are shared across sessions, each of which builds its own pipeline
+_analysis_flights = SingleFlight()
+
+
+def _get_stage_executor() -> ThreadPoolExecutor:
+    """Shared pool for pipeline stages, sized for I/O-bound stages"""
+    global _stage_executor
+    with _stage_executor_lock:
+        if _stage_executor is None:
+            _stage_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='pipeline-stage')
+        return _stage_executor
+
+
+def _get_analysis_executor() -> ThreadPoolExecutor:
+    """
+    Shared pool running whole background analyses.
+    
+    Kept apart from the stage pool: an analysis blocks on its stages, so
+    sharing one pool could deadlock once every worker held an analysis.
+    """
+    global _analysis_executor
+    with _stage_executor_lock:
+        if _analysis_executor is None:
+            _analysis_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='analysis')
+        return _analysis_executor
+
+
+def analysis_flight_key(text: str, options: Dict) -> Tuple[str, str]:
+    """Identical analyses: the same normalized claim with the same options"""
+    return generate_claim_hash(text), json.dumps(options, sort_keys=True, default=str)
+
+
+def _call_with_context(func: Callable, context: Dict, *args) -> Any:
+    """Call an injected component, passing the run's deadline and priority to components that take them"""
+    kwargs = {name: context[name] for name in ('deadline', 'priority')
+              if name in context and accepts_keyword(func, name)}
+    return func(*args, **kwargs)
+
+
+def get_single_flight_metrics() -> Dict:
+    """Analyses requested, actually computed, and shared with an identical one in flight"""
+    return _analysis_flights.get_metrics()
+
+
+class PipelineError(Exception):
+    """Raised for an invalid stage graph"""
+    pass
+
+
+@dataclass
+class Stage:
+    """
+    One unit of pipeline work.
+    
+    ``func`` receives a dict holding the pipeline inputs plus the value of
+    every stage listed in ``depends_on``. ``optional`` stages are skipped
+    once the run's deadline has passed.
+    """
+    name: str
+    func: Callable[[Dict], Any]
+    depends_on: List[str] = field(default_factory=list)
+    label: str = ''
+    optional: bool = False
+
+
+@dataclass
+class StageResult:
+    name: str
+    value: Any = None
+    duration: float = 0.0
+    error: Optional[str] = None
+    skipped: bool = False
+
+
+@dataclass
+class StageEvent:
+    """Progress event emitted as each stage finishes"""
+    stage: str
+    label: str
+    completed: int
+    total: int
+    result: StageResult
+
+
+class AnalysisHandle:
+    """
+    A background analysis whose finished stages can be read while the rest run.
+    
+    The work belongs to a shared executor rather than to the caller, so the
+    handle can be kept in ``st.session_state`` and polled on later reruns;
+    an interrupted script run does not lose it.
+    """
+    
+    def __init__(self, text: str, options: Dict, total: int):
+        self.text = text
+        self.options = options
+        self.total = total
+        self.submitted_at = time.time()
+        self.last_event: Optional[StageEvent] = None
+        self.saved = False      # set by the caller once the result has been persisted
+        self._partial: Dict = {}
+        self._lock = threading.Lock()
+        self._future: Optional[Future] = None
+        self._followers: List['AnalysisHandle'] = []
+    
+    def _on_progress(self, event: StageEvent):
+        with self._lock:
+            self.last_event = event
+            result = event.result
+            if result.error is None and not result.skipped and event.stage != 'entities':
+                self._partial[event.stage] = result.value
+            followers = list(self._followers)
+        for follower in followers:
+            follower._on_progress(event)
+    
+    def follow(self, text: str) -> 'AnalysisHandle':
+        """
+        A handle of its own onto this analysis, for a session asking for the same claim.
+        
+        It shares the computation and progress but keeps its own text and
+        ``saved`` flag, so each session still records the result once.
+        """
+        follower = AnalysisHandle(text, self.options, self.total)
+        follower._future = self._future
+        with self._lock:
+            follower.last_event = self.last_event
+            follower._partial = dict(self._partial)
+            self._followers.append(follower)
+        return follower
+    
+    def add_done_callback(self, callback: Callable[['AnalysisHandle'], None]):
+        self._future.add_done_callback(lambda _: callback(self))
+    
+    def done(self) -> bool:
+        return self._future is not None and self._future.done()
+    
+    def progress(self) -> Tuple[int, int]:
+        """(stages finished, stages in total)"""
+        with self._lock:
+            return (self.last_event.completed if self.last_event else 0), self.total
+    
+    def snapshot(self) -> Dict:
+        """The full result once done, otherwise the values of the stages finished so far"""
+        if self.done():
+            try:
+                return self._future.result()
+            except Exception as e:
+                logging.error(f"Background analysis failed: {e}")
+                return {**self._partial, 'errors': {'pipeline': str(e)}}
+        with self._lock:
+            return dict(self._partial)
+    
+    def result(self, timeout: Optional[float] = None) -> Dict:
+        """Block until the analysis finishes"""
+        return self._future.result(timeout)
+
+
+class PipelineExecutor:
+    """
+    Run a DAG of stages, starting each one as soon as its dependencies finish.
+    
+    Independent stages run concurrently on a thread pool. A failed stage is
+    recorded and its dependents are skipped; the rest still run. A
+    ``SchedulerBusyError`` is not a stage failure and is raised from ``run``. Progress
+    callbacks fire on the calling thread, in completion order.
+    
+    With a ``Deadline`` the run returns when it expires: stages still
+    running ``DEADLINE_GRACE`` seconds later are abandoned (their threads
+    finish in the background) and reported as skipped, along with
+    everything depending on them.
+    """
+    
+    def __init__(self, stages: List[Stage], executor: Optional[ThreadPoolExecutor] = None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.executor = executor
+        self._validate()
+    
+    def _validate(self):
+        for stage in self.stages.values():
+            missing = [dep for dep in stage.depends_on if dep not in self.stages]
+            if missing:
+                raise PipelineError(f"Stage {stage.name} depends on unknown stages {missing}")
+        
+        # Depth-first search for cycles
+        state = {}
+        
+        def visit(name: str, path: List[str]):
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise PipelineError(f"Dependency cycle: {' -> '.join(path + [name])}")
+            state[name] = 'visiting'
+            for dep in self.stages[name].depends_on:
+                visit(dep, path + [name])
+            state[name] = 'done'
+        
+        for name in self.stages:
+            visit(name, [])
+    
+    def run(self, inputs: Optional[Dict] = None, on_progress: Optional[Callable[[StageEvent], None]] = None,
+            deadline: Optional[Deadline] = None) -> Dict[str, StageResult]:
+        executor = self.executor or _get_stage_executor()
+        inputs = dict(inputs or {})
+        if deadline is not None:
+            inputs['deadline'] = deadline
+        results: Dict[str, StageResult] = {}
+        pending = dict(self.stages)
+        running: Dict[Future, str] = {}
+        
+        def timed(stage: Stage, context: Dict) -> StageResult:
+            start = time.perf_counter()
+            try:
+                value = stage.func(context)
+                return StageResult(stage.name, value, time.perf_counter() - start)
+            except SchedulerBusyError:
+                # Overload, not a stage failure: the caller answers it with 503 and Retry-After
+                raise
+            except Exception as e:
+                logging.error(f"Pipeline stage {stage.name} failed: {e}")
+                return StageResult(stage.name, None, time.perf_counter() - start, error=str(e))
+        
+        def finish(result: StageResult):
+            results[result.name] = result
+            if on_progress:
+                stage = self.stages[result.name]
+                on_progress(StageEvent(stage.name, stage.label or stage.name, len(results), len(self.stages), result))
+        
+        while pending or running:
+            for name, stage in list(pending.items()):
+                deps = [results.get(dep) for dep in stage.depends_on]
+                if any(dep is None for dep in deps):
+                    continue
+                del pending[name]
+                if any(dep.error or dep.skipped for dep in deps):
+                    if deadline is not None and any(dep.name in deadline.skipped for dep in deps):
+                        deadline.skip(name)
+                    finish(StageResult(name, skipped=True))
+                    continue
+                if stage.optional and deadline is not None and deadline.expired():
+                    deadline.skip(name)
+                    finish(StageResult(name, skipped=True))
+                    continue
+                context = {**inputs, **{dep.name: dep.value for dep in deps}}
+                running[executor.submit(timed, stage, context)] = name
+            
+            if not running:
+                continue
+            timeout = deadline.timeout() if deadline is not None else None
+            if timeout is not None:
+                timeout += DEADLINE_GRACE
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Out of time: give up on the running stages and let their dependents be skipped
+                for name in list(running.values()):
+                    deadline.skip(name)
+                    finish(StageResult(name, skipped=True))
+                running.clear()
+                continue
+            for future in done:
+                del running[future]
+                finish(future.result())
+        
+        return results
+
+
+class AnalysisPipeline:
+    """
+    The verifier's analysis as a stage graph.
+    
+    The ensemble model, knowledge graph and multi-source lookups are
+    independent and run concurrently; the explanation waits only for the
+    ensemble. Components are injected so the UI and the HTTP service share
+    one set of loaded models and caches.
+    """
+    
+    def __init__(self, ai_system, knowledge_graph=None, multi_source=None, explainable_ai=None,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        self.ai_system = ai_system
+        self.knowledge_graph = knowledge_graph
+        self.multi_source = multi_source
+        self.explainable_ai = explainable_ai
+        self.executor = executor
+    
+    def build_stages(self, options: Dict) -> List[Stage]:
+        stages = [Stage('ai_analysis',
+                        lambda ctx: _call_with_context(self.ai_system.ensemble_predict, ctx, ctx['text']),
+                        label="🧠 Ensemble models")]
+        
+        if options.get('knowledge_graph') and self.knowledge_graph is not None:
+            stages.append(Stage('entities', lambda ctx: self.knowledge_graph.extract_entities(ctx['text']),
+                                label="🔍 Entity extraction"))
+            stages.append(Stage(
+                'knowledge_evidence',
+                lambda ctx: _call_with_context(self.knowledge_graph.verify_against_knowledge, ctx,
+                                                ctx['text'], ctx['entities']),
+                depends_on=['entities'], label="🌐 Knowledge graph"
+            ))
+        
+        if options.get('multi_source') and self.multi_source is not None:
+            stages.append(Stage('multi_source',
+                                lambda ctx: _call_with_context(self.multi_source.verify_claim, ctx, ctx['text']),
+                                label="🔗 Multi-source verification"))
+        
+        if options.get('deep_analysis') and self.explainable_ai is not None:
+            stages.append(Stage(
+                'explanation',
+                lambda ctx: self.explainable_ai.generate_explanation(ctx['ai_analysis'], ctx['text']),
+                depends_on=['ai_analysis'], label="⚡ Explanation", optional=True
+            ))
+        return stages
+    
+    def analyze(self, text: str, options: Dict, on_progress: Optional[Callable[[StageEvent], None]] = None,
+                deadline: Optional[Deadline] = None) -> Dict:
+        """
+        Run every enabled stage for ``text``.
+        
+        Returns the stage values keyed by stage name (failed or skipped
+        stages are left out) plus ``timings`` in seconds per stage, the
+        overall ``latency`` and ``skipped``, the work left out to meet the
+        deadline. Without a ``deadline``, ``options['budget_ms']`` sets one.
+        ``options['priority']`` picks the inference scheduling class.
+        """
+        start = time.perf_counter()
+        if deadline is None:
+            deadline = Deadline.from_ms(options.get('budget_ms'))
+        inputs = {'text': text}
+        if options.get('priority'):
+            inputs['priority'] = options['priority']
+        stage_results = PipelineExecutor(self.build_stages(options), self.executor).run(
+            inputs, on_progress, deadline
+        )
+        results = {
+            name: result.value for name, result in stage_results.items()
+            if result.error is None and not result.skipped and name != 'entities'
+        }
+        results['timings'] = {name: round(result.duration, 4) for name, result in stage_results.items()}
+        results['errors'] = {name: result.error for name, result in stage_results.items() if result.error}
+        results['latency'] = round(time.perf_counter() - start, 4)
+        results['skipped'] = list(deadline.skipped)
+        return results
+    
+    def analyze_shared(self, text: str, options: Dict, deadline: Optional[Deadline] = None) -> Dict:
+        """
+        ``analyze``, waiting on an identical analysis instead when one is already running.
+        
+        A caller waits no longer than its own deadline; if the analysis it
+        follows is still running by then, every stage is reported skipped.
+        """
+        start = time.perf_counter()
+        if deadline is None:
+            deadline = Deadline.from_ms(options.get('budget_ms'))
+        try:
+            return _analysis_flights.do(analysis_flight_key(text, options),
+                                        lambda: self.analyze(text, options, deadline=deadline),
+                                        timeout=deadline.timeout())
+        except FutureTimeoutError:
+            for stage in self.build_stages(options):
+                deadline.skip(stage.name)
+            return {'timings': {}, 'errors': {}, 'latency': round(time.perf_counter() - start, 4),
+                    'skipped': list(deadline.skipped)}
+    
+    def submit(self, text: str, options: Dict) -> AnalysisHandle:
+        """
+        Start ``analyze`` on the shared background executor and return a handle to poll.
+        
+        While an identical analysis is still running, from any session, the
+        new handle follows it rather than starting another one.
+        """
+        def start() -> AnalysisHandle:
+            handle = AnalysisHandle(text, options, len(self.build_stages(options)))
+            handle._future = _get_analysis_executor().submit(self.analyze, text, options, handle._on_progress)
+            return handle
+        
+        handle, shared = _analysis_flights.share(analysis_flight_key(text, options), start)
+        return handle.follow(text) if shared else handle
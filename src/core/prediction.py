@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+from typing import Dict
+
+
+@dataclass
+class PredictionResult:
+    verdict: str
+    confidence: float
+    model_used: str
+    probabilities: Dict[str, float]
+    features: Dict[str, float]
+    reasoning: str
+    processing_time: float
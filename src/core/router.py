@@ -0,0 +1,230 @@
+import bisect
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from src.analytics.performance import hash64
+from src.core.inference_server import InferenceClient, InferenceTimeoutError
+from src.core.scheduler import BULK, INTERACTIVE
+from src.utils.deadline import Deadline
+from src.utils.helpers import generate_claim_hash
+
+
+class HashRing:
+    """
+    Consistent hash ring with virtual nodes.
+    
+    Each node owns ``vnodes`` points on a 64-bit ring and a key belongs to
+    the first point clockwise from its hash, so adding or removing a node
+    only moves the keys that node gains or loses (about 1/N of them).
+    """
+    
+    def __init__(self, nodes: Optional[List[str]] = None, vnodes: int = 128):
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        self.nodes = set()
+        for node in nodes or []:
+            self.add(node)
+    
+    def add(self, node: str):
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for i in range(self.vnodes):
+            point = hash64(f"{node}#{i}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+    
+    def remove(self, node: str):
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        keep = [i for i, owner in enumerate(self._owners) if owner != node]
+        self._points = [self._points[i] for i in keep]
+        self._owners = [self._owners[i] for i in keep]
+    
+    def lookup(self, key: int) -> Optional[str]:
+        if not self._points:
+            return None
+        return self._owners[bisect.bisect(self._points, key) % len(self._points)]
+    
+    def __len__(self):
+        return len(self.nodes)
+
+
+class ShardedInferenceRouter:
+    """
+    Spread predictions over inference nodes with cache affinity.
+    
+    Each claim goes to the node owning its normalized claim hash on a
+    consistent hash ring, so a repeated claim always lands on the node
+    whose prediction cache already holds it. Nodes that refuse or drop a
+    connection, or fail a health check, leave the ring, and their claims
+    fall through to the next node; they rejoin when a health check succeeds
+    again. A node that is merely slow to answer (a read timeout) stays on
+    the ring and the timeout goes to the caller. Exposes the same
+    prediction methods as ``ProfessionalEnsembleAI``.
+    """
+    
+    def __init__(self, nodes: List[str], vnodes: int = 128, health_interval: float = 5.0,
+                 timeout: float = 30.0, max_workers: int = 16):
+        self.timeout = timeout
+        self.clients = {node: InferenceClient(node, timeout=timeout) for node in nodes}
+        self.ring = HashRing(nodes, vnodes)
+        self.health_interval = health_interval
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='router')
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._health_thread = None
+        self.metrics = {node: {'requests': 0, 'claims': 0, 'failures': 0, 'timeouts': 0} for node in nodes}
+    
+    def add_node(self, node: str):
+        """Join a node; only the claims it now owns move to it"""
+        with self._lock:
+            self.clients.setdefault(node, InferenceClient(node, timeout=self.timeout))
+            self.metrics.setdefault(node, {'requests': 0, 'claims': 0, 'failures': 0, 'timeouts': 0})
+            self.ring.add(node)
+    
+    def remove_node(self, node: str):
+        """Retire a node; its claims move to the next node on the ring"""
+        with self._lock:
+            self.ring.remove(node)
+            self.clients.pop(node, None)
+    
+    def node_for(self, text: str) -> Optional[str]:
+        with self._lock:
+            return self.ring.lookup(hash64(generate_claim_hash(text)))
+    
+    def _mark_down(self, node: str, error: Exception):
+        logging.error(f"Inference node {node} unavailable: {error}")
+        with self._lock:
+            self.ring.remove(node)
+            self.metrics[node]['failures'] += 1
+    
+    def _predict_on(self, node: str, texts: List[str], batch_size: int, deadline: Optional[Deadline],
+                    priority: str) -> List:
+        with self._lock:
+            client = self.clients.get(node)
+            if client is None:
+                raise ConnectionError(f"Inference node {node} was removed")
+            self.metrics[node]['requests'] += 1
+            self.metrics[node]['claims'] += len(texts)
+        return client.ensemble_predict_batch(texts, batch_size, deadline, priority)
+    
+    def ensemble_predict_batch(self, texts: List[str], batch_size: int = 16, deadline: Optional[Deadline] = None,
+                               priority: str = BULK) -> List:
+        """Predict claims on their owning nodes in parallel, in input order"""
+        results = [None] * len(texts)
+        pending = list(range(len(texts)))
+        while pending:
+            groups = defaultdict(list)
+            for i in pending:
+                node = self.node_for(texts[i])
+                if node is None:
+                    raise ConnectionError("No healthy inference nodes")
+                groups[node].append(i)
+            
+            futures = {}
+            for node, indices in groups.items():
+                future = self.executor.submit(self._predict_on, node, [texts[i] for i in indices], batch_size,
+                                              deadline, priority)
+                futures[future] = (node, indices)
+            pending = []
+            for future in as_completed(futures):
+                node, indices = futures[future]
+                try:
+                    predictions = future.result()
+                except InferenceTimeoutError:
+                    # Slow, not down: keep the node and its cache affinity
+                    with self._lock:
+                        self.metrics[node]['timeouts'] += 1
+                    raise
+                except OSError as e:
+                    # Connection-level failure: drop the node and re-route its claims
+                    self._mark_down(node, e)
+                    pending.extend(indices)
+                    continue
+                for i, prediction in zip(indices, predictions):
+                    results[i] = prediction
+        return results
+    
+    def ensemble_predict(self, text: str, deadline: Optional[Deadline] = None, priority: str = INTERACTIVE):
+        return self.ensemble_predict_batch([text], 1, deadline, priority)[0]
+    
+    def _any_client(self) -> InferenceClient:
+        with self._lock:
+            node = next(iter(self.ring.nodes), None)
+            if node is None:
+                raise ConnectionError("No healthy inference nodes")
+            return self.clients[node]
+    
+    def get_system_metrics(self) -> Dict:
+        return self._any_client().get_system_metrics()
+    
+    def get_model_performance(self) -> Dict:
+        return self._any_client().get_model_performance()
+    
+    def check_health(self) -> Dict[str, Optional[bool]]:
+        """
+        Ping every node; failing nodes leave the ring and recovered ones rejoin.
+        
+        A ping that times out (every worker busy) reports None and leaves
+        the node where it is.
+        """
+        with self._lock:
+            clients = dict(self.clients)
+        
+        def ping(client: InferenceClient) -> Optional[bool]:
+            try:
+                client.call({'op': 'ping'})
+                return True
+            except InferenceTimeoutError:
+                return None
+            except Exception:
+                return False
+        
+        health = dict(zip(clients, self.executor.map(ping, clients.values())))
+        with self._lock:
+            for node, healthy in health.items():
+                if node not in self.clients:
+                    continue
+                if healthy and node not in self.ring.nodes:
+                    logging.info(f"Inference node {node} is back")
+                    self.ring.add(node)
+                elif healthy is False and node in self.ring.nodes:
+                    logging.error(f"Inference node {node} failed its health check")
+                    self.ring.remove(node)
+        return health
+    
+    def start(self):
+        """Run health checks in the background every ``health_interval`` seconds"""
+        if self._health_thread is None:
+            self._stop.clear()
+            self._health_thread = threading.Thread(target=self._health_loop, daemon=True,
+                                                   name='router-health')
+            self._health_thread.start()
+        return self
+    
+    def _health_loop(self):
+        while not self._stop.wait(self.health_interval):
+            try:
+                self.check_health()
+            except Exception as e:
+                logging.error(f"Health check failed: {e}")
+    
+    def stop(self):
+        self._stop.set()
+        if self._health_thread is not None:
+            self._health_thread.join()
+            self._health_thread = None
+    
+    def get_status(self) -> Dict:
+        with self._lock:
+            return {
+                node: {**self.metrics[node], 'healthy': node in self.ring.nodes}
+                for node in self.clients
+            }
@@ -0,0 +1,236 @@
+"""
+Priority scheduling in front of the inference engine.
+
+Interactive requests and bulk work share one model. Calls queue per
+priority class and are dispatched by weighted fair queuing: each class
+gets capacity in proportion to its weight while it has work queued, so a
+large bulk job cannot starve the UI, and bulk still progresses while
+interactive traffic is heavy. Each class also has its own concurrency
+limit and a bounded queue; a call arriving at a full queue is rejected
+with ``SchedulerBusyError`` instead of waiting.
+"""
+import time
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from src.utils.deadline import Deadline
+from src.utils.helpers import accepts_keyword
+
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+WAIT_SAMPLES = 1000
+
+
+class SchedulerBusyError(Exception):
+    """Raised when a priority class's queue is full, or its queue wait outlasts the deadline"""
+    pass
+
+
+@dataclass
+class PriorityClass:
+    """
+    A class of inference traffic.
+    
+    ``max_concurrency`` of None lets the class use the scheduler's whole
+    capacity.
+    """
+    name: str
+    weight: float = 1.0
+    max_concurrency: Optional[int] = None
+    max_queue: int = 64
+
+
+def default_classes(capacity: int) -> List[PriorityClass]:
+    """Interactive traffic gets four times bulk's share; bulk never holds more than half the slots"""
+    return [
+        PriorityClass(INTERACTIVE, weight=4.0, max_concurrency=None, max_queue=64),
+        PriorityClass(BULK, weight=1.0, max_concurrency=max(1, capacity // 2), max_queue=256)
+    ]
+
+
+class _Ticket:
+    __slots__ = ('priority', 'cost', 'start_tag', 'finish_tag', 'enqueued_at', 'granted')
+    
+    def __init__(self, priority: str, cost: float, start_tag: float, finish_tag: float):
+        self.priority = priority
+        self.cost = cost
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+
+
+class InferenceScheduler:
+    """
+    Weighted fair queuing over priority classes with per-class concurrency limits.
+    
+    A call of cost ``c`` in a class of weight ``w`` is stamped with the
+    virtual finish time ``max(V, last finish of its class) + c / w``; the
+    dispatcher always starts the queued call with the smallest stamp among
+    classes below their concurrency limit, while fewer than ``capacity``
+    calls are running.
+    """
+    
+    def __init__(self, capacity: int = 4, classes: Optional[List[PriorityClass]] = None):
+        self.capacity = capacity
+        self.classes = {cls.name: cls for cls in (classes or default_classes(capacity))}
+        self._cond = threading.Condition()
+        self._virtual_time = 0.0
+        self._running = 0
+        self._queues = {name: deque() for name in self.classes}
+        self._class_running = {name: 0 for name in self.classes}
+        self._last_finish = {name: 0.0 for name in self.classes}
+        self._waits = {name: deque(maxlen=WAIT_SAMPLES) for name in self.classes}
+        self.metrics = {name: {'admitted': 0, 'completed': 0, 'rejected': 0, 'timed_out': 0}
+                        for name in self.classes}
+    
+    def _limit(self, priority: str) -> int:
+        return self.classes[priority].max_concurrency or self.capacity
+    
+    def check_admission(self, priority: str):
+        """Reject up front when ``priority``'s queue is already full"""
+        with self._cond:
+            if len(self._queues[priority]) >= self.classes[priority].max_queue:
+                self.metrics[priority]['rejected'] += 1
+                raise SchedulerBusyError(f"Inference is busy: the {priority} queue is full")
+    
+    def acquire(self, priority: str, cost: float = 1.0, timeout: Optional[float] = None) -> _Ticket:
+        """Wait for a slot; raise ``SchedulerBusyError`` if the queue is full or ``timeout`` passes"""
+        if priority not in self.classes:
+            raise ValueError(f"Unknown priority class {priority!r}")
+        with self._cond:
+            queue = self._queues[priority]
+            if not self._can_start(priority) and len(queue) >= self.classes[priority].max_queue:
+                self.metrics[priority]['rejected'] += 1
+                raise SchedulerBusyError(f"Inference is busy: the {priority} queue is full")
+            
+            start_tag = max(self._virtual_time, self._last_finish[priority])
+            ticket = _Ticket(priority, cost, start_tag, start_tag + cost / self.classes[priority].weight)
+            self._last_finish[priority] = ticket.finish_tag
+            queue.append(ticket)
+            self.metrics[priority]['admitted'] += 1
+            self._dispatch()
+            
+            expires_at = None if timeout is None else time.monotonic() + timeout
+            while not ticket.granted:
+                remaining = None if expires_at is None else expires_at - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._withdraw(ticket)
+                    self.metrics[priority]['timed_out'] += 1
+                    raise SchedulerBusyError(f"Inference is busy: no {priority} slot within {timeout:.2f}s")
+                self._cond.wait(remaining)
+            
+            self._waits[priority].append(time.monotonic() - ticket.enqueued_at)
+            return ticket
+    
+    def _can_start(self, priority: str) -> bool:
+        """Whether a call arriving now would be granted a slot at once; caller holds the lock"""
+        return (not self._queues[priority] and self._running < self.capacity
+                and self._class_running[priority] < self._limit(priority))
+    
+    def _withdraw(self, ticket: _Ticket):
+        """
+        Drop a ticket that gave up waiting and restamp the ones queued behind it.
+        
+        Their tags, and the class's last finish tag, were stacked on the
+        withdrawn ticket's; left alone, every timeout would push the class
+        further back in line.
+        """
+        queue = self._queues[ticket.priority]
+        index = queue.index(ticket)
+        del queue[index]
+        weight = self.classes[ticket.priority].weight
+        finish = ticket.start_tag
+        for later in list(queue)[index:]:
+            later.start_tag = max(self._virtual_time, finish)
+            later.finish_tag = finish = later.start_tag + later.cost / weight
+        self._last_finish[ticket.priority] = finish
+    
+    def release(self, ticket: _Ticket):
+        with self._cond:
+            self._running -= 1
+            self._class_running[ticket.priority] -= 1
+            self.metrics[ticket.priority]['completed'] += 1
+            self._dispatch()
+    
+    def _dispatch(self):
+        """Grant slots to the queued calls with the smallest finish tags; caller holds the lock"""
+        granted = False
+        while self._running < self.capacity:
+            eligible = [
+                queue[0] for name, queue in self._queues.items()
+                if queue and self._class_running[name] < self._limit(name)
+            ]
+            if not eligible:
+                break
+            ticket = min(eligible, key=lambda t: t.finish_tag)
+            self._queues[ticket.priority].popleft()
+            self._virtual_time = max(self._virtual_time, ticket.start_tag)
+            self._running += 1
+            self._class_running[ticket.priority] += 1
+            ticket.granted = granted = True
+        if granted:
+            self._cond.notify_all()
+    
+    def run(self, priority: str, func: Callable[..., Any], *args, cost: float = 1.0,
+            timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run ``func`` once a slot for ``priority`` is free, giving up after waiting ``timeout`` seconds"""
+        ticket = self.acquire(priority, cost, timeout)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.release(ticket)
+    
+    def get_status(self) -> Dict[str, Dict]:
+        """Queue length, running calls, counters and queue wait time per class"""
+        with self._cond:
+            status = {}
+            for name, cls in self.classes.items():
+                waits = sorted(self._waits[name])
+                status[name] = {
+                    'weight': cls.weight,
+                    'max_concurrency': self._limit(name),
+                    'queued': len(self._queues[name]),
+                    'running': self._class_running[name],
+                    **self.metrics[name],
+                    'avg_wait_ms': round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+                    'p95_wait_ms': round(waits[int(len(waits) * 0.95)] * 1000, 2) if waits else 0.0,
+                    'max_wait_ms': round(waits[-1] * 1000, 2) if waits else 0.0
+                }
+            return status
+
+
+class ScheduledModel:
+    """
+    Stand-in for ``ProfessionalEnsembleAI`` that runs every prediction through a scheduler.
+    
+    Single predictions default to the interactive class and batches to the
+    bulk class; a batch costs one unit per claim.
+    """
+    
+    def __init__(self, model, scheduler: InferenceScheduler):
+        self.model = model
+        self.scheduler = scheduler
+    
+    def ensemble_predict(self, text: str, deadline: Optional[Deadline] = None, priority: str = INTERACTIVE):
+        """Queue for a slot no longer than the deadline allows"""
+        if deadline is None:
+            return self.scheduler.run(priority, self.model.ensemble_predict, text)
+        kwargs = {'deadline': deadline} if accepts_keyword(self.model.ensemble_predict, 'deadline') else {}
+        return self.scheduler.run(priority, self.model.ensemble_predict, text, timeout=deadline.timeout(), **kwargs)
+    
+    def ensemble_predict_batch(self, texts: List[str], batch_size: int = 16, priority: str = BULK) -> List:
+        return self.scheduler.run(priority, self._predict_batch, texts, batch_size, cost=len(texts))
+    
+    def _predict_batch(self, texts: List[str], batch_size: int) -> List:
+        if hasattr(self.model, 'ensemble_predict_batch'):
+            return self.model.ensemble_predict_batch(texts, batch_size)
+        return [self.model.ensemble_predict(text) for text in texts]
+    
+    def get_system_metrics(self) -> Dict:
+        return self.model.get_system_metrics()
+    
+    def get_model_performance(self) -> Dict:
+        return self.model.get_model_performance()
@@ -0,0 +1,365 @@
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional
+
+from src.utils.cache import StaleWhileRevalidateCache
+from src.utils.helpers import normalize_claim
+from src.utils.http_client import get_http_client
+
+
+class SourceUnavailableError(Exception):
+    """Raised when a source is skipped because its circuit is open"""
+
+
+class SourceTimeoutError(Exception):
+    """Raised when a source does not answer within its declared timeout"""
+
+
+class VerificationSource:
+    """
+    Base class for pluggable verification sources.
+    
+    Subclasses implement ``query`` and declare how expensive, how slow and
+    how trustworthy they are. The registry uses these declarations to decide
+    timeouts, hedging and aggregation weight.
+    """
+    
+    name = 'source'
+    cost = 1.0           # relative cost of one call (API quota, money, CPU)
+    timeout = 5.0        # seconds before a call is abandoned
+    reliability = 1.0    # 0..1 weight applied when aggregating verdicts
+    hedge_after = None   # seconds before a duplicate request is sent, None disables hedging
+    batch_size = 1       # claims per upstream call; sources with list APIs override query_batch
+    cache_ttl = None     # seconds an answer stays fresh, None disables caching
+    
+    def query(self, claim: str) -> Dict:
+        """Return a dict with verdict, confidence, evidence and url"""
+        raise NotImplementedError
+    
+    def query_batch(self, claims: List[str]) -> List[Dict]:
+        """Answer several claims, one result per claim in the same order"""
+        return [self.query(claim) for claim in claims]
+
+
+class FunctionSource(VerificationSource):
+    """Adapt a plain ``claim -> dict`` callable to the source interface"""
+    
+    def __init__(self, name: str, func: Callable[[str], Dict], cost: float = 1.0,
+                 timeout: float = 5.0, reliability: float = 1.0, hedge_after: Optional[float] = None,
+                 cache_ttl: Optional[float] = None):
+        self.name = name
+        self.func = func
+        self.cost = cost
+        self.timeout = timeout
+        self.reliability = reliability
+        self.hedge_after = hedge_after
+        self.cache_ttl = cache_ttl
+    
+    def query(self, claim: str) -> Dict:
+        return self.func(claim)
+
+
+class HTTPSource(VerificationSource):
+    """
+    JSON-over-HTTP source using the shared pooled client.
+    
+    ``build_params`` turns a claim into query parameters and ``parse`` turns
+    the decoded JSON body into the verdict dict expected by the registry.
+    """
+    
+    def __init__(self, name: str, url: str, build_params: Callable[[str], Dict],
+                 parse: Callable[[Dict], Dict], http_client=None, cost: float = 1.0,
+                 timeout: float = 5.0, reliability: float = 1.0, hedge_after: Optional[float] = None,
+                 cache_ttl: Optional[float] = None):
+        self.name = name
+        self.url = url
+        self.build_params = build_params
+        self.parse = parse
+        self.http = http_client or get_http_client()
+        self.cost = cost
+        self.timeout = timeout
+        self.reliability = reliability
+        self.hedge_after = hedge_after
+        self.cache_ttl = cache_ttl
+    
+    def query(self, claim: str) -> Dict:
+        data = self.http.get_json(self.url, params=self.build_params(claim), timeout=self.timeout)
+        return self.parse(data)
+
+
+class LocalStandInSource(VerificationSource):
+    """
+    Local stand-in source with injectable latency and failures.
+    
+    Used in tests and local development to exercise circuit breaking and
+    hedging without touching the network.
+    """
+    
+    def __init__(self, name: str, response: Optional[Dict] = None, latency: float = 0.0,
+                 jitter: float = 0.0, failure_rate: float = 0.0, cost: float = 1.0,
+                 timeout: float = 5.0, reliability: float = 1.0, hedge_after: Optional[float] = None,
+                 cache_ttl: Optional[float] = None, seed: Optional[int] = None):
+        self.name = name
+        self.response = response or {'verdict': 'mixed', 'confidence': 0.5, 'evidence': [], 'url': ''}
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.cost = cost
+        self.timeout = timeout
+        self.reliability = reliability
+        self.hedge_after = hedge_after
+        self.cache_ttl = cache_ttl
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+    
+    def query(self, claim: str) -> Dict:
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.failure_rate
+        time.sleep(delay)
+        if fail:
+            raise ConnectionError(f"{self.name}: injected failure")
+        return dict(self.response)
+
+
+class CircuitBreaker:
+    """
+    Per-source circuit breaker.
+    
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are rejected. Once ``reset_timeout`` seconds have passed a single
+    probe call is let through (half-open); its outcome closes or re-opens
+    the circuit.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+    
+    def allow_request(self) -> bool:
+        """Return True if a call may be made right now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+    
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+            self._probe_in_flight = False
+
+
+class SourceRegistry:
+    """
+    Registry of verification sources with circuit breaking and hedged requests
+    """
+    
+    def __init__(self, max_workers: int = 16, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 max_hedge_cost: float = 1.0):
+        self.sources: Dict[str, VerificationSource] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.stats: Dict[str, Dict] = {}
+        self.caches: Dict[str, StaleWhileRevalidateCache] = {}
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_hedge_cost = max_hedge_cost
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='source')
+        # Fan-out calls wait on source calls, so they get their own pool to avoid starving it
+        self.dispatcher = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='source-dispatch')
+        self._lock = threading.Lock()
+    
+    def register(self, source: VerificationSource) -> VerificationSource:
+        """Add a source (replacing any source with the same name)"""
+        self.sources[source.name] = source
+        self.breakers[source.name] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        self.stats[source.name] = {'calls': 0, 'failures': 0, 'timeouts': 0, 'rejected': 0, 'hedged': 0,
+                                   'hedge_wins': 0}
+        if source.cache_ttl:
+            self.caches[source.name] = StaleWhileRevalidateCache(ttl=source.cache_ttl)
+        else:
+            self.caches.pop(source.name, None)
+        return source
+    
+    def unregister(self, name: str):
+        self.sources.pop(name, None)
+        self.breakers.pop(name, None)
+        self.stats.pop(name, None)
+        self.caches.pop(name, None)
+    
+    def names(self) -> List[str]:
+        return list(self.sources.keys())
+    
+    def _bump(self, name: str, key: str):
+        with self._lock:
+            if name in self.stats:
+                self.stats[name][key] += 1
+    
+    def _should_hedge(self, source: VerificationSource) -> bool:
+        return source.hedge_after is not None and source.cost <= self.max_hedge_cost
+    
+    def query(self, name: str, claim: str) -> Dict:
+        """Query one source, serving cached answers (even stale ones) when available"""
+        cache = self.caches.get(name)
+        if cache is None:
+            return self._query_source(name, claim)
+        return cache.get_or_load(normalize_claim(claim), lambda: self._query_source(name, claim))
+    
+    def _query_source(self, name: str, claim: str) -> Dict:
+        """Query one source through its circuit breaker, hedging slow calls"""
+        source = self.sources[name]
+        breaker = self.breakers[name]
+        
+        if not breaker.allow_request():
+            self._bump(name, 'rejected')
+            raise SourceUnavailableError(f"Circuit open for {name}")
+        
+        self._bump(name, 'calls')
+        start = time.monotonic()
+        primary = self.executor.submit(source.query, claim)
+        pending = {primary}
+        
+        if self._should_hedge(source):
+            done, _ = wait(pending, timeout=min(source.hedge_after, source.timeout))
+            if not done:
+                self._bump(name, 'hedged')
+                pending.add(self.executor.submit(source.query, claim))
+        
+        error = None
+        while pending:
+            remaining = source.timeout - (time.monotonic() - start)
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if future is not primary:
+                    self._bump(name, 'hedge_wins')
+                breaker.record_success()
+                return result
+        
+        breaker.record_failure()
+        if breaker.state == CircuitBreaker.OPEN:
+            logging.warning(f"Circuit opened for source {name}")
+        if error is not None and not pending:
+            self._bump(name, 'failures')
+            raise error
+        self._bump(name, 'timeouts')
+        raise SourceTimeoutError(f"{name} did not answer within {source.timeout}s")
+    
+    def query_batch(self, name: str, claims: List[str]) -> List[Dict]:
+        """Query one source with a group of claims, sending only cache misses upstream"""
+        cache = self.caches.get(name)
+        if cache is None:
+            return self._query_source_batch(name, claims)
+        
+        results = []
+        missing = []
+        for i, claim in enumerate(claims):
+            key = normalize_claim(claim)
+            cached = cache.get(key, refresh=lambda claim=claim: self._query_source(name, claim), default=None)
+            results.append(cached)
+            if cached is None:
+                missing.append(i)
+        
+        if missing:
+            fetched = self._query_source_batch(name, [claims[i] for i in missing])
+            for i, result in zip(missing, fetched):
+                cache.put(normalize_claim(claims[i]), result)
+                results[i] = result
+        return results
+    
+    def _query_source_batch(self, name: str, claims: List[str]) -> List[Dict]:
+        """Send a group of claims to one source as a single guarded call"""
+        source = self.sources[name]
+        breaker = self.breakers[name]
+        
+        if not breaker.allow_request():
+            self._bump(name, 'rejected')
+            raise SourceUnavailableError(f"Circuit open for {name}")
+        
+        self._bump(name, 'calls')
+        future = self.executor.submit(source.query_batch, claims)
+        done, _ = wait([future], timeout=source.timeout)
+        if not done:
+            breaker.record_failure()
+            self._bump(name, 'timeouts')
+            raise SourceTimeoutError(f"{name} did not answer within {source.timeout}s")
+        
+        try:
+            results = future.result()
+        except Exception:
+            breaker.record_failure()
+            self._bump(name, 'failures')
+            raise
+        
+        breaker.record_success()
+        return results
+    
+    def query_all(self, claim: str, timeout: Optional[float] = None) -> Dict[str, object]:
+        """
+        Query every registered source concurrently; values are results or exceptions.
+        
+        Sources still running after ``timeout`` seconds are reported as
+        ``SourceTimeoutError`` and left to finish (and fill the cache) in the
+        background.
+        """
+        futures = {name: self.dispatcher.submit(self.query, name, claim) for name in self.names()}
+        wait(futures.values(), timeout=timeout)
+        outcomes = {}
+        for name, future in futures.items():
+            if not future.done():
+                outcomes[name] = SourceTimeoutError(f"{name} did not answer within the {timeout:.2f}s deadline")
+                continue
+            try:
+                outcomes[name] = future.result()
+            except Exception as e:
+                outcomes[name] = e
+        return outcomes
+    
+    def get_status(self) -> Dict[str, Dict]:
+        """Breaker state and call statistics per source"""
+        return {
+            name: {
+                'state': self.breakers[name].state,
+                'cost': source.cost,
+                'timeout': source.timeout,
+                'reliability': source.reliability,
+                'cache': self.caches[name].get_metrics() if name in self.caches else None,
+                **self.stats[name]
+            } for name, source in self.sources.items()
+        }
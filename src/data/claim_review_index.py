@@ -0,0 +1,431 @@
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+
+DEFAULT_INDEX_PATH = "data/claim_reviews.db"
+
+STOPWORDS = {
+    'the', 'and', 'for', 'are', 'was', 'were', 'that', 'this', 'with', 'from', 'have', 'has', 'had',
+    'but', 'not', 'you', 'all', 'can', 'her', 'his', 'its', 'our', 'their', 'they', 'them', 'will',
+    'would', 'there', 'been', 'than', 'then', 'into', 'about', 'which', 'when', 'what', 'who', 'said'
+}
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4          # 4 bands of 16 bits: any pair within 3 bits shares at least one band
+NEAR_DUPLICATE_DISTANCE = 3
+MAX_POSTINGS_PER_TERM = 5000
+MAX_QUERY_TERMS = 6
+
+
+def normalize_review_date(value: Optional[str]) -> str:
+    """
+    An ISO-8601 date or timestamp as ``YYYY-MM-DDTHH:MM:SSZ`` in UTC, so marks compare as strings.
+    
+    Dates without a time are midnight UTC, as are timestamps without an
+    offset; anything unparseable becomes ''.
+    """
+    value = (value or '').strip()
+    if not value:
+        return ''
+    if value.endswith(('Z', 'z')):
+        value = value[:-1] + '+00:00'
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return ''
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased content words used for both indexing and lookup"""
+    return [t for t in re.findall(r"[a-z0-9']+", text.lower()) if len(t) > 2 and t not in STOPWORDS]
+
+
+# Spreads each bit of a byte into its own 16-bit lane so that per-bit
+# counts for all 64 bits can be accumulated with plain integer additions
+_LANE = 16
+_SPREAD = [sum(((b >> j) & 1) << (j * _LANE) for j in range(8)) for b in range(256)]
+
+
+def simhash(tokens: List[str]) -> int:
+    """64-bit SimHash over word unigrams and bigrams"""
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    counts = 0
+    for feature in features:
+        digest = hashlib.md5(feature.encode()).digest()
+        for i in range(8):
+            counts += _SPREAD[digest[7 - i]] << (i * 8 * _LANE)
+    
+    half = len(features) / 2
+    lane_mask = (1 << _LANE) - 1
+    return sum(1 << bit for bit in range(SIMHASH_BITS) if (counts >> (bit * _LANE) & lane_mask) > half)
+
+
+def _to_signed(value: int) -> int:
+    """SQLite integers are signed 64-bit"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _bands(fingerprint: int) -> List[int]:
+    width = SIMHASH_BITS // SIMHASH_BANDS
+    mask = (1 << width) - 1
+    return [fingerprint >> (band * width) & mask for band in range(SIMHASH_BANDS)]
+
+
+@dataclass
+class ClaimReviewRecord:
+    review_key: str
+    claim_text: str
+    claimant: str
+    rating: str
+    url: str
+    publisher: str
+    review_date: str
+    
+    @classmethod
+    def from_dicts(cls, data: Dict) -> List['ClaimReviewRecord']:
+        """
+        Parse one feed item.
+        
+        Accepts both schema.org ``ClaimReview`` objects and Google Fact Check
+        Tools ``claims:search`` items (one claim with several reviews).
+        """
+        if 'claimReview' in data:
+            reviews = data.get('claimReview') or []
+            return [cls._build(
+                claim_text=data.get('text', ''),
+                claimant=data.get('claimant', ''),
+                rating=review.get('textualRating', ''),
+                url=review.get('url', ''),
+                publisher=(review.get('publisher') or {}).get('name', ''),
+                review_date=review.get('reviewDate', '') or data.get('claimDate', '')
+            ) for review in reviews]
+        
+        item = data.get('itemReviewed') or {}
+        author = item.get('author') or {}
+        return [cls._build(
+            claim_text=data.get('claimReviewed', ''),
+            claimant=author.get('name', '') if isinstance(author, dict) else str(author),
+            rating=(data.get('reviewRating') or {}).get('alternateName', ''),
+            url=data.get('url', ''),
+            publisher=(data.get('author') or {}).get('name', ''),
+            review_date=data.get('dateModified') or data.get('datePublished', '')
+        )]
+    
+    @classmethod
+    def _build(cls, **fields) -> 'ClaimReviewRecord':
+        key_source = fields['url'] or f"{fields['publisher']}|{fields['claim_text']}"
+        return cls(review_key=hashlib.md5(key_source.encode()).hexdigest(), **fields)
+
+
+class ClaimReviewIndex:
+    """
+    On-disk ClaimReview store with an inverted index and a SimHash
+    near-duplicate index, synced incrementally from feeds or JSONL exports.
+    """
+    
+    def __init__(self, db_path: str = DEFAULT_INDEX_PATH):
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._init_database()
+    
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+    
+    def _init_database(self):
+        conn = self._connection()
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS reviews (
+                id INTEGER PRIMARY KEY,
+                review_key TEXT NOT NULL UNIQUE,
+                claim_text TEXT NOT NULL,
+                claimant TEXT,
+                rating TEXT,
+                url TEXT,
+                publisher TEXT,
+                review_date TEXT,
+                simhash INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                review_id INTEGER NOT NULL,
+                PRIMARY KEY (term, review_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS term_stats (
+                term TEXT PRIMARY KEY,
+                df INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                review_id INTEGER NOT NULL,
+                PRIMARY KEY (band, bucket, review_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS sync_state (
+                feed TEXT PRIMARY KEY,
+                high_water_mark TEXT NOT NULL,
+                synced_at INTEGER NOT NULL
+            );
+        ''')
+        conn.commit()
+    
+    # ------------------------------------------------------------------ ingest
+    
+    def get_high_water_mark(self, feed: str) -> str:
+        row = self._connection().execute(
+            'SELECT high_water_mark FROM sync_state WHERE feed = ?', (feed,)
+        ).fetchone()
+        return row[0] if row else ''
+    
+    def upsert(self, records: Iterable[ClaimReviewRecord]) -> int:
+        """Insert or replace records and their index entries in one transaction"""
+        conn = self._connection()
+        count = 0
+        with self._write_lock, conn:
+            for record in records:
+                self._remove_index_entries(conn, record.review_key)
+                tokens = tokenize(record.claim_text)
+                fingerprint = simhash(tokens)
+                cursor = conn.execute('''
+                    INSERT INTO reviews
+                    (review_key, claim_text, claimant, rating, url, publisher, review_date, simhash)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (record.review_key, record.claim_text, record.claimant, record.rating, record.url,
+                      record.publisher, record.review_date, _to_signed(fingerprint)))
+                review_id = cursor.lastrowid
+                
+                terms = set(tokens)
+                conn.executemany('INSERT INTO postings (term, review_id) VALUES (?, ?)',
+                                 [(term, review_id) for term in terms])
+                conn.executemany('''
+                    INSERT INTO term_stats (term, df) VALUES (?, 1)
+                    ON CONFLICT(term) DO UPDATE SET df = df + 1
+                ''', [(term,) for term in terms])
+                conn.executemany('INSERT INTO fingerprints (band, bucket, review_id) VALUES (?, ?, ?)',
+                                 [(band, bucket, review_id) for band, bucket in enumerate(_bands(fingerprint))])
+                count += 1
+        return count
+    
+    def _remove_index_entries(self, conn: sqlite3.Connection, review_key: str):
+        row = conn.execute('SELECT id, claim_text, simhash FROM reviews WHERE review_key = ?',
+                           (review_key,)).fetchone()
+        if not row:
+            return
+        review_id, claim_text, fingerprint = row
+        terms = set(tokenize(claim_text))
+        conn.executemany('DELETE FROM postings WHERE term = ? AND review_id = ?',
+                         [(term, review_id) for term in terms])
+        conn.executemany('UPDATE term_stats SET df = df - 1 WHERE term = ?', [(term,) for term in terms])
+        conn.executemany('DELETE FROM fingerprints WHERE band = ? AND bucket = ? AND review_id = ?',
+                         [(band, bucket, review_id)
+                          for band, bucket in enumerate(_bands(fingerprint % (1 << 64)))])
+        conn.execute('DELETE FROM reviews WHERE id = ?', (review_id,))
+    
+    def sync(self, items: Iterable[Dict], feed: str, batch_size: int = 1000) -> Dict:
+        """
+        Incrementally ingest feed items newer than the feed's high-water mark.
+        
+        Items at exactly the mark are re-applied; upserts keyed on the review
+        URL make that idempotent, so records sharing a timestamp are never lost.
+        Review dates are compared as normalized UTC timestamps; items without
+        a usable date are always ingested and never move the mark.
+        """
+        start = time.time()
+        mark = normalize_review_date(self.get_high_water_mark(feed))
+        new_mark = mark
+        batch = []
+        ingested = skipped = 0
+        
+        for item in items:
+            for record in ClaimReviewRecord.from_dicts(item):
+                review_date = normalize_review_date(record.review_date)
+                if not record.claim_text or (mark and review_date and review_date < mark):
+                    skipped += 1
+                    continue
+                batch.append(record)
+                new_mark = max(new_mark, review_date)
+            if len(batch) >= batch_size:
+                ingested += self.upsert(batch)
+                batch = []
+        
+        if batch:
+            ingested += self.upsert(batch)
+        
+        conn = self._connection()
+        with self._write_lock, conn:
+            conn.execute('''
+                INSERT INTO sync_state (feed, high_water_mark, synced_at) VALUES (?, ?, ?)
+                ON CONFLICT(feed) DO UPDATE SET high_water_mark = excluded.high_water_mark,
+                                                synced_at = excluded.synced_at
+            ''', (feed, new_mark, int(time.time() * 1000)))
+        
+        return {
+            'feed': feed,
+            'ingested': ingested,
+            'skipped': skipped,
+            'high_water_mark': new_mark,
+            'duration': round(time.time() - start, 3)
+        }
+    
+    def sync_jsonl(self, path: str, feed: Optional[str] = None) -> Dict:
+        """Sync from a local JSONL export (one ClaimReview or claim item per line)"""
+        return self.sync(_read_jsonl(path), feed or os.path.abspath(path))
+    
+    def sync_feed(self, url: str, feed: Optional[str] = None, http_client=None, page_size: int = 500) -> Dict:
+        """Sync from a paged JSON feed that accepts ``since`` and ``pageToken`` parameters"""
+        from src.utils.http_client import get_http_client
+        
+        http = http_client or get_http_client()
+        feed = feed or url
+        since = self.get_high_water_mark(feed)
+        
+        def pages() -> Iterator[Dict]:
+            token = None
+            while True:
+                params = {'since': since, 'pageSize': page_size}
+                if token:
+                    params['pageToken'] = token
+                data = http.get_json(url, params=params)
+                yield from data.get('claims') or data.get('items') or []
+                token = data.get('nextPageToken')
+                if not token:
+                    break
+        
+        return self.sync(pages(), feed)
+    
+    # ------------------------------------------------------------------ lookup
+    
+    def search(self, claim: str, limit: int = 5) -> List[Dict]:
+        """
+        Match a claim against stored reviews without network access.
+        
+        Near-duplicates come from the SimHash band index; other candidates
+        come from the postings of the rarest query terms and are ranked by
+        the IDF-weighted share of query terms they contain.
+        """
+        conn = self._connection()
+        tokens = tokenize(claim)
+        if not tokens:
+            return []
+        
+        scores = {}
+        near_duplicates = set()
+        fingerprint = simhash(tokens)
+        for band, bucket in enumerate(_bands(fingerprint)):
+            for review_id, stored in conn.execute('''
+                SELECT f.review_id, r.simhash FROM fingerprints f JOIN reviews r ON r.id = f.review_id
+                WHERE f.band = ? AND f.bucket = ?
+            ''', (band, bucket)):
+                if bin(fingerprint ^ (stored % (1 << 64))).count('1') <= NEAR_DUPLICATE_DISTANCE:
+                    near_duplicates.add(review_id)
+                    scores[review_id] = 1.0
+        
+        terms = list(set(tokens))
+        placeholders = ','.join('?' * len(terms))
+        df = dict(conn.execute(
+            f'SELECT term, df FROM term_stats WHERE term IN ({placeholders}) AND df > 0', terms
+        ).fetchall())
+        total = conn.execute('SELECT COUNT(*) FROM reviews').fetchone()[0] or 1
+        idf = {term: math.log(1 + total / df.get(term, 0.5)) for term in terms}
+        query_weight = sum(idf.values())
+        
+        partial = {}
+        for term in sorted(df, key=df.get)[:MAX_QUERY_TERMS]:
+            for (review_id,) in conn.execute(
+                'SELECT review_id FROM postings WHERE term = ? LIMIT ?', (term, MAX_POSTINGS_PER_TERM)
+            ):
+                partial[review_id] = partial.get(review_id, 0.0) + idf[term]
+        
+        for review_id, weight in partial.items():
+            scores.setdefault(review_id, weight / query_weight)
+        
+        top = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:limit]
+        if not top:
+            return []
+        
+        rows = {row[0]: row for row in conn.execute(f'''
+            SELECT id, claim_text, claimant, rating, url, publisher, review_date
+            FROM reviews WHERE id IN ({','.join('?' * len(top))})
+        ''', [review_id for review_id, _ in top])}
+        
+        return [{
+            'claim': rows[review_id][1],
+            'claimant': rows[review_id][2],
+            'rating': rows[review_id][3],
+            'url': rows[review_id][4],
+            'publisher': rows[review_id][5],
+            'review_date': rows[review_id][6],
+            'score': round(score, 3),
+            'near_duplicate': review_id in near_duplicates
+        } for review_id, score in top if review_id in rows]
+    
+    def get_stats(self) -> Dict:
+        conn = self._connection()
+        return {
+            'reviews': conn.execute('SELECT COUNT(*) FROM reviews').fetchone()[0],
+            'terms': conn.execute('SELECT COUNT(*) FROM term_stats WHERE df > 0').fetchone()[0],
+            'feeds': dict(conn.execute('SELECT feed, high_water_mark FROM sync_state').fetchall())
+        }
+
+
+def _read_jsonl(path: str) -> Iterator[Dict]:
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                logging.warning(f"Skipping malformed line {line_number} in {path}: {e}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Sync and query the local ClaimReview index")
+    parser.add_argument('--db', default=DEFAULT_INDEX_PATH)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    sync_parser = subparsers.add_parser('sync', help='Incrementally ingest ClaimReview records')
+    sync_parser.add_argument('--jsonl', nargs='*', default=[], help='Local JSONL exports')
+    sync_parser.add_argument('--feed', nargs='*', default=[], help='Paged JSON feed URLs')
+    
+    search_parser = subparsers.add_parser('search', help='Look up reviews for a claim')
+    search_parser.add_argument('claim')
+    search_parser.add_argument('--limit', type=int, default=5)
+    
+    args = parser.parse_args(argv)
+    index = ClaimReviewIndex(args.db)
+    
+    if args.command == 'sync':
+        for path in args.jsonl:
+            print(json.dumps(index.sync_jsonl(path)))
+        for url in args.feed:
+            print(json.dumps(index.sync_feed(url)))
+    else:
+        for match in index.search(args.claim, args.limit):
+            print(json.dumps(match))
+
+
+if __name__ == "__main__":
+    main()
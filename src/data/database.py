@@ -1,81 +1,283 @@
+import atexit
 import sqlite3
 import json
+import threading
+import time
 from datetime import datetime
-from typing import Dict  # Added missing import
+from typing import Dict, List, Optional, Tuple  # Added missing import
+import numpy as np
 import pandas as pd
 import os
+import logging
+
+from src.analytics.downsampling import lttb_indices
+from src.analytics.performance import SketchStore
+from src.data.claim_review_index import tokenize
+from src.data.migrations import apply_migrations
+from src.data.partitions import HistoryPartitions
+from src.data.write_behind import WriteBehindQueue
+from src.utils.helpers import generate_claim_hash
+
+# Connection tuning: WAL lets readers run alongside a writer, and NORMAL
+# synchronous stays durable across application crashes in WAL mode
+CONNECTION_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-65536',      # 64 MB page cache
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size=268435456'     # 256 MB memory-mapped reads
+)
+
+INSERT_ANALYSIS_SQL = '''
+    INSERT INTO analysis_history
+    (timestamp_ms, statement, text_hash, verdict, confidence, model_used)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_PAYLOAD_SQL = '''
+    INSERT INTO analysis_payloads
+    (analysis_id, processing_time_ms, prob_models, probabilities, text_length, word_count,
+     sentence_count, credibility_indicators, sensationalism_score, clickbait_score, reasoning)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Column order of the stored probability arrays and typed feature columns
+PROBABILITY_LABELS = ('true', 'false', 'misleading', 'unverifiable')
+FEATURE_COLUMNS = (
+    'text_length', 'word_count', 'sentence_count',
+    'credibility_indicators', 'sensationalism_score', 'clickbait_score'
+)
+
+# Rollup bucket widths (ms) and how long each is kept; day buckets live as long as the data
+MINUTE_MS, HOUR_MS, DAY_MS = 60000, 3600000, 86400000
+ROLLUP_RETENTION_MS = {MINUTE_MS: 7 * DAY_MS, HOUR_MS: 180 * DAY_MS, DAY_MS: None}
+MAX_ROLLUP_BUCKETS = 50000
+MAX_TIMELINE_POINTS = 1000
+
+def now_ms() -> int:
+    """Current time as integer epoch milliseconds, the stored timestamp format"""
+    return int(time.time() * 1000)
+
+def encode_payload(result) -> Tuple:
+    """Flatten a PredictionResult into the analysis_payloads column values (minus the id)"""
+    models = list(result.probabilities.keys())
+    probabilities = np.array(
+        [[result.probabilities[model].get(label, np.nan) for label in PROBABILITY_LABELS] for model in models],
+        dtype=np.float32
+    )
+    features = result.features or {}
+    return (
+        result.processing_time * 1000,
+        ','.join(models),
+        probabilities.tobytes(),
+        *(features.get(name) for name in FEATURE_COLUMNS),
+        result.reasoning
+    )
 
 class AnalysisDatabase:
     """Simple database for analysis history"""
     
-    def __init__(self, db_path="data/analysis_history.db"):
+    def __init__(self, db_path="data/analysis_history.db", archive_dir: Optional[str] = None):
         # Create data directory if it doesn't exist
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         self.db_path = db_path
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._write_queue = None
+        self._schema_ready = False
+        self.sketches = SketchStore()
+        self._sketch_flusher = None
+        self._sketch_flusher_stop = threading.Event()
+        self.partitions = HistoryPartitions(self, archive_dir)
         self._init_database()
     
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Per-thread persistent connection.
+        
+        Reusing the connection keeps sqlite3's prepared-statement cache warm
+        and avoids paying connect and PRAGMA setup on every call.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, cached_statements=256, check_same_thread=False)
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            self._local.generation = None
+            self._local.data_version = None
+            with self._connections_lock:
+                self._connections.append(conn)
+        
+        # Re-attach archive partitions whenever they have changed, in any process. data_version
+        # moves only when another connection commits, so the generation is read only then
+        if self._schema_ready:
+            data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+            if self._local.data_version != data_version:
+                self._local.data_version = data_version
+                generation = self.partitions.generation(conn)
+                if self._local.generation != generation:
+                    self._local.generation = generation
+                    self.partitions.attach(conn)
+        return conn
+    
+    def close(self):
+        """Flush queued writes and sketches, checkpoint the WAL and close every pooled connection"""
+        if self._write_queue is not None:
+            self._write_queue.close()
+            self._write_queue = None
+        if self._sketch_flusher is not None:
+            self._sketch_flusher_stop.set()
+            self._sketch_flusher.join()
+            self._sketch_flusher = None
+            atexit.unregister(self._flush_at_exit)
+        try:
+            self.sketches.flush(self._connection(), force=True)
+            self._connection().execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        except sqlite3.Error:
+            pass
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections = []
+        self._local = threading.local()
+    
     def _init_database(self):
-        """Initialize database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS analysis_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT NOT NULL,
-                statement TEXT NOT NULL,
-                verdict TEXT NOT NULL,
-                confidence REAL NOT NULL,
-                model_used TEXT NOT NULL
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        """Initialize database and apply pending schema migrations"""
+        apply_migrations(self._connection())
+        self._schema_ready = True
     
     def save_analysis(self, statement: str, verdict: str, confidence: float, model_used: str):
         """Save analysis to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO analysis_history 
-            (timestamp, statement, verdict, confidence, model_used)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (
-            datetime.now().isoformat(),
-            statement,
-            verdict,
-            confidence,
-            model_used
-        ))
-        
-        conn.commit()
-        conn.close()
+        self.save_analyses([(now_ms(), statement, verdict, confidence, model_used)])
+    
+    def save_analyses(self, records: List[Tuple]):
+        """
+        Save many (timestamp_ms, statement, verdict, confidence, model_used[, result])
+        rows in one transaction. A trailing PredictionResult is stored as its payload.
+        """
+        conn = self._connection()
+        rows = [
+            (record[0], record[1], generate_claim_hash(record[1]), *record[2:5],
+             record[5] if len(record) > 5 else None)
+            for record in records
+        ]
+        
+        with conn:
+            if all(row[6] is None for row in rows):
+                conn.executemany(INSERT_ANALYSIS_SQL, [row[:6] for row in rows])
+            else:
+                # Payload rows need each analysis id, so insert row by row
+                for row in rows:
+                    cursor = conn.execute(INSERT_ANALYSIS_SQL, row[:6])
+                    if row[6] is not None:
+                        conn.execute(INSERT_PAYLOAD_SQL, (cursor.lastrowid, *encode_payload(row[6])))
+        
+        # Sketch blobs are rewritten once per few thousand records, not once per insert
+        self.sketches.add([
+            (row[0], row[2], row[5], row[6].processing_time * 1000 if row[6] is not None else None)
+            for row in rows
+        ])
+        self._start_sketch_flusher()
+        self._flush_sketches()
+    
+    def _start_sketch_flusher(self):
+        """
+        Flush pending sketch deltas every flush interval and at exit.
+        
+        Otherwise the deltas of a quiet spell wait for the next save, and
+        are lost if the process stops first.
+        """
+        with self._connections_lock:
+            if self._sketch_flusher is None:
+                self._sketch_flusher_stop.clear()
+                self._sketch_flusher = threading.Thread(target=self._flush_sketches_periodically,
+                                                        name='sketch-flush', daemon=True)
+                self._sketch_flusher.start()
+                atexit.register(self._flush_at_exit)
+    
+    def _flush_at_exit(self):
+        # The write-behind queue's own exit hook may run after this one, so drain it first
+        if self._write_queue is not None:
+            self._write_queue.flush(timeout=30)
+        self._flush_sketches(force=True)
+    
+    def _flush_sketches_periodically(self):
+        while not self._sketch_flusher_stop.wait(self.sketches.flush_interval):
+            self._flush_sketches()
+    
+    def _flush_sketches(self, force: bool = False):
+        if not self.sketches.pending:
+            return
+        try:
+            self.sketches.flush(self._connection(), force=force)
+        except sqlite3.Error as e:
+            logging.warning(f"Sketch flush failed, will retry: {e}")
+    
+    def save_prediction(self, statement: str, result):
+        """Save a PredictionResult together with its full payload"""
+        self.save_analyses([
+            (now_ms(), statement, result.verdict, result.confidence, result.model_used, result)
+        ])
+    
+    def enqueue_analysis(self, statement: str, verdict: str, confidence: float, model_used: str):
+        """Queue an analysis for write-behind persistence, off the request path"""
+        self._get_write_queue().put((now_ms(), statement, verdict, confidence, model_used))
+    
+    def enqueue_prediction(self, statement: str, result):
+        """Queue a PredictionResult and its payload for write-behind persistence"""
+        self._get_write_queue().put(
+            (now_ms(), statement, result.verdict, result.confidence, result.model_used, result)
+        )
+    
+    def _get_write_queue(self) -> WriteBehindQueue:
+        with self._connections_lock:
+            if self._write_queue is None:
+                self._write_queue = WriteBehindQueue(self.save_analyses, name='analysis-write-behind')
+            write_queue = self._write_queue
+        # Records queued now reach the sketches at exit only if the exit hook is in place
+        self._start_sketch_flusher()
+        return write_queue
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued analysis, and the sketches summarising them, have been committed"""
+        flushed = self._write_queue.flush(timeout=timeout) if self._write_queue is not None else True
+        self.sketches.flush(self._connection(), force=True)
+        return flushed
+    
+    def get_write_metrics(self) -> Dict:
+        """Write-behind queue depth and flush statistics"""
+        return self._write_queue.get_metrics() if self._write_queue is not None else {}
     
     def get_analytics(self) -> Dict:
-        """Get basic analytics"""
+        """Get basic analytics from the trigger-maintained counters"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connection()
             
             # Basic metrics
-            total_analyses = pd.read_sql('SELECT COUNT(*) as count FROM analysis_history', conn).iloc[0]['count']
-            avg_confidence = pd.read_sql('SELECT AVG(confidence) as avg FROM analysis_history', conn).iloc[0]['avg'] or 0
+            total_analyses, confidence_sum = conn.execute(
+                'SELECT total, confidence_sum FROM analytics_totals WHERE id = 1'
+            ).fetchone()
+            avg_confidence = confidence_sum / total_analyses if total_analyses else 0
             
             # Verdict distribution
-            verdict_distribution = pd.read_sql('''
-                SELECT verdict, COUNT(*) as count 
-                FROM analysis_history 
-                GROUP BY verdict 
-                ORDER BY count DESC
-            ''', conn)
-            
-            conn.close()
+            verdict_distribution = [
+                {'verdict': verdict, 'count': count} for verdict, count in conn.execute('''
+                    SELECT verdict, count FROM verdict_counts
+                    WHERE count > 0
+                    ORDER BY count DESC
+                ''')
+            ]
             
             return {
                 'total_analyses': total_analyses,
                 'avg_confidence': round(avg_confidence * 100, 2),
-                'verdict_distribution': verdict_distribution.to_dict('records'),
+                'verdict_distribution': verdict_distribution,
                 'accuracy_estimate': 91.5  # Mock accuracy
             }
         except:
@@ -88,15 +290,21 @@ class AnalysisDatabase:
             }
     
     def get_recent_analyses(self, limit: int = 10):
-        """Get recent analysis history"""
+        """Get recent analysis history (served by the hot partition's timestamp index)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            df = pd.read_sql(f'''
-                SELECT * FROM analysis_history 
-                ORDER BY timestamp DESC 
-                LIMIT {limit}
-            ''', conn)
-            conn.close()
+            conn = self._connection()
+            query = '''
+                SELECT id, timestamp_ms,
+                       strftime('%Y-%m-%dT%H:%M:%f', timestamp_ms / 1000.0, 'unixepoch', 'localtime') AS timestamp,
+                       statement, text_hash, verdict, confidence, model_used
+                FROM {table} 
+                ORDER BY timestamp_ms DESC 
+                LIMIT ?
+            '''
+            df = pd.read_sql(query.format(table='analysis_history'), conn, params=(int(limit),))
+            if len(df) < limit and self.partitions.archive_files():
+                # Not enough recent rows; fall back to every partition
+                df = pd.read_sql(query.format(table='analysis_history_all'), conn, params=(int(limit),))
             return df.to_dict('records')
         except:
             return []
@@ -104,14 +312,212 @@ class AnalysisDatabase:
     def get_analysis_count_by_model(self):
         """Get analysis count by model"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            df = pd.read_sql('''
-                SELECT model_used, COUNT(*) as count 
-                FROM analysis_history 
-                GROUP BY model_used 
-                ORDER BY count DESC
-            ''', conn)
-            conn.close()
-            return df.to_dict('records')
+            conn = self._connection()
+            return [
+                {'model_used': model_used, 'count': count} for model_used, count in conn.execute('''
+                    SELECT model_used, count FROM model_counts
+                    WHERE count > 0
+                    ORDER BY count DESC
+                ''')
+            ]
         except:
-            return []
\ No newline at end of file
+            return []
+    
+    def get_prediction_arrays(self, since_ms: Optional[int] = None, until_ms: Optional[int] = None) -> Dict:
+        """
+        Bulk-read stored payloads as NumPy arrays, one row per analysis.
+        
+        ``probabilities`` has shape (rows, len(models), len(labels)) with NaN
+        where a model did not contribute; ``features`` has one column per
+        name in ``feature_names``.
+        """
+        conn = self._connection()
+        rows = conn.execute(f'''
+            SELECT h.id, h.timestamp_ms, h.confidence, p.processing_time_ms, p.prob_models, p.probabilities,
+                   {', '.join('p.' + name for name in FEATURE_COLUMNS)}
+            FROM analysis_payloads p JOIN analysis_history h ON h.id = p.analysis_id
+            WHERE h.timestamp_ms >= ? AND h.timestamp_ms < ?
+            ORDER BY h.id
+        ''', (since_ms or 0, until_ms if until_ms is not None else 2 ** 62)).fetchall()
+        columns = list(zip(*rows)) or [()] * (6 + len(FEATURE_COLUMNS))
+        
+        layouts = columns[4]
+        distinct_layouts = [layout for layout in dict.fromkeys(layouts) if layout]
+        models = list(dict.fromkeys(model for layout in distinct_layouts for model in layout.split(',')))
+        probabilities = np.full((len(rows), len(models), len(PROBABILITY_LABELS)), np.nan, dtype=np.float32)
+        layout_array = np.array(layouts, dtype=object)
+        blobs = np.array(columns[5], dtype=object)
+        for layout in distinct_layouts:
+            selected = np.flatnonzero(layout_array == layout)
+            slots = [models.index(model) for model in layout.split(',')]
+            block = np.frombuffer(b''.join(blobs[selected]), dtype=np.float32)
+            probabilities[np.ix_(selected, slots)] = block.reshape(len(selected), len(slots), len(PROBABILITY_LABELS))
+        
+        return {
+            'id': np.array(columns[0], dtype=np.int64),
+            'timestamp_ms': np.array(columns[1], dtype=np.int64),
+            'confidence': np.array(columns[2], dtype=np.float64),
+            'processing_time_ms': np.array(columns[3], dtype=np.float64),
+            'probabilities': probabilities,
+            'models': models,
+            'labels': list(PROBABILITY_LABELS),
+            'features': np.array(columns[6:], dtype=np.float64).T.reshape(len(rows), len(FEATURE_COLUMNS)),
+            'feature_names': list(FEATURE_COLUMNS)
+        }
+    
+    def search_history(self, query: str, limit: int = 10,
+                       highlight: Tuple[str, str] = ('<mark>', '</mark>')) -> List[Dict]:
+        """
+        Find previously analysed claims similar to ``query``.
+        
+        Matches any significant query term against the FTS5 claims index,
+        ranked by BM25, with a highlighted snippet and the latest verdict.
+        Only the claims table is read, so archived analyses are found too.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        match = ' OR '.join(f'"{term}"' for term in terms)
+        
+        try:
+            conn = self._connection()
+            rows = conn.execute('''
+                SELECT c.statement, m.snippet, m.score, c.analysis_count, c.first_seen_ms, c.last_seen_ms,
+                       c.last_verdict, c.last_confidence, c.last_model_used
+                FROM (
+                    SELECT rowid, bm25(claims_fts) AS score,
+                           snippet(claims_fts, 0, ?, ?, '...', 16) AS snippet
+                    FROM claims_fts
+                    WHERE claims_fts MATCH ?
+                    ORDER BY rank
+                    LIMIT ?
+                ) m
+                JOIN claims c ON c.id = m.rowid
+                ORDER BY m.score
+            ''', (*highlight, match, int(limit))).fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"History search failed: {e}")
+            return []
+        
+        return [
+            {
+                'statement': statement,
+                'snippet': snippet,
+                'score': round(-score, 4),  # bm25() is lower-is-better; flip for display
+                'analysis_count': analysis_count,
+                'first_seen_ms': first_seen_ms,
+                'last_seen_ms': last_seen_ms,
+                'verdict': verdict,
+                'confidence': confidence,
+                'model_used': model_used
+            }
+            for statement, snippet, score, analysis_count, first_seen_ms, last_seen_ms,
+                verdict, confidence, model_used in rows
+        ]
+    
+    def get_timeline(self, since_ms: Optional[int] = None, until_ms: Optional[int] = None,
+                     max_points: int = MAX_TIMELINE_POINTS) -> Dict:
+        """
+        Analysis volume and confidence over time, from the rollup tables.
+        
+        Uses the finest retained bucket width that keeps the range under
+        MAX_ROLLUP_BUCKETS, then LTTB-downsamples to at most ``max_points``.
+        """
+        conn = self._connection()
+        current_ms = now_ms()
+        until_ms = until_ms if until_ms is not None else current_ms
+        if since_ms is None:
+            since_ms = conn.execute(
+                'SELECT MIN(bucket_ms) FROM history_rollups WHERE width_ms = ?', (DAY_MS,)
+            ).fetchone()[0]
+        
+        timeline = {
+            'bucket_ms': np.array([], dtype=np.int64),
+            'count': np.array([], dtype=np.int64),
+            'avg_confidence': np.array([], dtype=np.float64),
+            'verdict_counts': {label: np.array([], dtype=np.int64) for label in PROBABILITY_LABELS},
+            'width_ms': DAY_MS,
+            'buckets': 0,
+            'downsampled': False
+        }
+        if since_ms is None or since_ms >= until_ms:
+            return timeline
+        
+        width_ms = DAY_MS
+        for width, retention_ms in sorted(ROLLUP_RETENTION_MS.items()):
+            retained = retention_ms is None or since_ms >= current_ms - retention_ms
+            if retained and (until_ms - since_ms) / width <= MAX_ROLLUP_BUCKETS:
+                width_ms = width
+                break
+        
+        verdict_sums = ', '.join(
+            f"SUM(CASE WHEN verdict = '{label}' THEN count ELSE 0 END)" for label in PROBABILITY_LABELS
+        )
+        rows = conn.execute(f'''
+            SELECT bucket_ms, SUM(count), SUM(confidence_sum), {verdict_sums}
+            FROM history_rollups
+            WHERE width_ms = ? AND bucket_ms >= ? AND bucket_ms < ?
+            GROUP BY bucket_ms
+            ORDER BY bucket_ms
+        ''', (width_ms, since_ms - since_ms % width_ms, until_ms)).fetchall()
+        if not rows:
+            timeline['width_ms'] = width_ms
+            return timeline
+        
+        columns = np.array(rows, dtype=np.float64).T
+        keep = lttb_indices(columns[0], columns[1], max_points) if len(rows) > max_points else slice(None)
+        counts = columns[1][keep]
+        timeline.update({
+            'bucket_ms': columns[0][keep].astype(np.int64),
+            'count': counts.astype(np.int64),
+            'avg_confidence': columns[2][keep] / np.maximum(counts, 1),
+            'verdict_counts': {
+                label: columns[3 + i][keep].astype(np.int64) for i, label in enumerate(PROBABILITY_LABELS)
+            },
+            'width_ms': width_ms,
+            'buckets': len(rows),
+            'downsampled': len(rows) > max_points
+        })
+        return timeline
+    
+    def prune_rollups(self, current_ms: Optional[int] = None) -> Dict:
+        """Drop minute and hour buckets older than their retention window"""
+        current_ms = current_ms if current_ms is not None else now_ms()
+        conn = self._connection()
+        pruned = {}
+        with conn:
+            for width_ms, retention_ms in ROLLUP_RETENTION_MS.items():
+                if retention_ms is not None:
+                    pruned[width_ms] = conn.execute(
+                        'DELETE FROM history_rollups WHERE width_ms = ? AND bucket_ms < ?',
+                        (width_ms, current_ms - retention_ms)
+                    ).rowcount
+        return pruned
+    
+    def get_distinct_claims(self, since_ms: Optional[int] = None, until_ms: Optional[int] = None) -> int:
+        """Approximate number of distinct claims analysed in a time range (HyperLogLog)"""
+        return self.sketches.merged(self._connection(), 'distinct_claims', '', since_ms, until_ms).count()
+    
+    def get_processing_time_quantiles(self, model_used: Optional[str] = None,
+                                      quantiles: Tuple[float, ...] = (0.5, 0.9, 0.99),
+                                      since_ms: Optional[int] = None, until_ms: Optional[int] = None) -> Dict:
+        """Approximate processing-time quantiles in ms (t-digest), for one model or all"""
+        digest = self.sketches.merged(self._connection(), 'processing_time', model_used, since_ms, until_ms)
+        return {
+            'count': int(digest.count),
+            **{f"p{round(q * 100, 1):g}": round(digest.quantile(q), 3) for q in quantiles}
+        }
+    
+    def get_top_claims(self, k: int = 10, since_ms: Optional[int] = None,
+                       until_ms: Optional[int] = None) -> List[Dict]:
+        """Most frequently analysed claims in a time range (count-min heavy hitters)"""
+        conn = self._connection()
+        top = self.sketches.merged(conn, 'claim_frequency', '', since_ms, until_ms).top(k)
+        statements = dict(conn.execute(
+            f"SELECT text_hash, statement FROM claims WHERE text_hash IN ({', '.join('?' * len(top))})",
+            [item['key'] for item in top]
+        ).fetchall()) if top else {}
+        return [
+            {'text_hash': item['key'], 'statement': statements.get(item['key']), 'count': item['count']}
+            for item in top
+        ]
@@ -0,0 +1,199 @@
+import argparse
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from src.data.database import AnalysisDatabase, FEATURE_COLUMNS, now_ms
+
+EXPORT_FORMATS = ('parquet', 'arrow')
+DEFAULT_CHUNK_SIZE = 50000
+
+EXPORT_SQL = f'''
+    SELECT h.id, h.timestamp_ms, h.statement, h.text_hash, h.verdict, h.confidence, h.model_used,
+           p.processing_time_ms, p.prob_models, p.probabilities,
+           {', '.join('p.' + name for name in FEATURE_COLUMNS)}, p.reasoning
+    FROM {{history}} h LEFT JOIN {{payloads}} p ON p.analysis_id = h.id
+    WHERE h.id > ? AND h.id <= ?
+    ORDER BY h.id
+    LIMIT ?
+'''
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError as e:
+        raise ImportError("History export requires pyarrow (pip install pyarrow)") from e
+
+
+def export_schema():
+    """Arrow schema of exported rows, in EXPORT_SQL column order"""
+    pa = _import_pyarrow()
+    return pa.schema([
+        ('id', pa.int64()),
+        ('timestamp', pa.timestamp('ms', tz='UTC')),
+        ('statement', pa.string()),
+        ('text_hash', pa.string()),
+        ('verdict', pa.dictionary(pa.int32(), pa.string())),
+        ('confidence', pa.float64()),
+        ('model_used', pa.dictionary(pa.int32(), pa.string())),
+        ('processing_time_ms', pa.float64()),
+        ('prob_models', pa.string()),
+        ('probabilities', pa.binary()),      # float32 (models x labels), see database.PROBABILITY_LABELS
+        *((name, pa.int64()) for name in FEATURE_COLUMNS),
+        ('reasoning', pa.string())
+    ])
+
+
+class HistoryExporter:
+    """
+    Stream analysis history to Parquet or Arrow IPC files.
+    
+    Rows are read with keyset pagination on the primary key, ``chunk_size``
+    at a time, and each chunk is written as one row group / record batch, so
+    memory stays bounded regardless of table size. Named watermarks record
+    the last exported id so later runs only export newer rows.
+    """
+    
+    def __init__(self, database: AnalysisDatabase, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.database = database
+        self.chunk_size = chunk_size
+    
+    def get_watermark(self, name: str) -> int:
+        row = self.database._connection().execute(
+            'SELECT last_id FROM export_watermarks WHERE name = ?', (name,)
+        ).fetchone()
+        return row[0] if row else 0
+    
+    def set_watermark(self, name: str, last_id: int):
+        conn = self.database._connection()
+        with conn:
+            conn.execute('''
+                INSERT INTO export_watermarks (name, last_id, exported_at_ms) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET last_id = excluded.last_id, exported_at_ms = excluded.exported_at_ms
+            ''', (name, last_id, now_ms()))
+    
+    def _max_id(self) -> int:
+        conn = self.database._connection()
+        return max(
+            conn.execute(f'SELECT COALESCE(MAX(id), 0) FROM {history}').fetchone()[0]
+            for history, _ in self.database.partitions.source_tables()
+        )
+    
+    def iter_batches(self, after_id: int = 0, until_id: Optional[int] = None):
+        """
+        Yield Arrow record batches for rows with after_id < id <= until_id.
+        
+        Partitions are walked one at a time in id order (archives, then the
+        hot table) so every page is a primary-key range scan. Dictionary
+        columns share one dictionary that only grows, so each batch's is an
+        extension of the last: an Arrow IPC file allows dictionary deltas but
+        not replacements.
+        """
+        pa = _import_pyarrow()
+        schema = export_schema()
+        conn = self.database._connection()
+        if until_id is None:
+            until_id = self._max_id()
+        codes = {name: {} for name in schema.names if pa.types.is_dictionary(schema.field(name).type)}
+        
+        def to_array(column, field):
+            if field.name not in codes:
+                return pa.array(column, type=field.type)
+            seen = codes[field.name]
+            indices = pa.array([None if value is None else seen.setdefault(value, len(seen)) for value in column],
+                               type=field.type.index_type)
+            return pa.DictionaryArray.from_arrays(indices, pa.array(list(seen), type=field.type.value_type))
+        
+        for history, payloads in self.database.partitions.source_tables():
+            sql = EXPORT_SQL.format(history=history, payloads=payloads)
+            cursor_id = after_id
+            while cursor_id < until_id:
+                rows = conn.execute(sql, (cursor_id, until_id, self.chunk_size)).fetchall()
+                if not rows:
+                    break
+                columns = list(zip(*rows))
+                yield pa.RecordBatch.from_arrays(
+                    [to_array(column, field) for column, field in zip(columns, schema)], schema=schema
+                )
+                cursor_id = rows[-1][0]
+    
+    def export(self, path: str, fmt: str = 'parquet', name: Optional[str] = 'default',
+               full: bool = False) -> Dict:
+        """
+        Export rows newer than the ``name`` watermark (all rows when ``full``).
+        
+        The file is written under a temporary name and renamed on success;
+        the watermark only advances once the file is complete. No file is
+        written when there is nothing new.
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format {fmt!r}, expected one of {EXPORT_FORMATS}")
+        pa = _import_pyarrow()
+        schema = export_schema()
+        
+        start = time.perf_counter()
+        after_id = 0 if full or name is None else self.get_watermark(name)
+        until_id = self._max_id()
+        stats = {'path': path, 'format': fmt, 'from_id': after_id, 'to_id': after_id, 'rows': 0, 'chunks': 0}
+        
+        tmp_path = f"{path}.tmp"
+        writer = None
+        try:
+            for batch in self.iter_batches(after_id, until_id):
+                if writer is None:
+                    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                    writer = (pa.parquet.ParquetWriter(tmp_path, schema, compression='zstd') if fmt == 'parquet'
+                              else pa.ipc.new_file(tmp_path, schema,
+                                                   options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)))
+                if fmt == 'parquet':
+                    writer.write_table(pa.Table.from_batches([batch]))
+                else:
+                    writer.write_batch(batch)
+                stats['rows'] += batch.num_rows
+                stats['chunks'] += 1
+            if writer is not None:
+                writer.close()
+                writer = None
+                os.replace(tmp_path, path)
+                # Partitions are walked archive-first, so the last batch need not hold the highest id
+                stats['to_id'] = until_id
+        except Exception:
+            if writer is not None:
+                writer.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        
+        if name is not None and stats['rows']:
+            self.set_watermark(name, stats['to_id'])
+        stats['seconds'] = round(time.perf_counter() - start, 3)
+        logging.info(f"Exported {stats['rows']} analyses to {path}")
+        return stats
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Stream analysis history to Parquet or Arrow IPC")
+    parser.add_argument('path', help='Output file')
+    parser.add_argument('--db', default='data/analysis_history.db')
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='parquet')
+    parser.add_argument('--name', default='default', help='Watermark name for incremental exports')
+    parser.add_argument('--full', action='store_true', help='Ignore the watermark and export every row')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+    
+    database = AnalysisDatabase(args.db)
+    stats = HistoryExporter(database, chunk_size=args.chunk_size).export(
+        args.path, fmt=args.format, name=args.name, full=args.full
+    )
+    database.close()
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,548 @@
+"""
+Resumable bulk verification jobs backed by the analysis database.
+
+A submitted job is planned by the first free worker: the input file is
+scanned once and split into chunks of byte ranges. Workers lease chunks,
+write each finished chunk to its own part file and checkpoint it; a chunk
+whose lease expires (crashed or stalled worker) is taken over by another
+worker. Once every chunk is done the parts are joined, in order, into the
+output file.
+
+    python -m src.data.jobs submit claims.jsonl
+    python -m src.data.jobs work --processes 4
+    python -m src.data.jobs status
+"""
+import argparse
+import csv
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.core.bulk import DEFAULT_MODEL, load_bulk_model, read_records, verify_records
+from src.data.database import AnalysisDatabase, now_ms
+
+DEFAULT_CHUNK_RECORDS = 2000
+DEFAULT_LEASE_MS = 120000
+MAX_CHUNK_ATTEMPTS = 3
+RATE_WINDOW_MS = 300000
+JOB_COLUMNS = (
+    'id', 'name', 'input_path', 'output_path', 'fmt', 'text_field', 'chunk_records', 'fieldnames',
+    'total_records', 'total_chunks', 'status', 'error', 'created_ms', 'started_ms', 'finished_ms'
+)
+
+
+class _OffsetLines:
+    """Decoded lines of a binary file, tracking the byte offset and line count consumed so far"""
+    
+    def __init__(self, f):
+        self.f = f
+        self.offset = f.tell()
+        self.count = 0
+    
+    def __iter__(self) -> Iterator[str]:
+        for raw in self.f:
+            self.offset += len(raw)
+            self.count += 1
+            yield raw.decode('utf-8')
+
+
+def scan_chunks(path: str, fmt: str, text_field: str, chunk_records: int,
+                on_chunk: Optional[Callable[[], None]] = None) -> Tuple[Optional[List[str]], List[Tuple]]:
+    """
+    Split an input file into chunks of ``chunk_records`` records.
+    
+    Returns the CSV header (None for JSONL) and (start offset, first line,
+    record count) per chunk. Offsets fall on record boundaries, so quoted
+    multi-line CSV fields are never split.
+    """
+    chunks = []
+    with open(path, 'rb') as f:
+        lines = _OffsetLines(f)
+        fieldnames = next(csv.reader(iter(lines)), []) if fmt == 'csv' else None
+        boundary = (lines.offset, lines.count + 1 if fmt != 'csv' else 2)
+        count = 0
+        for line, _, _ in read_records(lines, fmt, text_field, boundary[1], fieldnames):
+            count += 1
+            if count == chunk_records:
+                chunks.append((*boundary, count))
+                if on_chunk:
+                    on_chunk()
+                boundary = (lines.offset, lines.count + 1 if fmt != 'csv' else line + 1)
+                count = 0
+        if count:
+            chunks.append((*boundary, count))
+    return fieldnames, chunks
+
+
+def read_chunk(job: Dict, chunk: Dict) -> List[Tuple[int, Dict, Optional[str]]]:
+    """The records of one chunk, read by seeking straight to its offset"""
+    with open(job['input_path'], 'rb') as f:
+        f.seek(chunk['start_offset'])
+        records = read_records((raw.decode('utf-8') for raw in f), job['fmt'], job['text_field'],
+                               chunk['first_line'], job['fieldnames'])
+        return list(itertools.islice(records, chunk['record_count']))
+
+
+def parts_dir(job: Dict) -> str:
+    return job['output_path'] + '.parts'
+
+
+def part_path(job: Dict, chunk: int) -> str:
+    return os.path.join(parts_dir(job), f"chunk-{chunk:06d}.jsonl")
+
+
+class JobQueue:
+    """
+    SQLite-backed queue of bulk verification jobs.
+    
+    Every state change is a short IMMEDIATE transaction, so any number of
+    worker processes (and the UI) can share the queue through the database.
+    A job's work comes in three kinds of task: ``plan`` (split the input),
+    ``chunk`` (verify one chunk) and ``assemble`` (join the parts).
+    """
+    
+    def __init__(self, database: AnalysisDatabase, lease_ms: int = DEFAULT_LEASE_MS):
+        self.database = database
+        self.lease_ms = lease_ms
+    
+    def submit(self, input_path: str, output_path: Optional[str] = None, fmt: Optional[str] = None,
+               text_field: str = 'text', chunk_records: int = DEFAULT_CHUNK_RECORDS,
+               name: Optional[str] = None) -> int:
+        """Queue a job and return its id; no file scanning happens here, so it returns at once"""
+        input_path = os.path.abspath(input_path)
+        if not os.path.isfile(input_path):
+            raise FileNotFoundError(input_path)
+        fmt = fmt or ('csv' if input_path.lower().endswith('.csv') else 'jsonl')
+        output_path = os.path.abspath(output_path or os.path.splitext(input_path)[0] + '.results.jsonl')
+        
+        conn = self.database._connection()
+        with conn:
+            cursor = conn.execute('''
+                INSERT INTO verification_jobs
+                (name, input_path, output_path, fmt, text_field, chunk_records, status, created_ms)
+                VALUES (?, ?, ?, ?, ?, ?, 'queued', ?)
+            ''', (name or os.path.basename(input_path), input_path, output_path, fmt, text_field,
+                  chunk_records, now_ms()))
+        return cursor.lastrowid
+    
+    def _job(self, conn, job_id: int) -> Optional[Dict]:
+        row = conn.execute(f"SELECT {', '.join(JOB_COLUMNS)} FROM verification_jobs WHERE id = ?",
+                           (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(JOB_COLUMNS, row))
+        job['fieldnames'] = json.loads(job['fieldnames']) if job['fieldnames'] else None
+        return job
+    
+    def claim(self, worker: str) -> Optional[Dict]:
+        """Lease the next task: planning or assembly first, then the oldest pending or expired chunk"""
+        now = now_ms()
+        conn = self.database._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._fail_exhausted_leases(conn, now)
+            row = conn.execute('''
+                SELECT id, total_chunks IS NULL FROM verification_jobs j
+                WHERE status IN ('queued', 'running')
+                  AND (lease_expires_ms IS NULL OR lease_expires_ms < ?)
+                  AND (total_chunks IS NULL OR NOT EXISTS (
+                      SELECT 1 FROM job_chunks c WHERE c.job_id = j.id AND c.status != 'done'))
+                ORDER BY id LIMIT 1
+            ''', (now,)).fetchone()
+            if row:
+                conn.execute('UPDATE verification_jobs SET lease_worker = ?, lease_expires_ms = ? WHERE id = ?',
+                             (worker, now + self.lease_ms, row[0]))
+                task = {'task': 'plan' if row[1] else 'assemble', 'job': self._job(conn, row[0]), 'chunk': None}
+            else:
+                row = conn.execute('''
+                    SELECT c.job_id, c.chunk, c.start_offset, c.first_line, c.record_count
+                    FROM job_chunks c JOIN verification_jobs j ON j.id = c.job_id
+                    WHERE j.status = 'running'
+                      AND (c.status = 'pending' OR (c.status = 'leased' AND c.lease_expires_ms < ?))
+                    ORDER BY c.job_id, c.chunk LIMIT 1
+                ''', (now,)).fetchone()
+                task = None
+                if row:
+                    conn.execute('''
+                        UPDATE job_chunks SET status = 'leased', worker = ?, lease_expires_ms = ?,
+                                              attempts = attempts + 1
+                        WHERE job_id = ? AND chunk = ?
+                    ''', (worker, now + self.lease_ms, row[0], row[1]))
+                    chunk = dict(zip(('job_id', 'chunk', 'start_offset', 'first_line', 'record_count'), row))
+                    task = {'task': 'chunk', 'job': self._job(conn, row[0]), 'chunk': chunk}
+            conn.execute('COMMIT')
+            return task
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+    
+    @staticmethod
+    def _fail_exhausted_leases(conn, now: int):
+        """Fail expired chunks that have used up their attempts, and their jobs, instead of leasing them again"""
+        cursor = conn.execute('''
+            UPDATE job_chunks
+            SET status = 'failed', worker = NULL, lease_expires_ms = NULL,
+                last_error = 'lease expired after ' || attempts || ' attempts'
+            WHERE status = 'leased' AND lease_expires_ms < ? AND attempts >= ?
+        ''', (now, MAX_CHUNK_ATTEMPTS))
+        if cursor.rowcount:
+            conn.execute('''
+                UPDATE verification_jobs
+                SET status = 'failed', finished_ms = ?, error = (
+                    SELECT 'chunk ' || c.chunk || ': ' || c.last_error FROM job_chunks c
+                    WHERE c.job_id = verification_jobs.id AND c.status = 'failed' ORDER BY c.chunk LIMIT 1)
+                WHERE status = 'running'
+                  AND EXISTS (SELECT 1 FROM job_chunks c WHERE c.job_id = verification_jobs.id AND c.status = 'failed')
+            ''', (now,))
+    
+    def renew(self, worker: str, job_id: int, chunk: Optional[int] = None) -> bool:
+        """Extend a lease; False means it was lost (expired and taken over, or the job was cancelled)"""
+        conn = self.database._connection()
+        expires = now_ms() + self.lease_ms
+        with conn:
+            if chunk is None:
+                cursor = conn.execute('''
+                    UPDATE verification_jobs SET lease_expires_ms = ?
+                    WHERE id = ? AND lease_worker = ? AND status IN ('queued', 'running')
+                ''', (expires, job_id, worker))
+            else:
+                cursor = conn.execute('''
+                    UPDATE job_chunks SET lease_expires_ms = ?
+                    WHERE job_id = ? AND chunk = ? AND worker = ? AND status = 'leased'
+                      AND (SELECT status FROM verification_jobs WHERE id = ?) = 'running'
+                ''', (expires, job_id, chunk, worker, job_id))
+        return cursor.rowcount == 1
+    
+    def set_plan(self, worker: str, job_id: int, fieldnames: Optional[List[str]], chunks: List[Tuple]) -> bool:
+        conn = self.database._connection()
+        with conn:
+            cursor = conn.execute('''
+                UPDATE verification_jobs
+                SET fieldnames = ?, total_records = ?, total_chunks = ?, status = 'running', started_ms = ?,
+                    lease_worker = NULL, lease_expires_ms = NULL
+                WHERE id = ? AND lease_worker = ? AND status = 'queued'
+            ''', (json.dumps(fieldnames) if fieldnames is not None else None, sum(c[2] for c in chunks),
+                  len(chunks), now_ms(), job_id, worker))
+            if cursor.rowcount != 1:
+                return False
+            conn.executemany('''
+                INSERT INTO job_chunks (job_id, chunk, start_offset, first_line, record_count)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [(job_id, i, *chunk) for i, chunk in enumerate(chunks)])
+        return True
+    
+    def complete_chunk(self, worker: str, job_id: int, chunk: int, errors: int) -> bool:
+        """Checkpoint a finished chunk"""
+        conn = self.database._connection()
+        with conn:
+            cursor = conn.execute('''
+                UPDATE job_chunks SET status = 'done', errors = ?, completed_ms = ?, lease_expires_ms = NULL
+                WHERE job_id = ? AND chunk = ? AND worker = ? AND status = 'leased'
+            ''', (errors, now_ms(), job_id, chunk, worker))
+        return cursor.rowcount == 1
+    
+    def fail_chunk(self, worker: str, job_id: int, chunk: int, error: str):
+        """Release a chunk for retry, failing the job once it has used up its attempts"""
+        conn = self.database._connection()
+        with conn:
+            conn.execute('''
+                UPDATE job_chunks
+                SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    worker = NULL, lease_expires_ms = NULL, last_error = ?
+                WHERE job_id = ? AND chunk = ? AND worker = ? AND status = 'leased'
+            ''', (MAX_CHUNK_ATTEMPTS, error, job_id, chunk, worker))
+            conn.execute('''
+                UPDATE verification_jobs SET status = 'failed', error = ?, finished_ms = ?
+                WHERE id = ? AND status = 'running'
+                  AND EXISTS (SELECT 1 FROM job_chunks WHERE job_id = ? AND chunk = ? AND status = 'failed')
+            ''', (f"chunk {chunk}: {error}", now_ms(), job_id, job_id, chunk))
+    
+    def finish_job(self, worker: str, job_id: int, error: Optional[str] = None) -> bool:
+        conn = self.database._connection()
+        with conn:
+            cursor = conn.execute('''
+                UPDATE verification_jobs
+                SET status = ?, error = ?, finished_ms = ?, lease_worker = NULL, lease_expires_ms = NULL
+                WHERE id = ? AND lease_worker = ? AND status IN ('queued', 'running')
+            ''', ('failed' if error else 'completed', error, now_ms(), job_id, worker))
+        return cursor.rowcount == 1
+    
+    def cancel(self, job_id: int) -> bool:
+        conn = self.database._connection()
+        with conn:
+            cursor = conn.execute('''
+                UPDATE verification_jobs SET status = 'cancelled', finished_ms = ?
+                WHERE id = ? AND status IN ('queued', 'running')
+            ''', (now_ms(), job_id))
+        return cursor.rowcount == 1
+    
+    def get_status(self, job_id: int) -> Optional[Dict]:
+        """Progress of one job, with throughput over the last few minutes and an ETA"""
+        conn = self.database._connection()
+        job = self._job(conn, job_id)
+        if job is None:
+            return None
+        now = now_ms()
+        window_start = max(now - RATE_WINDOW_MS, job['started_ms'] or now)
+        done_chunks, done_records, errors, leased, recent = conn.execute('''
+            SELECT COUNT(*) FILTER (WHERE status = 'done'),
+                   COALESCE(SUM(record_count) FILTER (WHERE status = 'done'), 0),
+                   COALESCE(SUM(errors), 0),
+                   COUNT(*) FILTER (WHERE status = 'leased' AND lease_expires_ms >= ?),
+                   COALESCE(SUM(record_count) FILTER (WHERE status = 'done' AND completed_ms >= ?), 0)
+            FROM job_chunks WHERE job_id = ?
+        ''', (now, window_start, job_id)).fetchone()
+        
+        elapsed = (now - window_start) / 1000
+        throughput = recent / elapsed if elapsed > 0 else 0.0
+        remaining = (job['total_records'] or 0) - done_records
+        running = job['status'] == 'running'
+        return {
+            **{key: job[key] for key in ('id', 'name', 'status', 'error', 'input_path', 'output_path',
+                                         'total_records', 'total_chunks', 'created_ms', 'finished_ms')},
+            'done_records': done_records,
+            'done_chunks': done_chunks,
+            'active_workers': leased,
+            'errors': errors,
+            'progress': done_records / job['total_records'] if job['total_records'] else
+                        float(job['status'] == 'completed'),
+            'throughput': round(throughput, 1),
+            'eta_seconds': round(remaining / throughput) if running and throughput > 0 else None
+        }
+    
+    def list_jobs(self, limit: int = 20) -> List[Dict]:
+        try:
+            rows = self.database._connection().execute(
+                'SELECT id FROM verification_jobs ORDER BY id DESC LIMIT ?', (limit,)
+            ).fetchall()
+            return [self.get_status(job_id) for job_id, in rows]
+        except Exception as e:
+            logging.error(f"Error listing jobs: {e}")
+            return []
+
+
+class JobWorker:
+    """
+    Take tasks from a ``JobQueue`` until stopped (or idle, if asked).
+    
+    Chunks are verified in batches, renewing the lease between batches; the
+    part file is written to a temporary name and renamed before the chunk is
+    checkpointed, so a crash never leaves a half-written part behind.
+    """
+    
+    def __init__(self, queue: JobQueue, model, worker_id: Optional[str] = None, batch_size: int = 32):
+        self.queue = queue
+        self.model = model
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        self.batch_size = batch_size
+    
+    def run_once(self) -> bool:
+        """Do one task; False when there was nothing to do"""
+        task = self.queue.claim(self.worker_id)
+        if task is None:
+            return False
+        job = task['job']
+        try:
+            if task['task'] == 'plan':
+                fieldnames, chunks = scan_chunks(job['input_path'], job['fmt'], job['text_field'],
+                                                 job['chunk_records'], self._lease_keeper(job['id']))
+                self.queue.set_plan(self.worker_id, job['id'], fieldnames, chunks)
+            elif task['task'] == 'assemble':
+                self._assemble(job)
+            else:
+                self._process_chunk(job, task['chunk'])
+        except Exception as e:
+            logging.error(f"Job {job['id']} {task['task']} failed: {e}")
+            if task['task'] == 'chunk':
+                self.queue.fail_chunk(self.worker_id, job['id'], task['chunk']['chunk'], str(e))
+            else:
+                self.queue.finish_job(self.worker_id, job['id'], error=str(e))
+        return True
+    
+    def _lease_keeper(self, job_id: int) -> Callable[[], None]:
+        """Callback renewing a job lease at most every quarter lease while planning a large file"""
+        last = [time.monotonic()]
+        
+        def keep():
+            if time.monotonic() - last[0] >= self.queue.lease_ms / 4000:
+                last[0] = time.monotonic()
+                self.queue.renew(self.worker_id, job_id)
+        return keep
+    
+    def _process_chunk(self, job: Dict, chunk: Dict):
+        records = read_chunk(job, chunk)
+        results = []
+        for start in range(0, len(records), self.batch_size):
+            if start and not self.queue.renew(self.worker_id, job['id'], chunk['chunk']):
+                logging.info(f"Lost lease on job {job['id']} chunk {chunk['chunk']}")
+                return
+            results.extend(verify_records(self.model, records[start:start + self.batch_size], job['text_field']))
+        
+        path = part_path(job, chunk['chunk'])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + f".{os.getpid()}.tmp", 'w', encoding='utf-8') as f:
+            for result in results:
+                f.write(json.dumps(result, ensure_ascii=False, default=str) + '\n')
+        os.replace(path + f".{os.getpid()}.tmp", path)
+        self.queue.complete_chunk(self.worker_id, job['id'], chunk['chunk'], sum(r['error'] is not None for r in results))
+    
+    def _assemble(self, job: Dict):
+        tmp_path = job['output_path'] + '.tmp'
+        os.makedirs(os.path.dirname(job['output_path']), exist_ok=True)
+        with open(tmp_path, 'wb') as out:
+            for chunk in range(job['total_chunks']):
+                with open(part_path(job, chunk), 'rb') as part:
+                    shutil.copyfileobj(part, out)
+        os.replace(tmp_path, job['output_path'])
+        if self.queue.finish_job(self.worker_id, job['id']):
+            shutil.rmtree(parts_dir(job), ignore_errors=True)
+    
+    def run(self, stop: Optional[threading.Event] = None, idle_timeout: Optional[float] = None,
+            poll_interval: float = 1.0):
+        stop = stop or threading.Event()
+        idle_since = time.monotonic()
+        while not stop.is_set():
+            if self.run_once():
+                idle_since = time.monotonic()
+                continue
+            if idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+                break
+            stop.wait(poll_interval)
+
+
+def _work(db_path: str, model: str, batch_size: int, idle_timeout: Optional[float]):
+    """Process entry point for ``work``: load the model once, then take tasks"""
+    database = AnalysisDatabase(db_path)
+    try:
+        JobWorker(JobQueue(database), load_bulk_model(model), batch_size=batch_size).run(idle_timeout=idle_timeout)
+    finally:
+        database.close()
+
+
+_worker_processes: Dict[str, subprocess.Popen] = {}
+_spawn_lock = threading.Lock()
+
+
+def _pid_alive(pid: int) -> bool:
+    """Whether ``pid`` is running; a child of ours that has exited is reaped rather than counted as alive"""
+    try:
+        reaped, _ = os.waitpid(pid, os.WNOHANG)
+        return reaped == 0
+    except ChildProcessError:
+        pass
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+
+def spawn_worker(db_path: str, model: str = DEFAULT_MODEL, idle_timeout: float = 300) -> int:
+    """
+    Start a detached worker process unless one started here is still alive.
+    
+    Used by the UI so that submitting a job never blocks the session. The
+    handle of a worker this process started is kept and polled, so one that
+    exited (a zombie until reaped) is replaced.
+    """
+    pid_path = os.path.join(os.path.dirname(os.path.abspath(db_path)), 'job_worker.pid')
+    with _spawn_lock:
+        process = _worker_processes.get(pid_path)
+        if process is not None and process.poll() is None:
+            return process.pid
+        try:
+            with open(pid_path) as f:
+                pid = int(f.read().strip())
+            if (process is None or pid != process.pid) and _pid_alive(pid):
+                return pid
+        except (OSError, ValueError):
+            pass
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'src.data.jobs', '--db', db_path, 'work', '--model', model,
+             '--idle-timeout', str(idle_timeout)],
+            cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+        )
+        _worker_processes[pid_path] = process
+        with open(pid_path, 'w') as f:
+            f.write(str(process.pid))
+        return process.pid
+
+
+def _format_status(status: Dict) -> str:
+    eta = f"{status['eta_seconds']}s" if status['eta_seconds'] is not None else '-'
+    return (f"#{status['id']} {status['name']} [{status['status']}] "
+            f"{status['done_records']:,}/{status['total_records'] or 0:,} records "
+            f"({status['progress']:.0%}), {status['throughput']:,.1f}/s, ETA {eta}, "
+            f"{status['errors']:,} errors, {status['active_workers']} workers")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Resumable bulk verification jobs")
+    parser.add_argument('--db', default='data/analysis_history.db')
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    submit = commands.add_parser('submit', help="Queue a JSONL or CSV file of claims")
+    submit.add_argument('input')
+    submit.add_argument('--output')
+    submit.add_argument('--format', choices=['jsonl', 'csv'])
+    submit.add_argument('--text-field', default='text')
+    submit.add_argument('--chunk-records', type=int, default=DEFAULT_CHUNK_RECORDS)
+    submit.add_argument('--name')
+    
+    work = commands.add_parser('work', help="Run worker processes until stopped")
+    work.add_argument('--processes', type=int, default=1)
+    work.add_argument('--model', default=DEFAULT_MODEL, help="Model to load in each worker, as module:Class")
+    work.add_argument('--batch-size', type=int, default=32)
+    work.add_argument('--idle-timeout', type=float, default=None, help="Exit after this many idle seconds")
+    
+    status = commands.add_parser('status', help="Show job progress")
+    status.add_argument('job_id', type=int, nargs='?')
+    
+    cancel = commands.add_parser('cancel', help="Cancel a job")
+    cancel.add_argument('job_id', type=int)
+    
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    
+    if args.command == 'work':
+        worker_args = (args.db, args.model, args.batch_size, args.idle_timeout)
+        if args.processes == 1:
+            _work(*worker_args)
+            return
+        processes = [multiprocessing.Process(target=_work, args=worker_args) for _ in range(args.processes)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        return
+    
+    database = AnalysisDatabase(args.db)
+    queue = JobQueue(database)
+    try:
+        if args.command == 'submit':
+            job_id = queue.submit(args.input, args.output, args.format, args.text_field, args.chunk_records,
+                                  args.name)
+            print(f"Queued job {job_id}")
+        elif args.command == 'status':
+            statuses = [queue.get_status(args.job_id)] if args.job_id else queue.list_jobs()
+            for status in statuses:
+                if status:
+                    print(_format_status(status))
+        elif args.command == 'cancel':
+            print("Cancelled" if queue.cancel(args.job_id) else "Job is not active")
+    finally:
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
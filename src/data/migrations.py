@@ -0,0 +1,418 @@
+import sqlite3
+import logging
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from src.analytics.performance import SketchStore
+from src.utils.helpers import generate_claim_hash
+
+
+def _create_base_schema(conn: sqlite3.Connection):
+    """v1: the original analysis_history table"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS analysis_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            statement TEXT NOT NULL,
+            verdict TEXT NOT NULL,
+            confidence REAL NOT NULL,
+            model_used TEXT NOT NULL
+        )
+    ''')
+
+
+def _create_aggregate_counters(conn: sqlite3.Connection):
+    """v2: counter tables kept current by an insert trigger, backfilled once"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS analytics_totals (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total INTEGER NOT NULL,
+            confidence_sum REAL NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS verdict_counts (
+            verdict TEXT PRIMARY KEY,
+            count INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS model_counts (
+            model_used TEXT PRIMARY KEY,
+            count INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    _create_aggregate_trigger(conn)
+
+    if conn.execute('SELECT 1 FROM analytics_totals WHERE id = 1').fetchone() is None:
+        conn.execute('''
+            INSERT INTO analytics_totals (id, total, confidence_sum)
+            SELECT 1, COUNT(*), COALESCE(SUM(confidence), 0) FROM analysis_history
+        ''')
+        conn.execute('''
+            INSERT INTO verdict_counts (verdict, count)
+            SELECT verdict, COUNT(*) FROM analysis_history GROUP BY verdict
+        ''')
+        conn.execute('''
+            INSERT INTO model_counts (model_used, count)
+            SELECT model_used, COUNT(*) FROM analysis_history GROUP BY model_used
+        ''')
+
+
+def _create_aggregate_trigger(conn: sqlite3.Connection):
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS analysis_history_aggregates
+        AFTER INSERT ON analysis_history
+        BEGIN
+            UPDATE analytics_totals
+            SET total = total + 1, confidence_sum = confidence_sum + NEW.confidence
+            WHERE id = 1;
+            INSERT INTO verdict_counts (verdict, count) VALUES (NEW.verdict, 1)
+            ON CONFLICT(verdict) DO UPDATE SET count = count + 1;
+            INSERT INTO model_counts (model_used, count) VALUES (NEW.model_used, 1)
+            ON CONFLICT(model_used) DO UPDATE SET count = count + 1;
+        END
+    ''')
+
+
+def _iso_to_epoch_ms(value: str) -> int:
+    """Legacy rows hold naive local-time ISO strings from datetime.now()"""
+    try:
+        return int(datetime.fromisoformat(value).timestamp() * 1000)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _typed_indexed_history(conn: sqlite3.Connection):
+    """
+    v3: integer epoch-ms timestamps, a normalized text hash and indexes.
+
+    Rows are copied into a rebuilt table. The hash column is not unique
+    because the same claim is legitimately analysed many times; uniqueness
+    lives in the ``claims`` table, one row per distinct normalized claim.
+    """
+    conn.create_function('iso_to_epoch_ms', 1, _iso_to_epoch_ms, deterministic=True)
+    conn.create_function('claim_hash', 1, generate_claim_hash, deterministic=True)
+
+    conn.execute('''
+        CREATE TABLE analysis_history_v3 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp_ms INTEGER NOT NULL,
+            statement TEXT NOT NULL,
+            text_hash TEXT NOT NULL,
+            verdict TEXT NOT NULL,
+            confidence REAL NOT NULL,
+            model_used TEXT NOT NULL
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO analysis_history_v3
+        (id, timestamp_ms, statement, text_hash, verdict, confidence, model_used)
+        SELECT id, iso_to_epoch_ms(timestamp), statement, claim_hash(statement), verdict, confidence, model_used
+        FROM analysis_history ORDER BY id
+    ''')
+    conn.execute('DROP TABLE analysis_history')
+    conn.execute('ALTER TABLE analysis_history_v3 RENAME TO analysis_history')
+    _create_aggregate_trigger(conn)
+
+    conn.execute('''
+        CREATE TABLE claims (
+            id INTEGER PRIMARY KEY,
+            text_hash TEXT NOT NULL,
+            statement TEXT NOT NULL,
+            first_seen_ms INTEGER NOT NULL,
+            last_seen_ms INTEGER NOT NULL,
+            analysis_count INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('CREATE UNIQUE INDEX idx_claims_text_hash ON claims (text_hash)')
+    conn.execute('''
+        INSERT INTO claims (text_hash, statement, first_seen_ms, last_seen_ms, analysis_count)
+        SELECT text_hash, statement, MIN(timestamp_ms), MAX(timestamp_ms), COUNT(*)
+        FROM analysis_history GROUP BY text_hash
+    ''')
+    conn.execute('''
+        CREATE TRIGGER analysis_history_claims
+        AFTER INSERT ON analysis_history
+        BEGIN
+            INSERT INTO claims (text_hash, statement, first_seen_ms, last_seen_ms, analysis_count)
+            VALUES (NEW.text_hash, NEW.statement, NEW.timestamp_ms, NEW.timestamp_ms, 1)
+            ON CONFLICT(text_hash) DO UPDATE SET
+                last_seen_ms = MAX(last_seen_ms, NEW.timestamp_ms),
+                analysis_count = analysis_count + 1;
+        END
+    ''')
+
+    conn.execute('CREATE INDEX idx_history_time ON analysis_history (timestamp_ms)')
+    conn.execute('CREATE INDEX idx_history_verdict_time ON analysis_history (verdict, timestamp_ms)')
+    conn.execute('CREATE INDEX idx_history_model_time ON analysis_history (model_used, timestamp_ms)')
+    conn.execute('CREATE INDEX idx_history_text_hash ON analysis_history (text_hash, timestamp_ms)')
+
+
+def _prediction_payloads(conn: sqlite3.Connection):
+    """
+    v4: full prediction payloads, one row per analysis.
+
+    Per-model probabilities are a float32 blob of shape (models, labels)
+    with the model order in ``prob_models``; features get typed columns.
+    """
+    conn.execute('''
+        CREATE TABLE analysis_payloads (
+            analysis_id INTEGER PRIMARY KEY REFERENCES analysis_history (id) ON DELETE CASCADE,
+            processing_time_ms REAL,
+            prob_models TEXT NOT NULL,
+            probabilities BLOB NOT NULL,
+            text_length INTEGER,
+            word_count INTEGER,
+            sentence_count INTEGER,
+            credibility_indicators INTEGER,
+            sensationalism_score INTEGER,
+            clickbait_score INTEGER,
+            reasoning TEXT
+        )
+    ''')
+
+
+def _claims_full_text_index(conn: sqlite3.Connection):
+    """
+    v5: FTS5 index over distinct claims.
+
+    External-content table over ``claims`` so each statement is indexed once
+    however often it is analysed; triggers keep it in step with the claims
+    table, which is itself maintained by the history insert trigger.
+    """
+    conn.execute('''
+        CREATE VIRTUAL TABLE claims_fts USING fts5(
+            statement, content='claims', content_rowid='id', tokenize='porter unicode61'
+        )
+    ''')
+    conn.execute("INSERT INTO claims_fts (claims_fts) VALUES ('rebuild')")
+    conn.execute('''
+        CREATE TRIGGER claims_fts_insert AFTER INSERT ON claims
+        BEGIN
+            INSERT INTO claims_fts (rowid, statement) VALUES (NEW.id, NEW.statement);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER claims_fts_delete AFTER DELETE ON claims
+        BEGIN
+            INSERT INTO claims_fts (claims_fts, rowid, statement) VALUES ('delete', OLD.id, OLD.statement);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER claims_fts_update AFTER UPDATE OF statement ON claims
+        BEGIN
+            INSERT INTO claims_fts (claims_fts, rowid, statement) VALUES ('delete', OLD.id, OLD.statement);
+            INSERT INTO claims_fts (rowid, statement) VALUES (NEW.id, NEW.statement);
+        END
+    ''')
+
+
+def _export_watermarks(conn: sqlite3.Connection):
+    """v6: last exported analysis id per named export, for incremental exports"""
+    conn.execute('''
+        CREATE TABLE export_watermarks (
+            name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL,
+            exported_at_ms INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+
+
+def _latest_verdict_on_claims(conn: sqlite3.Connection):
+    """
+    v7: keep each claim's latest verdict on the claims row.
+
+    Lookups no longer need the history rows, which may have moved to an
+    archive partition.
+    """
+    conn.execute('ALTER TABLE claims ADD COLUMN last_verdict TEXT')
+    conn.execute('ALTER TABLE claims ADD COLUMN last_confidence REAL')
+    conn.execute('ALTER TABLE claims ADD COLUMN last_model_used TEXT')
+    conn.execute('''
+        UPDATE claims SET (last_verdict, last_confidence, last_model_used) = (
+            SELECT verdict, confidence, model_used FROM analysis_history h
+            WHERE h.text_hash = claims.text_hash
+            ORDER BY timestamp_ms DESC, id DESC LIMIT 1
+        )
+    ''')
+    conn.execute('DROP TRIGGER analysis_history_claims')
+    conn.execute('''
+        CREATE TRIGGER analysis_history_claims
+        AFTER INSERT ON analysis_history
+        BEGIN
+            INSERT INTO claims (text_hash, statement, first_seen_ms, last_seen_ms, analysis_count,
+                                last_verdict, last_confidence, last_model_used)
+            VALUES (NEW.text_hash, NEW.statement, NEW.timestamp_ms, NEW.timestamp_ms, 1,
+                    NEW.verdict, NEW.confidence, NEW.model_used)
+            ON CONFLICT(text_hash) DO UPDATE SET
+                last_verdict = CASE WHEN NEW.timestamp_ms >= last_seen_ms THEN NEW.verdict ELSE last_verdict END,
+                last_confidence = CASE WHEN NEW.timestamp_ms >= last_seen_ms THEN NEW.confidence ELSE last_confidence END,
+                last_model_used = CASE WHEN NEW.timestamp_ms >= last_seen_ms THEN NEW.model_used ELSE last_model_used END,
+                last_seen_ms = MAX(last_seen_ms, NEW.timestamp_ms),
+                analysis_count = analysis_count + 1;
+        END
+    ''')
+
+
+def _history_rollups(conn: sqlite3.Connection):
+    """
+    v8: per-verdict counts in minute, hour and day buckets for timelines.
+
+    Maintained by an insert trigger; backfilled from the hot table.
+    """
+    conn.execute('''
+        CREATE TABLE history_rollups (
+            width_ms INTEGER NOT NULL,
+            bucket_ms INTEGER NOT NULL,
+            verdict TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            confidence_sum REAL NOT NULL,
+            PRIMARY KEY (width_ms, bucket_ms, verdict)
+        ) WITHOUT ROWID
+    ''')
+    for width_ms in (60000, 3600000, 86400000):
+        conn.execute('''
+            INSERT INTO history_rollups (width_ms, bucket_ms, verdict, count, confidence_sum)
+            SELECT ?, timestamp_ms - timestamp_ms % ?, verdict, COUNT(*), SUM(confidence)
+            FROM analysis_history GROUP BY 2, 3
+        ''', (width_ms, width_ms))
+    conn.execute('''
+        CREATE TRIGGER analysis_history_rollups
+        AFTER INSERT ON analysis_history
+        BEGIN
+            INSERT INTO history_rollups (width_ms, bucket_ms, verdict, count, confidence_sum)
+            VALUES (60000, NEW.timestamp_ms - NEW.timestamp_ms % 60000, NEW.verdict, 1, NEW.confidence),
+                   (3600000, NEW.timestamp_ms - NEW.timestamp_ms % 3600000, NEW.verdict, 1, NEW.confidence),
+                   (86400000, NEW.timestamp_ms - NEW.timestamp_ms % 86400000, NEW.verdict, 1, NEW.confidence)
+            ON CONFLICT(width_ms, bucket_ms, verdict) DO UPDATE SET
+                count = count + 1,
+                confidence_sum = confidence_sum + excluded.confidence_sum;
+        END
+    ''')
+
+
+def _analytics_sketches(conn: sqlite3.Connection):
+    """v9: per-day HyperLogLog, t-digest and count-min sketches, backfilled from the hot table"""
+    conn.execute('''
+        CREATE TABLE analytics_sketches (
+            sketch TEXT NOT NULL,
+            key TEXT NOT NULL,
+            bucket_ms INTEGER NOT NULL,
+            data BLOB NOT NULL,
+            PRIMARY KEY (sketch, key, bucket_ms)
+        )
+    ''')
+    store = SketchStore()
+    cursor = conn.execute('''
+        SELECT h.timestamp_ms, h.text_hash, h.model_used, p.processing_time_ms
+        FROM analysis_history h LEFT JOIN analysis_payloads p ON p.analysis_id = h.id
+        ORDER BY h.timestamp_ms
+    ''')
+    while True:
+        rows = cursor.fetchmany(50000)
+        if not rows:
+            break
+        store.update(conn, rows)
+
+
+def _verification_jobs(conn: sqlite3.Connection):
+    """
+    v10: resumable bulk verification jobs.
+
+    Each job is split into chunks (byte ranges of the input file) that
+    workers lease; a finished chunk is a checkpoint that survives restarts.
+    The lease columns on a job cover planning and final assembly.
+    """
+    conn.execute('''
+        CREATE TABLE verification_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            input_path TEXT NOT NULL,
+            output_path TEXT NOT NULL,
+            fmt TEXT NOT NULL,
+            text_field TEXT NOT NULL,
+            chunk_records INTEGER NOT NULL,
+            fieldnames TEXT,
+            total_records INTEGER,
+            total_chunks INTEGER,
+            status TEXT NOT NULL,
+            error TEXT,
+            created_ms INTEGER NOT NULL,
+            started_ms INTEGER,
+            finished_ms INTEGER,
+            lease_worker TEXT,
+            lease_expires_ms INTEGER
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE job_chunks (
+            job_id INTEGER NOT NULL REFERENCES verification_jobs(id) ON DELETE CASCADE,
+            chunk INTEGER NOT NULL,
+            start_offset INTEGER NOT NULL,
+            first_line INTEGER NOT NULL,
+            record_count INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            worker TEXT,
+            lease_expires_ms INTEGER,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            errors INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            completed_ms INTEGER,
+            PRIMARY KEY (job_id, chunk)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX idx_job_chunks_status ON job_chunks(status, job_id, chunk)')
+    conn.execute('CREATE INDEX idx_verification_jobs_status ON verification_jobs(status)')
+
+
+def _partition_generation(conn: sqlite3.Connection):
+    """v11: archive layout generation, so every process's connections notice partition changes"""
+    conn.execute('''
+        CREATE TABLE partition_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('INSERT INTO partition_state (id, generation) VALUES (1, 0)')
+
+
+# Append new migrations to the end; versions are stored in PRAGMA user_version
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, 'base analysis_history schema', _create_base_schema),
+    (2, 'incremental aggregate counters', _create_aggregate_counters),
+    (3, 'typed timestamps, text hash and indexes', _typed_indexed_history),
+    (4, 'columnar prediction payloads', _prediction_payloads),
+    (5, 'full-text index over claims', _claims_full_text_index),
+    (6, 'export watermarks', _export_watermarks),
+    (7, 'latest verdict on claims', _latest_verdict_on_claims),
+    (8, 'minute/hour/day rollups', _history_rollups),
+    (9, 'streaming analytics sketches', _analytics_sketches),
+    (10, 'bulk verification job queue', _verification_jobs),
+    (11, 'partition generation', _partition_generation),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def apply_migrations(conn: sqlite3.Connection) -> int:
+    """Bring the database up to SCHEMA_VERSION, one transaction per migration"""
+    for version, description, migrate in MIGRATIONS:
+        # Re-read inside the write lock so concurrent processes migrate once
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if get_schema_version(conn) >= version:
+                conn.execute('COMMIT')
+                continue
+            logging.info(f"Applying schema migration {version}: {description}")
+            migrate(conn)
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+    return get_schema_version(conn)
@@ -0,0 +1,397 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+HISTORY_COLUMNS = 'id, timestamp_ms, statement, text_hash, verdict, confidence, model_used'
+PAYLOAD_COLUMNS = (
+    'analysis_id, processing_time_ms, prob_models, probabilities, text_length, word_count, '
+    'sentence_count, credibility_indicators, sensationalism_score, clickbait_score, reasoning'
+)
+
+# SQLite's default SQLITE_MAX_ATTACHED is 10; keep one slot spare
+MAX_ATTACHED_ARCHIVES = 9
+MOVE_CHUNK_SIZE = 50000
+
+_ARCHIVE_FILE = re.compile(r'history_(\d{4})\.db$')
+_MONTH_TABLE = re.compile(r'history_(\d{2})$')
+
+
+def month_start_ms(year: int, month: int) -> int:
+    return int(datetime(year, month, 1, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def next_month(year: int, month: int) -> Tuple[int, int]:
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def month_of(timestamp_ms: int) -> Tuple[int, int]:
+    moment = datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
+    return moment.year, moment.month
+
+
+class HistoryPartitions:
+    """
+    Monthly archive partitions for analysis history.
+    
+    Recent rows stay in the hot ``analysis_history`` table. Whole months
+    older than the hot window move into yearly archive files
+    (``history_YYYY.db``), one ``history_MM``/``payloads_MM`` table pair per
+    month. Every connection attaches the archives and gets a TEMP
+    ``analysis_history_all`` view over hot and archived rows; hot-path
+    queries keep using ``analysis_history`` alone. Changes to the archives
+    bump a generation stored in the database, so connections in other
+    processes (the app while the CLI archives) re-attach too. Aggregate counters cover
+    every partition, so only retention, which deletes data, adjusts them.
+    """
+    
+    def __init__(self, database, archive_dir: Optional[str] = None, chunk_size: int = MOVE_CHUNK_SIZE):
+        self.database = database
+        self.archive_dir = archive_dir or os.path.join(os.path.dirname(database.db_path) or '.', 'archive')
+        self.chunk_size = chunk_size
+    
+    def archive_path(self, year: int) -> str:
+        return os.path.join(self.archive_dir, f"history_{year}.db")
+    
+    def archive_files(self) -> List[Tuple[int, str]]:
+        """(year, path) of every archive file, oldest first"""
+        files = []
+        for path in glob.glob(os.path.join(self.archive_dir, 'history_*.db')):
+            match = _ARCHIVE_FILE.search(path)
+            if match:
+                files.append((int(match.group(1)), path))
+        return sorted(files)
+    
+    def attach(self, conn: sqlite3.Connection):
+        """Attach the newest archives to ``conn`` and (re)create the union view"""
+        for (schema,) in conn.execute("SELECT name FROM pragma_database_list WHERE name LIKE 'archive_%'").fetchall():
+            conn.execute(f'DETACH DATABASE {schema}')
+        
+        files = self.archive_files()
+        if len(files) > MAX_ATTACHED_ARCHIVES:
+            logging.warning(f"{len(files)} archive files found; only the newest {MAX_ATTACHED_ARCHIVES} are attached")
+            files = files[-MAX_ATTACHED_ARCHIVES:]
+        
+        selects = [f'SELECT {HISTORY_COLUMNS} FROM main.analysis_history']
+        for year, path in files:
+            conn.execute(f'ATTACH DATABASE ? AS archive_{year}', (path,))
+            for table in self._month_tables(conn, year):
+                selects.append(f'SELECT {HISTORY_COLUMNS} FROM archive_{year}.{table}')
+        
+        conn.execute('DROP VIEW IF EXISTS temp.analysis_history_all')
+        conn.execute(f"CREATE TEMP VIEW analysis_history_all AS {' UNION ALL '.join(selects)}")
+    
+    def _month_tables(self, conn: sqlite3.Connection, year: int) -> List[str]:
+        return sorted(
+            name for (name,) in conn.execute(f"SELECT name FROM archive_{year}.sqlite_master WHERE type = 'table'")
+            if _MONTH_TABLE.match(name)
+        )
+    
+    def list_partitions(self) -> List[Dict]:
+        """Archived months, oldest first, with their row counts"""
+        conn = self.database._connection()
+        partitions = []
+        for year, path in self.archive_files():
+            schema = f'archive_{year}'
+            if conn.execute('SELECT 1 FROM pragma_database_list WHERE name = ?', (schema,)).fetchone() is None:
+                continue
+            for table in self._month_tables(conn, year):
+                month = int(table[-2:])
+                partitions.append({
+                    'partition': f'{year}-{month:02d}',
+                    'table': f'{schema}.{table}',
+                    'path': path,
+                    'rows': conn.execute(f'SELECT COUNT(*) FROM {schema}.{table}').fetchone()[0],
+                    'start_ms': month_start_ms(year, month),
+                    'end_ms': month_start_ms(*next_month(year, month))
+                })
+        return partitions
+    
+    def source_tables(self) -> List[Tuple[str, str]]:
+        """(history, payloads) table pairs in id order: archives oldest first, then the hot table"""
+        return [
+            (p['table'], p['table'].replace('.history_', '.payloads_')) for p in self.list_partitions()
+        ] + [('main.analysis_history', 'main.analysis_payloads')]
+    
+    @staticmethod
+    def generation(conn: sqlite3.Connection) -> int:
+        """Archive layout generation, compared by connections to know when to re-attach"""
+        return conn.execute('SELECT generation FROM partition_state WHERE id = 1').fetchone()[0]
+    
+    def _invalidate(self, conn: sqlite3.Connection):
+        with conn:
+            conn.execute('UPDATE partition_state SET generation = generation + 1 WHERE id = 1')
+        # Other connections see the bump; this one's own commits leave its data_version alone
+        self.attach(conn)
+    
+    def _ensure_month_tables(self, conn: sqlite3.Connection, year: int, month: int) -> Tuple[str, str]:
+        schema = f'archive_{year}'
+        if conn.execute('SELECT 1 FROM pragma_database_list WHERE name = ?', (schema,)).fetchone() is None:
+            os.makedirs(self.archive_dir, exist_ok=True)
+            conn.execute(f'ATTACH DATABASE ? AS {schema}', (self.archive_path(year),))
+        history, payloads = f'{schema}.history_{month:02d}', f'{schema}.payloads_{month:02d}'
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {history} (
+                id INTEGER PRIMARY KEY,
+                timestamp_ms INTEGER NOT NULL,
+                statement TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                verdict TEXT NOT NULL,
+                confidence REAL NOT NULL,
+                model_used TEXT NOT NULL
+            )
+        ''')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {schema}.idx_history_{month:02d}_time '
+                     f'ON history_{month:02d} (timestamp_ms)')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {schema}.idx_history_{month:02d}_text_hash '
+                     f'ON history_{month:02d} (text_hash, timestamp_ms)')
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {payloads} (
+                analysis_id INTEGER PRIMARY KEY,
+                processing_time_ms REAL,
+                prob_models TEXT NOT NULL,
+                probabilities BLOB NOT NULL,
+                text_length INTEGER,
+                word_count INTEGER,
+                sentence_count INTEGER,
+                credibility_indicators INTEGER,
+                sensationalism_score INTEGER,
+                clickbait_score INTEGER,
+                reasoning TEXT
+            )
+        ''')
+        return history, payloads
+    
+    def archive_before(self, cutoff_ms: int) -> Dict:
+        """
+        Move every whole month that ends at or before ``cutoff_ms`` out of the hot table.
+        
+        Rows move in chunks so writers are never blocked for long. Each chunk
+        is committed to the archive file first and deleted from the hot table
+        only once the copy is confirmed, in a second transaction: SQLite does
+        not commit across attached WAL databases atomically, so one
+        transaction could lose rows in a crash. An interrupted run leaves rows
+        in both places; ``INSERT OR REPLACE`` makes repeating it safe.
+        """
+        conn = self.database._connection()
+        cutoff = month_start_ms(*month_of(cutoff_ms))
+        oldest = conn.execute('SELECT MIN(timestamp_ms) FROM analysis_history').fetchone()[0]
+        moved = {}
+        if oldest is None or oldest >= cutoff:
+            return moved
+        
+        next_ms = oldest
+        while True:
+            # Skip straight to the next month that actually has rows
+            next_ms = conn.execute('''
+                SELECT MIN(timestamp_ms) FROM analysis_history WHERE timestamp_ms >= ? AND timestamp_ms < ?
+            ''', (next_ms, cutoff)).fetchone()[0]
+            if next_ms is None:
+                break
+            year, month = month_of(next_ms)
+            start, end = month_start_ms(year, month), month_start_ms(*next_month(year, month))
+            history, payloads = self._ensure_month_tables(conn, year, month)
+            count = 0
+            while True:
+                ids = [row[0] for row in conn.execute('''
+                    SELECT id FROM analysis_history WHERE timestamp_ms >= ? AND timestamp_ms < ?
+                    ORDER BY timestamp_ms LIMIT ?
+                ''', (start, end, self.chunk_size))]
+                if not ids:
+                    break
+                batch = json.dumps(ids)
+                with conn:
+                    conn.execute(f'''
+                        INSERT OR REPLACE INTO {history} ({HISTORY_COLUMNS})
+                        SELECT {HISTORY_COLUMNS} FROM analysis_history WHERE id IN (SELECT value FROM json_each(?))
+                    ''', (batch,))
+                    conn.execute(f'''
+                        INSERT OR REPLACE INTO {payloads} ({PAYLOAD_COLUMNS})
+                        SELECT {PAYLOAD_COLUMNS} FROM analysis_payloads
+                        WHERE analysis_id IN (SELECT value FROM json_each(?))
+                    ''', (batch,))
+                self._check_copied(conn, history, payloads, batch)
+                with conn:
+                    conn.execute('DELETE FROM analysis_payloads WHERE analysis_id IN (SELECT value FROM json_each(?))',
+                                 (batch,))
+                    conn.execute('DELETE FROM analysis_history WHERE id IN (SELECT value FROM json_each(?))', (batch,))
+                count += len(ids)
+            if count:
+                moved[f'{year}-{month:02d}'] = count
+            next_ms = end
+        
+        self._invalidate(conn)
+        if moved:
+            logging.info(f"Archived history partitions: {moved}")
+        return moved
+    
+    @staticmethod
+    def _check_copied(conn: sqlite3.Connection, history: str, payloads: str, batch: str):
+        """Raise unless every row and payload in ``batch`` is in the archive"""
+        for source, target, key in [('main.analysis_history', history, 'id'),
+                                    ('main.analysis_payloads', payloads, 'analysis_id')]:
+            expected, copied = (
+                conn.execute(f'SELECT COUNT(*) FROM {table} WHERE {key} IN (SELECT value FROM json_each(?))',
+                             (batch,)).fetchone()[0]
+                for table in (source, target)
+            )
+            if copied != expected:
+                raise sqlite3.DatabaseError(f"Archived {copied} of {expected} rows into {target}; "
+                                            f"leaving them in the hot table")
+    
+    def drop_before(self, cutoff_ms: int) -> Dict:
+        """
+        Retention: delete archived months that end at or before ``cutoff_ms``.
+        
+        Dropping a month is a DROP TABLE, after subtracting its rows from the
+        aggregate counters and the per-claim counts and deleting its rollup
+        and sketch buckets. Empty archive files are removed.
+        """
+        conn = self.database._connection()
+        dropped = {}
+        for partition in self.list_partitions():
+            if partition['end_ms'] > cutoff_ms:
+                continue
+            history = partition['table']
+            with conn:
+                conn.execute(f'''
+                    UPDATE analytics_totals
+                    SET total = total - (SELECT COUNT(*) FROM {history}),
+                        confidence_sum = confidence_sum - (SELECT COALESCE(SUM(confidence), 0) FROM {history})
+                    WHERE id = 1
+                ''')
+                conn.execute(f'''
+                    WITH d AS (SELECT verdict, COUNT(*) AS n FROM {history} GROUP BY verdict)
+                    UPDATE verdict_counts SET count = count - d.n FROM d WHERE verdict_counts.verdict = d.verdict
+                ''')
+                conn.execute(f'''
+                    WITH d AS (SELECT model_used, COUNT(*) AS n FROM {history} GROUP BY model_used)
+                    UPDATE model_counts SET count = count - d.n FROM d WHERE model_counts.model_used = d.model_used
+                ''')
+                conn.execute(f'''
+                    WITH d AS (SELECT text_hash, COUNT(*) AS n FROM {history} GROUP BY text_hash)
+                    UPDATE claims SET analysis_count = analysis_count - d.n FROM d WHERE claims.text_hash = d.text_hash
+                ''')
+                conn.execute('DELETE FROM claims WHERE analysis_count <= 0')
+                conn.execute('DELETE FROM history_rollups WHERE bucket_ms >= ? AND bucket_ms < ?',
+                             (partition['start_ms'], partition['end_ms']))
+                conn.execute('DELETE FROM analytics_sketches WHERE bucket_ms >= ? AND bucket_ms < ?',
+                             (partition['start_ms'], partition['end_ms']))
+                conn.execute(f'DROP TABLE {history}')
+                conn.execute(f"DROP TABLE IF EXISTS {history.replace('.history_', '.payloads_')}")
+            dropped[partition['partition']] = partition['rows']
+        
+        if dropped:
+            for year, path in self.archive_files():
+                schema = f'archive_{year}'
+                if conn.execute('SELECT 1 FROM pragma_database_list WHERE name = ?', (schema,)).fetchone() is None:
+                    continue
+                if conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE name LIKE 'history_%'").fetchone() is None:
+                    conn.execute(f'DETACH DATABASE {schema}')
+                    os.remove(path)
+            self._invalidate(conn)
+            logging.info(f"Dropped history partitions past retention: {dropped}")
+        return dropped
+    
+    def vacuum(self, min_free_ratio: float = 0.25) -> List[str]:
+        """VACUUM each database whose free pages exceed ``min_free_ratio`` of its size"""
+        conn = self.database._connection()
+        vacuumed = []
+        for (schema,) in conn.execute('SELECT name FROM pragma_database_list').fetchall():
+            if schema == 'temp':
+                continue
+            page_count = conn.execute(f'PRAGMA {schema}.page_count').fetchone()[0]
+            free_pages = conn.execute(f'PRAGMA {schema}.freelist_count').fetchone()[0]
+            if page_count and free_pages / page_count >= min_free_ratio:
+                conn.execute(f'VACUUM {schema}')
+                vacuumed.append(schema)
+        if 'main' in vacuumed:
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        conn.execute('PRAGMA optimize')
+        return vacuumed
+
+
+class MaintenanceScheduler:
+    """
+    Background thread that archives, applies retention and compacts.
+    
+    Runs every ``interval`` seconds: months older than ``hot_days`` move to
+    archives, archived months older than ``retention_days`` (if set) are
+    dropped, expired minute/hour rollups are pruned, then fragmented
+    databases are vacuumed.
+    """
+    
+    def __init__(self, database, interval: float = 3600, hot_days: int = 35,
+                 retention_days: Optional[int] = None, min_free_ratio: float = 0.25):
+        self.database = database
+        self.interval = interval
+        self.hot_days = hot_days
+        self.retention_days = retention_days
+        self.min_free_ratio = min_free_ratio
+        self.last_report = {}
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def run_once(self, now_ms: Optional[int] = None) -> Dict:
+        now_ms = now_ms if now_ms is not None else int(datetime.now(timezone.utc).timestamp() * 1000)
+        day_ms = 24 * 3600 * 1000
+        partitions = self.database.partitions
+        
+        # Flush queued writes first so archived months are complete
+        self.database.flush(timeout=30)
+        report = {'archived': partitions.archive_before(now_ms - self.hot_days * day_ms)}
+        report['dropped'] = (partitions.drop_before(now_ms - self.retention_days * day_ms)
+                             if self.retention_days is not None else {})
+        report['rollups_pruned'] = self.database.prune_rollups(now_ms)
+        report['vacuumed'] = partitions.vacuum(self.min_free_ratio)
+        self.last_report = report
+        return report
+    
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='history-maintenance', daemon=True)
+            self._thread.start()
+        return self
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logging.error(f"History maintenance failed: {e}")
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+def main(argv: Optional[List[str]] = None):
+    from src.data.database import AnalysisDatabase
+    
+    parser = argparse.ArgumentParser(description="Archive, expire and compact analysis history partitions")
+    parser.add_argument('--db', default='data/analysis_history.db')
+    parser.add_argument('--archive-dir', default=None)
+    parser.add_argument('--hot-days', type=int, default=35)
+    parser.add_argument('--retention-days', type=int, default=None)
+    parser.add_argument('--interval', type=float, default=None, help='Keep running, once every N seconds')
+    args = parser.parse_args(argv)
+    
+    database = AnalysisDatabase(args.db, archive_dir=args.archive_dir)
+    scheduler = MaintenanceScheduler(database, hot_days=args.hot_days, retention_days=args.retention_days)
+    print(json.dumps(scheduler.run_once()))
+    if args.interval:
+        scheduler.interval = args.interval
+        scheduler.start()._thread.join()
+    database.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+MAX_RETRY_BACKOFF = 5.0
+
+
+class WriteBehindQueue:
+    """
+    Buffer records in memory and persist them in batched transactions.
+    
+    A background thread drains the queue and calls ``flush_fn`` with up to
+    ``max_batch`` records whenever that many are waiting or ``max_delay_ms``
+    has passed since the first buffered record. The bounded queue provides
+    backpressure: ``put`` blocks (or raises ``queue.Full`` after
+    ``put_timeout``) when writers outpace the disk. Pending records are
+    flushed on ``close`` and at interpreter exit.
+    
+    A failed flush (a locked or full disk) is retried up to ``max_retries``
+    times with exponential backoff before the batch is dropped; ``flush_fn``
+    must write a batch in one transaction so a retry never duplicates rows.
+    Failed attempts, retries and dropped records show up in ``get_metrics``.
+    """
+    
+    def __init__(self, flush_fn: Callable[[List], None], max_batch: int = 500, max_delay_ms: int = 200,
+                 max_queue: int = 10000, put_timeout: Optional[float] = 5.0, name: str = 'write-behind',
+                 max_retries: int = 3, retry_backoff: float = 0.1):
+        self.flush_fn = flush_fn
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self.put_timeout = put_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = threading.Event()
+        self._flush_requested = threading.Event()
+        self._idle = threading.Condition()
+        self._in_flight = 0
+        self.metrics = {'enqueued': 0, 'flushed': 0, 'batches': 0, 'failures': 0, 'retries': 0, 'dropped': 0,
+                        'last_error': None, 'last_flush_ms': 0.0}
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    def put(self, record):
+        """Enqueue one record, blocking while the queue is full"""
+        if self._closed.is_set():
+            raise RuntimeError("Write-behind queue is closed")
+        with self._idle:
+            self._in_flight += 1
+            self.metrics['enqueued'] += 1
+        try:
+            self._queue.put(record, timeout=self.put_timeout)
+        except queue.Full:
+            with self._idle:
+                self._in_flight -= 1
+                self.metrics['enqueued'] -= 1
+            raise
+    
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                if self._closed.is_set():
+                    return
+                continue
+            
+            batch = [first]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = 0 if self._flush_requested.is_set() else deadline - time.monotonic()
+                try:
+                    # Once the delay has passed, only take what is already queued
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0
+                                 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._flush(batch)
+    
+    def _flush(self, batch: List):
+        """Write one batch, retrying in place so records keep their order"""
+        start = time.perf_counter()
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    self.flush_fn(batch)
+                    self.metrics['flushed'] += len(batch)
+                    self.metrics['batches'] += 1
+                    return
+                except Exception as e:
+                    self.metrics['failures'] += 1
+                    self.metrics['last_error'] = str(e)
+                    if attempt == self.max_retries:
+                        self.metrics['dropped'] += len(batch)
+                        logging.error(f"Write-behind flush of {len(batch)} records failed "
+                                      f"{attempt + 1} times, dropping them: {e}")
+                        return
+                    delay = min(self.retry_backoff * 2 ** attempt, MAX_RETRY_BACKOFF)
+                    self.metrics['retries'] += 1
+                    logging.warning(f"Write-behind flush of {len(batch)} records failed, retrying in {delay:.2f}s: {e}")
+                    time.sleep(delay)
+        finally:
+            self.metrics['last_flush_ms'] = round((time.perf_counter() - start) * 1000, 3)
+            with self._idle:
+                self._in_flight -= len(batch)
+                self._idle.notify_all()
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every record enqueued so far has been written"""
+        self._flush_requested.set()
+        try:
+            with self._idle:
+                return self._idle.wait_for(lambda: self._in_flight == 0, timeout=timeout)
+        finally:
+            self._flush_requested.clear()
+    
+    def close(self, timeout: float = 30.0):
+        """Stop accepting records and durably flush what is pending"""
+        if self._closed.is_set():
+            return
+        self.flush(timeout=timeout)
+        self._closed.set()
+        self._thread.join(timeout=timeout)
+    
+    def get_metrics(self) -> Dict:
+        return {**self.metrics, 'queue_depth': self._queue.qsize()}
@@ -0,0 +1,210 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+_NOT_FOUND = object()
+
+_refresh_executor = None
+_refresh_lock = threading.Lock()
+
+
+def _get_refresh_executor() -> ThreadPoolExecutor:
+    """Small shared pool that runs background revalidation for every cache"""
+    global _refresh_executor
+    with _refresh_lock:
+        if _refresh_executor is None:
+            _refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='cache-refresh')
+        return _refresh_executor
+
+
+class StaleWhileRevalidateCache:
+    """
+    In-memory LRU cache with stale-while-revalidate semantics.
+    
+    Entries younger than ``ttl`` are fresh. Older entries are still served
+    immediately for up to ``stale_ttl`` more seconds while a single
+    background refresh replaces them, so callers never wait on a refresh.
+    Entries past ``ttl + stale_ttl`` are treated as misses.
+    """
+    
+    def __init__(self, ttl: float, stale_ttl: Optional[float] = None, max_entries: int = 10000,
+                 executor: Optional[ThreadPoolExecutor] = None, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl if stale_ttl is not None else ttl * 10
+        self.max_entries = max_entries
+        self.executor = executor
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.metrics = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'refresh_failures': 0,
+            'staleness_total': 0.0,
+            'staleness_max': 0.0
+        }
+    
+    def get(self, key: Hashable, refresh: Optional[Callable[[], Any]] = None, default: Any = _MISSING) -> Any:
+        """
+        Return the cached value for ``key``.
+        
+        A stale entry schedules ``refresh`` in the background. On a miss
+        ``default`` is returned, or ``KeyError`` raised when none is given.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            age = now - entry[1] if entry else None
+            
+            if entry is None or age >= self.ttl + self.stale_ttl:
+                self.metrics['misses'] += 1
+                if default is _MISSING:
+                    raise KeyError(key)
+                return default
+            
+            self._entries.move_to_end(key)
+            if age < self.ttl:
+                self.metrics['hits'] += 1
+                return entry[0]
+            
+            staleness = age - self.ttl
+            self.metrics['stale_hits'] += 1
+            self.metrics['staleness_total'] += staleness
+            self.metrics['staleness_max'] = max(self.metrics['staleness_max'], staleness)
+            schedule = refresh is not None and key not in self._refreshing
+            if schedule:
+                self._refreshing.add(key)
+        
+        if schedule:
+            (self.executor or _get_refresh_executor()).submit(self._refresh, key, refresh)
+        return entry[0]
+    
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (value, self.clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Serve from cache, loading synchronously only on a miss"""
+        value = self.get(key, refresh=loader, default=_NOT_FOUND)
+        if value is not _NOT_FOUND:
+            return value
+        value = loader()
+        self.put(key, value)
+        return value
+    
+    def _refresh(self, key: Hashable, loader: Callable[[], Any]):
+        try:
+            self.put(key, loader())
+            with self._lock:
+                self.metrics['refreshes'] += 1
+        except Exception as e:
+            logging.warning(f"Background cache refresh failed for {key}: {e}")
+            with self._lock:
+                self.metrics['refresh_failures'] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get_metrics(self) -> Dict:
+        """Hit ratio and staleness of served entries"""
+        with self._lock:
+            metrics = dict(self.metrics)
+            size = len(self._entries)
+        lookups = metrics['hits'] + metrics['stale_hits'] + metrics['misses']
+        served = metrics['hits'] + metrics['stale_hits']
+        return {
+            'entries': size,
+            'lookups': lookups,
+            'hit_ratio': round(served / lookups, 3) if lookups else 0.0,
+            'fresh_hit_ratio': round(metrics['hits'] / lookups, 3) if lookups else 0.0,
+            'stale_hits': metrics['stale_hits'],
+            'avg_staleness': round(metrics['staleness_total'] / metrics['stale_hits'], 3)
+            if metrics['stale_hits'] else 0.0,
+            'max_staleness': round(metrics['staleness_max'], 3),
+            'refreshes': metrics['refreshes'],
+            'refresh_failures': metrics['refresh_failures']
+        }
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into one computation.
+    
+    The first caller for a key starts the work; callers arriving while it
+    is still running share its result instead of starting their own. The
+    key is forgotten as soon as the work finishes, so later calls compute
+    afresh (caching finished results is a cache's job, not this one's).
+    """
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+        self.metrics = {'calls': 0, 'executions': 0, 'shared': 0}
+    
+    def share(self, key: Hashable, start: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Return (call, shared): the in-flight call for ``key``, or a new one from ``start()``.
+        
+        ``start`` must return something with ``add_done_callback`` (a
+        ``Future`` or an ``AnalysisHandle``) and must not block; it runs
+        under the lock so two racing callers can never both start.
+        """
+        with self._lock:
+            self.metrics['calls'] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self.metrics['shared'] += 1
+                return call, True
+            call = start()
+            self._calls[key] = call
+            self.metrics['executions'] += 1
+        call.add_done_callback(lambda _: self._forget(key, call))
+        return call, False
+    
+    def do(self, key: Hashable, func: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run ``func`` on the calling thread, or wait for the identical call already running.
+        
+        A caller that waits gives up after ``timeout`` seconds with
+        ``concurrent.futures.TimeoutError``; the call it followed carries on.
+        """
+        future, shared = self.share(key, Future)
+        if not shared:
+            try:
+                future.set_result(func())
+            except BaseException as e:
+                future.set_exception(e)
+        return future.result(timeout if shared else None)
+    
+    def _forget(self, key: Hashable, call: Any):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+    
+    def get_metrics(self) -> Dict:
+        """How many calls were answered by another call's computation"""
+        with self._lock:
+            metrics = dict(self.metrics)
+            in_flight = len(self._calls)
+        return {
+            **metrics,
+            'in_flight': in_flight,
+            'saved_ratio': round(metrics['shared'] / metrics['calls'], 3) if metrics['calls'] else 0.0
+        }
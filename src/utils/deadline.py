@@ -0,0 +1,50 @@
+import time
+import threading
+from typing import Callable, List, Optional
+
+
+class Deadline:
+    """
+    Latency budget carried through one analysis.
+    
+    Created when the request arrives and handed to every stage. Stages
+    check ``remaining()`` before optional work and call ``skip()`` for
+    whatever they leave out, so ``skipped`` tells the caller what the
+    answer is missing. A deadline without a budget never expires.
+    """
+    
+    def __init__(self, budget: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.budget = budget
+        self.clock = clock
+        self.expires_at = None if budget is None else clock() + budget
+        self.skipped: List[str] = []
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_ms(cls, budget_ms: Optional[float]) -> 'Deadline':
+        return cls(None if budget_ms is None else float(budget_ms) / 1000)
+    
+    def remaining(self) -> float:
+        """Seconds left; infinite without a budget"""
+        if self.expires_at is None:
+            return float('inf')
+        return max(0.0, self.expires_at - self.clock())
+    
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+    
+    def allows(self, seconds: float) -> bool:
+        """Whether work expected to take ``seconds`` still fits in the budget"""
+        return self.remaining() >= seconds
+    
+    def timeout(self, default: Optional[float] = None) -> Optional[float]:
+        """The tighter of ``default`` and the time left, for blocking calls; None means no limit"""
+        if self.expires_at is None:
+            return default
+        return self.remaining() if default is None else min(default, self.remaining())
+    
+    def skip(self, what: str):
+        """Record work left out to stay within the budget"""
+        with self._lock:
+            if what not in self.skipped:
+                self.skipped.append(what)
@@ -1,7 +1,8 @@
 import re
 import hashlib
+import inspect
 import time
-from typing import Any, Dict
+from typing import Any, Callable, Dict
 import json
 
 def clean_text(text: str) -> str:
@@ -21,6 +22,25 @@ def generate_text_hash(text: str) -> str:
     """Generate hash for text caching"""
     return hashlib.md5(text.encode()).hexdigest()
 
+def normalize_claim(text: str) -> str:
+    """Normalize a claim so trivially different submissions compare equal"""
+    if not text:
+        return ""
+    
+    text = ' '.join(text.lower().split())
+    return text.strip(' .!?')
+
+def generate_claim_hash(text: str) -> str:
+    """Hash of the normalized claim, used for deduplication and caching"""
+    return generate_text_hash(normalize_claim(text))
+
+def accepts_keyword(func: Callable, name: str) -> bool:
+    """Whether ``func`` takes a ``name`` parameter, for optional arguments to injected components"""
+    try:
+        return name in inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+
 def timing_decorator(func):
     """Decorator to measure function execution time"""
     def wrapper(*args, **kwargs):
@@ -0,0 +1,115 @@
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Only idempotent requests are retried automatically: a POST that timed out may already have been applied
+RETRY_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+
+class PooledHTTPClient:
+    """
+    Shared keep-alive HTTP client.
+    
+    One ``requests.Session`` with a bounded connection pool per host, retries
+    of idempotent requests with exponential backoff on transient errors and
+    gzip-encoded responses.
+    Connections are reused across calls so each upstream request only pays
+    for TCP/TLS setup once per pooled connection.
+    """
+    
+    def __init__(self, pool_maxsize: int = DEFAULT_POOL_MAXSIZE, pool_connections: int = 20,
+                 max_retries: int = DEFAULT_MAX_RETRIES, backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+                 timeout: float = DEFAULT_TIMEOUT, user_agent: str = 'NexusTruthVerifier/1.0'):
+        self.timeout = timeout
+        self.retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=RETRY_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        # pool_block makes pool_maxsize a hard per-host connection limit
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=self.retry,
+            pool_block=True
+        )
+        self.session = requests.Session()
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        self.session.headers.update({
+            'User-Agent': user_agent,
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive'
+        })
+        self.total_requests = 0
+        self._lock = threading.Lock()
+    
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        with self._lock:
+            self.total_requests += 1
+        return self.session.request(method, url, **kwargs)
+    
+    def get(self, url: str, params: Optional[Dict] = None, **kwargs) -> requests.Response:
+        return self.request('GET', url, params=params, **kwargs)
+    
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+    
+    def get_json(self, url: str, params: Optional[Dict] = None, **kwargs) -> Dict:
+        """GET a JSON document, raising for non-2xx responses"""
+        response = self.get(url, params=params, **kwargs)
+        response.raise_for_status()
+        return response.json()
+    
+    def get_stats(self) -> Dict:
+        """Connection reuse statistics per host"""
+        hosts = {}
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = f"{pool.scheme}://{pool.host}:{pool.port}"
+            stats = hosts.setdefault(host, {'requests': 0, 'connections_opened': 0})
+            stats['requests'] += pool.num_requests
+            stats['connections_opened'] += pool.num_connections
+        
+        for stats in hosts.values():
+            stats['connections_reused'] = max(stats['requests'] - stats['connections_opened'], 0)
+        
+        opened = sum(s['connections_opened'] for s in hosts.values())
+        sent = sum(s['requests'] for s in hosts.values())
+        return {
+            'total_requests': self.total_requests,
+            'connections_opened': opened,
+            'reuse_ratio': round((sent - opened) / sent, 3) if sent else 0.0,
+            'hosts': hosts
+        }
+    
+    def close(self):
+        self.session.close()
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client() -> PooledHTTPClient:
+    """Process-wide pooled client shared by all API and source integrations"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = PooledHTTPClient()
+        return _shared_client
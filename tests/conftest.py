@@ -0,0 +1,54 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+class StubHTTPServer:
+    """Local keep-alive JSON server; routes map a path to ``query -> (status, body)``"""
+    
+    def __init__(self):
+        self.routes = {}
+        self.hits = {}
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                stub.hits[url.path] = stub.hits.get(url.path, 0) + 1
+                route = stub.routes.get(url.path)
+                status, body = route(query) if route else (404, {'error': 'not found'})
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    payload = gzip.compress(payload)
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            
+            def log_message(self, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+    
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    server = StubHTTPServer()
+    yield server
+    server.close()
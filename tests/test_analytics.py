@@ -0,0 +1,95 @@
+import time
+
+import numpy as np
+
+from src.analytics.dashboard import AdvancedDashboard, MAX_PLOT_POINTS
+from src.analytics.downsampling import lttb_indices
+from src.analytics.performance import CountMinSketch, HyperLogLog, TDigest
+from src.data.database import DAY_MS, HOUR_MS, AnalysisDatabase, now_ms
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    x = np.arange(10000)
+    y = np.sin(x / 500.0)
+    y[4321] = 25.0
+    
+    keep = lttb_indices(x, y, 200)
+    assert len(keep) == 200
+    assert keep[0] == 0 and keep[-1] == 9999
+    assert np.all(np.diff(keep) > 0)
+    assert 4321 in keep
+
+
+def test_timeline_uses_rollups_and_downsamples(tmp_path):
+    db = AnalysisDatabase(str(tmp_path / 'history.db'))
+    start = now_ms() - now_ms() % DAY_MS - 29 * DAY_MS
+    db.save_analyses([(start + i * HOUR_MS, f"claim {i}", 'false' if i % 3 else 'true', 0.6, 'ensemble')
+                      for i in range(24 * 30)])
+    
+    # Recent enough for minute buckets
+    day = db.get_timeline(start + 25 * DAY_MS, start + 26 * DAY_MS)
+    assert day['width_ms'] == 60000
+    assert day['count'].sum() == 24
+    
+    month = db.get_timeline(start, start + 30 * DAY_MS, max_points=100)
+    assert month['width_ms'] == HOUR_MS
+    assert month['buckets'] == 24 * 30
+    assert month['downsampled'] and len(month['bucket_ms']) == 100
+    assert np.allclose(month['avg_confidence'], 0.6)
+    
+    fig = AdvancedDashboard().create_timeline_analysis(month)
+    assert all(len(trace.x) <= MAX_PLOT_POINTS for trace in fig.data)
+
+
+def test_sketches_merge_and_round_trip():
+    left, right = HyperLogLog(), HyperLogLog()
+    for i in range(20000):
+        (left if i % 2 else right).add(f"claim {i % 15000}")
+    merged = HyperLogLog.from_bytes(left.merge(right).to_bytes())
+    assert abs(merged.count() - 15000) < 15000 * 0.03
+    
+    values = np.random.default_rng(7).lognormal(0, 1, 20000)
+    digest, other = TDigest(), TDigest()
+    for i, value in enumerate(values):
+        (digest if i % 2 else other).add(float(value))
+    digest = TDigest.from_bytes(digest.merge(other).to_bytes())
+    for q in (0.5, 0.99):
+        assert abs(digest.quantile(q) - np.quantile(values, q)) / np.quantile(values, q) < 0.03
+    
+    frequency = CountMinSketch()
+    frequency.add_many(['a'] * 50 + ['b'] * 20 + [str(i) for i in range(1000)])
+    assert [item['key'] for item in CountMinSketch.from_bytes(frequency.to_bytes()).top(2)] == ['a', 'b']
+
+
+def test_database_sketches_are_updated_on_write(tmp_path):
+    db = AnalysisDatabase(str(tmp_path / 'history.db'))
+    start = now_ms() - 3 * DAY_MS
+    db.save_analyses([(start + i * 60000, f"claim {i % 40}", 'false', 0.6, 'ensemble') for i in range(3000)])
+    
+    assert abs(db.get_distinct_claims(start) - 40) <= 1
+    assert db.get_top_claims(1)[0]['count'] >= 75
+    assert db.get_processing_time_quantiles()['count'] == 0
+    
+    # Single inserts fold into pending deltas; the blobs are written on flush
+    sketch_rows = 'SELECT COUNT(*) FROM analytics_sketches'
+    conn = db._connection()
+    db.flush()
+    stored = conn.execute(sketch_rows).fetchone()[0]
+    db.save_analysis('a brand new claim', 'true', 0.9, 'ensemble')
+    assert conn.execute(sketch_rows).fetchone()[0] == stored
+    assert abs(db.get_distinct_claims(start) - 41) <= 1 and db.sketches._pending
+    db.flush()
+    assert conn.execute(sketch_rows).fetchone()[0] > stored and not db.sketches._pending
+
+
+def test_pending_sketches_are_flushed_after_a_quiet_spell(tmp_path):
+    db = AnalysisDatabase(str(tmp_path / 'history.db'))
+    db.sketches.flush_interval = 0.05
+    db.save_analysis('The only claim today', 'false', 0.8, 'ensemble')
+    
+    deadline = time.monotonic() + 2
+    while db.sketches._pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not db.sketches._pending
+    assert db._connection().execute('SELECT COUNT(*) FROM analytics_sketches').fetchone()[0] > 0
+    db.close()
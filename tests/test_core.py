@@ -0,0 +1,607 @@
+import asyncio
+import io
+import json
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.analytics.performance import hash64
+from src.api.server import create_app
+from src.core.bulk import RESULT_FIELDS, BulkVerifier, load_bulk_model, verify_records
+from src.core.inference_server import InferenceClient, InferenceTimeoutError
+from src.core.router import HashRing, ShardedInferenceRouter
+from src.core.scheduler import BULK, INTERACTIVE, InferenceScheduler, PriorityClass, SchedulerBusyError
+from src.core.knowledge_graph import KnowledgeGraphVerifier
+from src.core.multi_source import MultiSourceVerifier
+from src.core.pipeline import AnalysisPipeline, PipelineError, PipelineExecutor, Stage, get_single_flight_metrics
+from src.core.sources import (
+    CircuitBreaker, LocalStandInSource, SourceRegistry, SourceTimeoutError, SourceUnavailableError
+)
+from src.utils.deadline import Deadline
+from src.utils.http_client import PooledHTTPClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+def test_circuit_breaker_opens_and_probes_after_reset():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    
+    clock.now = 10
+    assert breaker.allow_request()        # single half-open probe
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_registry_rejects_failing_source_once_circuit_is_open():
+    registry = SourceRegistry(failure_threshold=2, reset_timeout=60)
+    source = registry.register(LocalStandInSource('flaky', failure_rate=1.0))
+    
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            registry.query('flaky', 'claim')
+    with pytest.raises(SourceUnavailableError):
+        registry.query('flaky', 'claim')
+    
+    assert source.calls == 2
+    assert registry.get_status()['flaky']['state'] == CircuitBreaker.OPEN
+
+
+def test_registry_times_out_slow_source():
+    registry = SourceRegistry()
+    registry.register(LocalStandInSource('slow', latency=0.5, timeout=0.05))
+    
+    with pytest.raises(SourceTimeoutError):
+        registry.query('slow', 'claim')
+    assert registry.stats['slow']['timeouts'] == 1
+
+
+def test_hedged_request_cuts_tail_latency():
+    registry = SourceRegistry()
+    # First call stalls, the hedge issued after 50ms answers immediately
+    source = registry.register(LocalStandInSource('tail', hedge_after=0.05, timeout=2.0))
+    latencies = iter([1.0, 0.0])
+    original_query = source.query
+    
+    def query(claim):
+        time.sleep(next(latencies))
+        return original_query(claim)
+    
+    source.query = query
+    start = time.monotonic()
+    assert registry.query('tail', 'claim')['verdict'] == 'mixed'
+    assert time.monotonic() - start < 0.5
+    assert registry.stats['tail']['hedge_wins'] == 1
+
+
+def test_multi_source_verifier_uses_registered_sources():
+    verifier = MultiSourceVerifier(register_defaults=False)
+    verifier.register_source(LocalStandInSource(
+        'good', response={'verdict': 'supported', 'confidence': 0.9, 'evidence': ['x'], 'url': ''}
+    ))
+    verifier.register_source(LocalStandInSource('broken', failure_rate=1.0))
+    
+    result = verifier.verify_claim('The Earth is round')
+    
+    assert result['final_verdict'] == 'supported'
+    assert result['sources_checked'] == 1
+
+
+def test_multi_source_verifier_searches_wikipedia_over_http(stub_server):
+    stub_server.routes['/w/api.php'] = lambda query: (200, {'query': {'search': [
+        {'title': 'Flat Earth', 'snippet': 'The <span class="searchmatch">flat</span> Earth model'}
+    ]}})
+    verifier = MultiSourceVerifier(http_client=PooledHTTPClient(), wikipedia_api_url=f"{stub_server.url}/w/api.php")
+    
+    result = verifier.registry.query('wikipedia', 'The Earth is flat')
+    
+    assert result['evidence'] == ['Flat Earth: The flat Earth model']
+    assert result['url'] == 'https://en.wikipedia.org/wiki/Flat_Earth'
+    assert stub_server.hits['/w/api.php'] == 1
+
+
+def test_knowledge_graph_wikipedia_lookup_uses_pooled_client(stub_server):
+    def api(query):
+        if query.get('list') == 'search':
+            return 200, {'query': {'search': [{'title': 'Earth'}]}}
+        return 200, {'query': {'pages': {'9228': {
+            'title': 'Earth',
+            'fullurl': 'https://en.wikipedia.org/wiki/Earth',
+            'extract': 'Earth is the third planet from the Sun.\n\n== Name ==\nOld English.',
+            'categories': [{'title': 'Category:Planets'}]
+        }}}}
+    
+    stub_server.routes['/w/api.php'] = api
+    client = PooledHTTPClient()
+    verifier = KnowledgeGraphVerifier(http_client=client, wikipedia_api_url=f"{stub_server.url}/w/api.php")
+    
+    page = verifier.query_wikipedia('Earth')
+    
+    assert page['summary'] == 'Earth is the third planet from the Sun.'
+    assert page['categories'] == ['Planets']
+    assert client.get_stats()['connections_opened'] == 1
+
+
+def test_verify_claims_dedupes_batches_and_keeps_input_order():
+    class BatchSource(LocalStandInSource):
+        batch_size = 10
+        
+        def __init__(self):
+            super().__init__('batch')
+            self.batches = []
+        
+        def query_batch(self, claims):
+            self.batches.append(claims)
+            return [{'verdict': 'contradicted' if 'flat' in c.lower() else 'supported', 'confidence': 0.9}
+                    for c in claims]
+    
+    verifier = MultiSourceVerifier(register_defaults=False)
+    source = verifier.register_source(BatchSource())
+    
+    results = verifier.verify_claims(['The Earth is flat', 'Water is wet', 'the earth is FLAT!'])
+    
+    assert [r['final_verdict'] for r in results] == ['contradicted', 'supported', 'contradicted']
+    assert source.batches == [['The Earth is flat', 'Water is wet']]
+
+
+def test_registry_caches_answers_per_source():
+    registry = SourceRegistry()
+    source = registry.register(LocalStandInSource('cached', cache_ttl=60))
+    
+    registry.query('cached', 'The Earth is round')
+    registry.query('cached', 'the earth is round.')
+    
+    assert source.calls == 1
+    assert registry.get_status()['cached']['cache']['hit_ratio'] == 0.5
+
+
+def test_pipeline_runs_independent_stages_concurrently():
+    def slow(value):
+        def run(ctx):
+            time.sleep(0.2)
+            return value
+        return run
+    
+    events = []
+    executor = PipelineExecutor([
+        Stage('a', slow(1)),
+        Stage('b', slow(2)),
+        Stage('sum', lambda ctx: ctx['a'] + ctx['b'], depends_on=['a', 'b']),
+        Stage('broken', lambda ctx: 1 / 0),
+        Stage('after_broken', lambda ctx: 'never', depends_on=['broken'])
+    ])
+    start = time.perf_counter()
+    results = executor.run(on_progress=events.append)
+    
+    assert time.perf_counter() - start < 0.35
+    assert results['sum'].value == 3
+    assert results['broken'].error and results['after_broken'].skipped
+    assert [event.completed for event in events] == [1, 2, 3, 4, 5]
+    assert events[-1].stage == 'sum'
+    
+    with pytest.raises(PipelineError):
+        PipelineExecutor([Stage('x', len, depends_on=['y']), Stage('y', len, depends_on=['x'])])
+
+
+def test_analysis_pipeline_latency_is_max_not_sum_of_stages():
+    class Slow:
+        def ensemble_predict(self, text):
+            time.sleep(0.2)
+            return 'prediction'
+        
+        def extract_entities(self, text):
+            return ['Earth']
+        
+        def verify_against_knowledge(self, text, entities):
+            time.sleep(0.2)
+            return entities
+        
+        def verify_claim(self, text):
+            time.sleep(0.2)
+            return {'verdict': 'false'}
+        
+        def generate_explanation(self, prediction, text):
+            return f"explained {prediction}"
+    
+    component = Slow()
+    pipeline = AnalysisPipeline(component, component, component, component)
+    results = pipeline.analyze('The Earth is flat', {'knowledge_graph': True, 'multi_source': True,
+                                                     'deep_analysis': True})
+    
+    assert results['latency'] < 0.35
+    assert results['knowledge_evidence'] == ['Earth']
+    assert results['explanation'] == 'explained prediction'
+    assert set(results['timings']) == {'ai_analysis', 'entities', 'knowledge_evidence', 'multi_source', 'explanation'}
+
+
+def test_verification_service_batches_streams_and_sheds_load():
+    release = threading.Event()
+    
+    class Model:
+        calls = 0
+        
+        def ensemble_predict(self, text):
+            Model.calls += 1
+            if text == 'block':
+                release.wait(2)
+            return {'verdict': 'false', 'text': text}
+    
+    async def scenario():
+        app = create_app(AnalysisPipeline(Model()), max_concurrency=1, max_queue=1)
+        async with TestClient(TestServer(app)) as client:
+            response = await client.post('/v1/verify', json={'text': 'The Earth is flat'})
+            assert (await response.json())['ai_analysis']['verdict'] == 'false'
+            
+            response = await client.post('/v1/verify/batch', json={'claims': ['b', 'a', 'b']})
+            results = (await response.json())['results']
+            assert [result['text'] for result in results] == ['b', 'a', 'b']
+            assert Model.calls == 3
+            
+            response = await client.post('/v1/verify/stream', data='{"text": "x"}\n{"text": "y"}\n',
+                                         headers={'Content-Type': 'application/x-ndjson'})
+            lines = [json.loads(line) for line in (await response.text()).splitlines()]
+            assert sorted(line['index'] for line in lines) == [0, 1]
+            
+            # A batch is admitted only if every claim fits in the slots and queue
+            response = await client.post('/v1/verify/batch', json={'claims': ['p', 'q', 'r']})
+            assert response.status == 503 and Model.calls == 5
+            
+            blocked = asyncio.ensure_future(client.post('/v1/verify', json={'text': 'block'}))
+            while (await (await client.get('/health')).json())['in_flight'] == 0:
+                await asyncio.sleep(0.01)
+            queued = asyncio.ensure_future(client.post('/v1/verify', json={'text': 'queued'}))
+            while (await (await client.get('/health')).json())['waiting'] == 0:
+                await asyncio.sleep(0.01)
+            response = await client.post('/v1/verify', json={'text': 'shed'})
+            assert response.status == 503 and response.headers['Retry-After'] == '1'
+            release.set()
+            assert (await blocked).status == 200 and (await queued).status == 200
+            assert (await client.post('/v1/verify', data='not json')).status == 400
+            assert (await client.post('/v1/verify/batch', json=['a'])).status == 400
+            assert (await client.post('/v1/verify/batch', json={'claims': ['a', 3]})).status == 400
+            response = await client.post('/v1/verify', json={'text': 'x', 'options': {'budget_ms': 'soon'}})
+            assert response.status == 400
+            health = await (await client.get('/health')).json()
+            assert health['in_flight'] == 0 and health['waiting'] == 0
+    
+    asyncio.run(scenario())
+
+
+class KeywordModel:
+    """Cheap stand-in for the ensemble, importable by bulk worker processes"""
+    
+    def ensemble_predict_batch(self, texts, batch_size=16):
+        if 'explode' in texts:
+            raise RuntimeError('model crashed')
+        return [type('Prediction', (), {'verdict': 'false' if 'flat' in text else 'true', 'confidence': 0.9,
+                                        'model_used': 'keyword', 'reasoning': '', 'processing_time': 0.0})()
+                for text in texts]
+
+
+def test_bulk_verifier_keeps_input_order_across_workers():
+    claims = [f"claim {i} the earth is {'flat' if i % 3 == 0 else 'round'}" for i in range(50)]
+    lines = [json.dumps({'id': i, 'text': claim}) for i, claim in enumerate(claims)]
+    lines[7] = '{not json'
+    lines[8] = json.dumps({'id': 8, 'text': ' '})
+    source = io.StringIO('\n'.join(lines) + '\n')
+    sink = io.StringIO()
+    
+    stats = BulkVerifier('tests.test_core:KeywordModel', workers=2, batch_size=4).run(source, sink)
+    results = [json.loads(line) for line in sink.getvalue().splitlines()]
+    
+    assert stats['records'] == 50 and stats['errors'] == 2
+    assert [r.get('id') for r in results if r['error'] is None] == [i for i in range(50) if i not in (7, 8)]
+    assert results[0]['verdict'] == 'false' and results[1]['verdict'] == 'true'
+    assert results[7]['line'] == 8 and 'invalid JSON' in results[7]['error']
+    assert all({'line', 'error', *RESULT_FIELDS} <= set(result) for result in results)
+    assert results[8]['verdict'] is None and results[8]['id'] == 8
+    
+    sink = io.StringIO()
+    BulkVerifier('tests.test_core:KeywordModel', workers=1, batch_size=2).run(io.StringIO('"ok"\n"explode"\n'), sink)
+    assert [json.loads(line)['error'] for line in sink.getvalue().splitlines()] == ['model crashed'] * 2
+
+
+def test_background_analysis_exposes_partial_results():
+    release = threading.Event()
+    
+    class Components:
+        def ensemble_predict(self, text):
+            return 'prediction'
+        
+        def verify_claim(self, text):
+            release.wait(2)
+            return {'verdict': 'false'}
+    
+    component = Components()
+    handle = AnalysisPipeline(component, multi_source=component).submit('The Earth is flat', {'multi_source': True})
+    
+    deadline = time.monotonic() + 2
+    while 'ai_analysis' not in handle.snapshot() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert handle.snapshot() == {'ai_analysis': 'prediction'}
+    assert not handle.done() and handle.progress() == (1, 2)
+    
+    release.set()
+    assert handle.result(timeout=2)['multi_source'] == {'verdict': 'false'}
+    assert handle.done() and 'latency' in handle.snapshot()
+
+
+def test_deadline_returns_partial_results_and_records_what_was_skipped():
+    class Components:
+        def ensemble_predict(self, text, deadline=None):
+            return 'prediction'
+        
+        def generate_explanation(self, prediction, text):
+            time.sleep(0.1)
+            return 'explanation'
+    
+    verifier = MultiSourceVerifier(register_defaults=False)
+    verifier.register_source(LocalStandInSource('fast', {'verdict': 'false', 'confidence': 0.9}))
+    verifier.register_source(LocalStandInSource('slow', latency=1.0))
+    component = Components()
+    pipeline = AnalysisPipeline(component, multi_source=verifier, explainable_ai=component)
+    
+    start = time.monotonic()
+    results = pipeline.analyze('The Earth is flat', {'multi_source': True, 'deep_analysis': True, 'budget_ms': 300})
+    assert time.monotonic() - start < 0.6
+    assert results['ai_analysis'] == 'prediction' and results['explanation'] == 'explanation'
+    assert results['multi_source']['sources_checked'] == 1      # partial: the slow source missed the deadline
+    assert results['skipped'] == ['source:slow']
+    
+    results = pipeline.analyze('The Earth is flat', {'multi_source': True, 'deep_analysis': True, 'budget_ms': 0})
+    assert results['ai_analysis'] == 'prediction'       # required stages get a short grace period
+    assert 'explanation' not in results and {'explanation', 'source:slow'} <= set(results['skipped'])
+
+
+def test_identical_submissions_share_one_analysis():
+    release = threading.Event()
+    
+    class Components:
+        calls = 0
+        
+        def ensemble_predict(self, text):
+            Components.calls += 1
+            release.wait(2)
+            return 'prediction'
+    
+    pipeline = AnalysisPipeline(Components())
+    saved_before = get_single_flight_metrics()['shared']
+    first = pipeline.submit('Vaccines cause autism', {})
+    second = AnalysisPipeline(Components()).submit('  vaccines CAUSE autism ', {})
+    other = pipeline.submit('Vaccines cause autism', {'deep_analysis': True})
+    
+    assert second is not first and second.text == '  vaccines CAUSE autism '
+    release.set()
+    assert second.result(timeout=2)['ai_analysis'] == first.result(timeout=2)['ai_analysis'] == 'prediction'
+    other.result(timeout=2)
+    assert Components.calls == 2        # the different options still ran on their own
+    assert get_single_flight_metrics()['shared'] - saved_before == 1
+    assert second.progress() == (1, 1)
+
+
+def test_shared_analysis_follower_keeps_to_its_own_deadline():
+    release = threading.Event()
+    
+    class Slow:
+        def ensemble_predict(self, text):
+            release.wait(2)
+            return 'prediction'
+    
+    pipeline = AnalysisPipeline(Slow())
+    in_flight = get_single_flight_metrics()['in_flight']
+    leader = threading.Thread(target=pipeline.analyze_shared, args=('The moon is made of cheese', {}))
+    leader.start()
+    while get_single_flight_metrics()['in_flight'] == in_flight:
+        time.sleep(0.005)
+    
+    start = time.monotonic()
+    results = pipeline.analyze_shared('the moon is made of CHEESE', {}, deadline=Deadline(0.05))
+    assert time.monotonic() - start < 0.5
+    assert 'ai_analysis' not in results and results['skipped'] == ['ai_analysis']
+    release.set()
+    leader.join(2)
+
+
+def test_prefork_inference_server_shares_one_socket_across_workers(tmp_path):
+    socket_path = str(tmp_path / 'inference.sock')
+    server = subprocess.Popen([sys.executable, '-m', 'src.core.inference_server', '--workers', '2',
+                               '--socket', socket_path, '--model', 'tests.test_core:KeywordModel'])
+    try:
+        client = InferenceClient(socket_path, timeout=5)
+        assert client.wait_ready(timeout=20)
+        
+        predictions = client.ensemble_predict_batch(['the earth is flat', 'the earth is round'])
+        assert [prediction.verdict for prediction in predictions] == ['false', 'true']
+        assert server.pid not in {client.call({'op': 'ping'})['pid'] for _ in range(20)}
+        with pytest.raises(RuntimeError, match='Unknown op'):
+            client.call({'op': 'shutdown'})
+    finally:
+        server.terminate()
+        assert server.wait(timeout=10) == 0
+
+
+def test_inference_node_shares_its_cache_across_workers(tmp_path):
+    socket_path = str(tmp_path / 'inference.sock')
+    server = subprocess.Popen([sys.executable, '-m', 'src.core.inference_server', '--workers', '3',
+                               '--socket', socket_path, '--model', 'tests.test_core:KeywordModel'])
+    try:
+        client = InferenceClient(socket_path, timeout=5)
+        assert client.wait_ready(timeout=20)
+        assert len({client.call({'op': 'ping'})['pid'] for _ in range(6)}) == 3
+        
+        claims = [f"claim {i} the earth is flat" for i in range(10)]
+        for claim in claims + claims:                   # each call is a new connection
+            assert client.ensemble_predict(claim).verdict == 'false'
+        assert client.call({'op': 'metrics'})['cache']['hit_ratio'] == 0.5
+    finally:
+        server.terminate()
+        assert server.wait(timeout=10) == 0
+
+
+def test_bulk_work_and_interactive_calls_share_the_inference_servers_scheduler(tmp_path, monkeypatch):
+    socket_path = str(tmp_path / 'inference.sock')
+    server = subprocess.Popen([sys.executable, '-m', 'src.core.inference_server', '--workers', '2',
+                               '--socket', socket_path, '--model', 'tests.test_core:KeywordModel'])
+    try:
+        monkeypatch.setenv('NEXUS_INFERENCE_SOCKET', socket_path)
+        model = load_bulk_model('tests.test_core:NoSuchModel')     # never loaded locally
+        assert isinstance(model, InferenceClient) and model.wait_ready(timeout=20)
+        
+        batch = [(1, {'text': 'the earth is flat'}, 'the earth is flat'), (2, {'text': 'x'}, 'the sky is blue')]
+        assert [record['verdict'] for record in verify_records(model, batch)] == ['false', 'true']
+        assert model.ensemble_predict('the moon is round').verdict == 'true'
+        
+        scheduler = model.call({'op': 'metrics'})['scheduler']
+        assert scheduler[BULK]['completed'] == 1 and scheduler[INTERACTIVE]['completed'] == 1
+    finally:
+        server.terminate()
+        assert server.wait(timeout=10) == 0
+
+
+def test_hash_ring_moves_only_the_new_nodes_share():
+    keys = [hash64(f"claim {i}") for i in range(5000)]
+    ring = HashRing(['a', 'b', 'c'])
+    before = [ring.lookup(key) for key in keys]
+    ring.add('d')
+    after = [ring.lookup(key) for key in keys]
+    
+    moved = [(old, new) for old, new in zip(before, after) if old != new]
+    assert all(new == 'd' for _, new in moved)
+    assert 0.15 < len(moved) / len(keys) < 0.35
+
+
+def test_router_keeps_claims_on_their_node_and_fails_over(tmp_path):
+    nodes = [str(tmp_path / f"node{i}.sock") for i in range(3)]
+    servers = [subprocess.Popen([sys.executable, '-m', 'src.core.inference_server', '--workers', '1',
+                                 '--socket', node, '--model', 'tests.test_core:KeywordModel']) for node in nodes]
+    try:
+        assert all(InferenceClient(node).wait_ready(timeout=20) for node in nodes)
+        router = ShardedInferenceRouter(nodes, timeout=5)
+        claims = [f"claim {i} the earth is flat" for i in range(30)]
+        
+        router.ensemble_predict_batch(claims)
+        router.ensemble_predict_batch(claims)
+        hits = sum(InferenceClient(node).call({'op': 'metrics'})['cache']['hit_ratio'] for node in nodes)
+        assert hits == 1.5                              # every repeat was a cache hit on its own node
+        
+        owners = {claim: router.node_for(claim) for claim in claims}
+        dead = owners[claims[0]]
+        servers[nodes.index(dead)].terminate()
+        servers[nodes.index(dead)].wait(timeout=10)
+        
+        predictions = router.ensemble_predict_batch(claims)
+        assert [p.verdict for p in predictions] == ['false'] * 30
+        assert not router.get_status()[dead]['healthy']
+        assert all(router.node_for(claim) == owner for claim, owner in owners.items() if owner != dead)
+        assert router.check_health()[dead] is False
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait(timeout=10)
+
+
+def test_scheduler_serves_interactive_ahead_of_queued_bulk_and_sheds_when_full():
+    scheduler = InferenceScheduler(capacity=2, classes=[
+        PriorityClass(INTERACTIVE, weight=4.0, max_queue=4),
+        PriorityClass(BULK, weight=1.0, max_concurrency=1, max_queue=4)
+    ])
+    bulk_gate, interactive_gate = threading.Event(), threading.Event()
+    order = []
+    
+    def wait_for(condition):
+        deadline = time.monotonic() + 2
+        while not condition(scheduler.get_status()) and time.monotonic() < deadline:
+            time.sleep(0.005)
+    
+    threads = [threading.Thread(target=scheduler.run, args=(BULK, bulk_gate.wait, 2))]
+    threads[0].start()
+    wait_for(lambda status: status[BULK]['running'] == 1)
+    
+    # Bulk may hold only one slot, so the second slot stays free for interactive calls
+    scheduler.run(INTERACTIVE, order.append, 'first')
+    threads.append(threading.Thread(target=scheduler.run, args=(INTERACTIVE, interactive_gate.wait, 2)))
+    threads[-1].start()
+    wait_for(lambda status: status[INTERACTIVE]['running'] == 1)
+    
+    for name in [(BULK, i) for i in range(4)] + [(INTERACTIVE, i) for i in range(2)]:
+        threads.append(threading.Thread(target=scheduler.run, args=(name[0], order.append, name)))
+        threads[-1].start()
+        queued = len(threads) - 2
+        wait_for(lambda status: status[BULK]['queued'] + status[INTERACTIVE]['queued'] == queued)
+    with pytest.raises(SchedulerBusyError):
+        scheduler.run(BULK, order.append, 'shed')
+    
+    # One slot frees up: weighted fair queuing picks the interactive calls before the earlier bulk ones
+    bulk_gate.set()
+    wait_for(lambda status: status[BULK]['completed'] == 5)
+    interactive_gate.set()
+    for thread in threads:
+        thread.join(2)
+    assert [priority for priority, _ in order[1:]] == [INTERACTIVE, INTERACTIVE, BULK, BULK, BULK, BULK]
+    
+    status = scheduler.get_status()
+    assert status[BULK]['rejected'] == 1 and status[BULK]['completed'] == 5
+    assert status[BULK]['max_wait_ms'] > status[INTERACTIVE]['avg_wait_ms']
+
+
+def test_scheduler_busy_is_answered_with_503_not_a_stage_error():
+    class Saturated:
+        def ensemble_predict(self, text):
+            raise SchedulerBusyError('Inference is busy: the interactive queue is full')
+    
+    async def scenario():
+        async with TestClient(TestServer(create_app(AnalysisPipeline(Saturated())))) as client:
+            response = await client.post('/v1/verify', json={'text': 'The Earth is flat'})
+            assert response.status == 503 and response.headers['Retry-After'] == '1'
+            response = await client.post('/v1/verify/batch', json={'claims': ['a']})
+            assert (await response.json())['results'][0]['status'] == 503
+    
+    asyncio.run(scenario())
+
+
+def test_scheduler_admits_into_free_slots_and_forgets_timed_out_calls():
+    scheduler = InferenceScheduler(capacity=1, classes=[PriorityClass(INTERACTIVE, max_queue=0),
+                                                        PriorityClass(BULK, max_queue=1)])
+    assert scheduler.run(INTERACTIVE, lambda: 'ran') == 'ran'
+    
+    ticket = scheduler.acquire(INTERACTIVE)
+    with pytest.raises(SchedulerBusyError):
+        scheduler.acquire(INTERACTIVE)
+    for _ in range(3):
+        with pytest.raises(SchedulerBusyError):
+            scheduler.acquire(BULK, timeout=0.01)
+    scheduler.release(ticket)
+    assert scheduler.get_status()[BULK]['timed_out'] == 3
+    assert scheduler._last_finish[BULK] <= scheduler._virtual_time + 1.0
+
+
+def test_router_keeps_a_slow_node_on_the_ring(tmp_path):
+    path = str(tmp_path / 'slow.sock')
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+        listener.bind(path)
+        listener.listen(8)                              # accepts connections but never answers
+        router = ShardedInferenceRouter([path], timeout=0.1)
+        
+        with pytest.raises(InferenceTimeoutError):
+            router.ensemble_predict('The Earth is flat')
+        assert router.check_health() == {path: None}
+        assert router.get_status()[path]['healthy'] and router.get_status()[path]['timeouts'] == 1
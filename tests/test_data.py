@@ -0,0 +1,409 @@
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import requests
+
+from src.api.fact_check_api import FactCheckAPI
+from src.data.claim_review_index import ClaimReviewIndex
+from src.data.database import AnalysisDatabase
+from src.data.export import HistoryExporter
+from src.data.jobs import MAX_CHUNK_ATTEMPTS, JobQueue, JobWorker, scan_chunks
+from src.data.migrations import SCHEMA_VERSION, get_schema_version
+from src.data.partitions import MaintenanceScheduler, month_start_ms
+from src.data.write_behind import WriteBehindQueue
+
+
+def _write_jsonl(path, items):
+    path.write_text('\n'.join(json.dumps(item) for item in items))
+
+
+def _review(claim, rating, url, date):
+    return {
+        'claimReviewed': claim,
+        'reviewRating': {'alternateName': rating},
+        'url': url,
+        'author': {'name': 'FactCheck.org'},
+        'datePublished': date
+    }
+
+
+def test_claim_review_sync_is_incremental(tmp_path):
+    export = tmp_path / 'reviews.jsonl'
+    index = ClaimReviewIndex(str(tmp_path / 'index.db'))
+    _write_jsonl(export, [
+        _review('Vaccines cause autism in children', 'False', 'https://a/1', '2024-01-01'),
+        _review('The moon landing was staged in a studio', 'False', 'https://a/2', '2024-02-01'),
+    ])
+    
+    first = index.sync_jsonl(str(export), feed='export')
+    assert first['ingested'] == 2
+    assert first['high_water_mark'] == '2024-02-01T00:00:00Z'
+    
+    _write_jsonl(export, [
+        _review('Vaccines cause autism in children', 'False', 'https://a/1', '2024-01-01'),
+        _review('The moon landing was staged in a studio', 'Pants on Fire', 'https://a/2', '2024-02-01'),
+        _review('Drinking bleach cures covid', 'False', 'https://a/3', '2024-03-01'),
+    ])
+    second = index.sync_jsonl(str(export), feed='export')
+    
+    assert second['skipped'] == 1
+    assert second['ingested'] == 2
+    assert index.get_stats()['reviews'] == 3
+    assert index.search('moon landing staged')[0]['rating'] == 'Pants on Fire'
+
+
+def test_claim_review_sync_compares_review_dates_in_utc(tmp_path):
+    index = ClaimReviewIndex(str(tmp_path / 'index.db'))
+    index.sync([_review('Bananas are radioactive', 'Mixture', 'https://a/1', '2024-03-01T10:00:00+02:00')],
+               feed='feed')
+    assert index.get_high_water_mark('feed') == '2024-03-01T08:00:00Z'
+    
+    result = index.sync([
+        _review('Coffee stunts your growth', 'False', 'https://a/2', '2024-03-01T09:00:00Z'),
+        _review('Goldfish have three second memories', 'False', 'https://a/3', ''),
+        _review('Lightning never strikes twice', 'False', 'https://a/4', '2024-02-29'),
+    ], feed='feed')
+    
+    assert (result['ingested'], result['skipped']) == (2, 1)
+    assert result['high_water_mark'] == '2024-03-01T09:00:00Z'
+    assert index.search('goldfish memories')[0]['url'] == 'https://a/3'
+
+
+def test_claim_review_search_finds_near_duplicates_and_term_matches(tmp_path):
+    index = ClaimReviewIndex(str(tmp_path / 'index.db'))
+    index.sync([
+        _review('Vaccines cause autism in young children', 'False', 'https://a/1', '2024-01-01'),
+        _review('Climate change is driven by human activity', 'True', 'https://a/2', '2024-01-02'),
+    ], feed='test')
+    
+    exact = index.search('vaccines cause autism in young children!')
+    assert exact[0]['near_duplicate']
+    assert exact[0]['rating'] == 'False'
+    
+    partial = index.search('Is climate change caused by human activity?')
+    assert partial[0]['rating'] == 'True'
+    assert not partial[0]['near_duplicate']
+
+
+def test_fact_check_api_answers_from_local_index(tmp_path):
+    index = ClaimReviewIndex(str(tmp_path / 'index.db'))
+    index.sync([_review('The earth is flat', 'False', 'https://a/flat', '2024-01-01')], feed='test')
+    
+    api = FactCheckAPI(claim_index=index)
+    
+    assert api.check_google_fact_check('the Earth is flat')[0]['url'] == 'https://a/flat'
+
+
+def test_fact_check_api_does_not_cache_failed_lookups():
+    class FlakyHTTP:
+        calls = 0
+        
+        def get_json(self, url, params=None):
+            FlakyHTTP.calls += 1
+            if FlakyHTTP.calls == 1:
+                raise requests.ConnectionError('unreachable')
+            return {'claims': [{'text': params['query'], 'claimReview': [{'textualRating': 'False'}]}]}
+    
+    api = FactCheckAPI(http_client=FlakyHTTP(), claim_index=None)
+    api.google_api_key = 'key'
+    
+    assert api.get_credibility_score('The moon is cheese')['fact_check_rating'] == 'Unrated'
+    assert api.get_credibility_score('The moon is cheese')['fact_check_rating'] == 'False'
+    assert api.get_credibility_score('The moon is cheese')['fact_check_rating'] == 'False'
+    assert FlakyHTTP.calls == 2
+
+
+def test_database_reuses_wal_connection_per_thread(tmp_path):
+    db = AnalysisDatabase(str(tmp_path / 'history.db'))
+    
+    assert db._connection() is db._connection()
+    assert db._connection().execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    
+    def writer(n):
+        for i in range(50):
+            db.save_analysis(f"claim {n}-{i}", 'true', 0.9, 'test')
+    
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert db.get_analytics()['total_analyses'] == 200
+    assert len(db._connections) == 5
+
+
+def test_enqueued_analyses_are_flushed_in_batches(tmp_path):
+    db = AnalysisDatabase(str(tmp_path / 'history.db'))
+    
+    for i in range(2000):
+        db.enqueue_analysis(f"claim {i}", 'false', 0.8, 'test')
+    assert db.flush(timeout=10)
+    
+    metrics = db.get_write_metrics()
+    assert metrics['flushed'] == 2000
+    assert metrics['batches'] < 100
+    assert db.get_analytics()['total_analyses'] == 2000
+    
+    db.enqueue_analysis('last claim', 'true', 0.9, 'test')
+    db.close()
+    assert AnalysisDatabase(str(tmp_path / 'history.db')).get_analytics()['total_analyses'] == 2001
+
+
+def test_write_behind_retries_failed_flushes_then_drops_the_batch():
+    written, attempts = [], []
+    
+    def flaky(batch):
+        attempts.append(list(batch))
+        if len(attempts) < 3 or 'poison' in batch:
+            raise sqlite3.OperationalError('database is locked')
+        written.extend(batch)
+    
+    writes = WriteBehindQueue(flaky, max_delay_ms=0, max_retries=2, retry_backoff=0.001)
+    writes.put('a')
+    assert writes.flush(timeout=2)
+    writes.put('poison')
+    assert writes.flush(timeout=2)
+    writes.close()
+    
+    metrics = writes.get_metrics()
+    assert written == ['a'] and len(attempts) == 6
+    assert (metrics['flushed'], metrics['retries'], metrics['failures'], metrics['dropped']) == (1, 4, 5, 1)
+    assert metrics['last_error'] == 'database is locked'
+
+
+def test_analytics_counters_track_inserts(tmp_path):
+    db = AnalysisDatabase(str(tmp_path / 'history.db'))
+    db.save_analysis('a', 'true', 0.9, 'ensemble')
+    db.save_analyses([(1700000000000, 'b', 'false', 0.5, 'ensemble'),
+                      (1700000001000, 'c', 'false', 0.7, 'bert')])
+    
+    analytics = db.get_analytics()
+    assert analytics['total_analyses'] == 3
+    assert analytics['avg_confidence'] == 70.0
+    assert analytics['verdict_distribution'] == [{'verdict': 'false', 'count': 2}, {'verdict': 'true', 'count': 1}]
+    assert db.get_analysis_count_by_model()[0] == {'model_used': 'ensemble', 'count': 2}
+
+
+def test_prediction_payloads_round_trip_as_arrays(tmp_path):
+    db = AnalysisDatabase(str(tmp_path / 'history.db'))
+    result = SimpleNamespace(
+        verdict='false', confidence=0.82, model_used='professional-ensemble', reasoning='Sensational language',
+        probabilities={'deberta': {'true': 0.1, 'false': 0.7, 'misleading': 0.15, 'unverifiable': 0.05},
+                       'bert': {'true': 0.2, 'false': 0.6, 'misleading': 0.1, 'unverifiable': 0.1}},
+        features={'text_length': 42, 'word_count': 8, 'sensationalism_score': 3},
+        processing_time=0.25
+    )
+    db.save_analysis('no payload', 'true', 0.9, 'ensemble')
+    db.save_prediction('Vaccines contain microchips', result)
+    db.enqueue_prediction('Vaccines contain microchips', SimpleNamespace(
+        **{**vars(result), 'probabilities': {'bert': result.probabilities['bert']}}
+    ))
+    db.flush(timeout=10)
+    
+    arrays = db.get_prediction_arrays()
+    assert arrays['models'] == ['deberta', 'bert']
+    assert arrays['probabilities'].shape == (2, 2, 4)
+    assert np.allclose(arrays['probabilities'][:, 1, 1], 0.6)
+    assert np.isclose(arrays['probabilities'][0, 0, 1], 0.7)
+    assert np.isnan(arrays['probabilities'][1, 0]).all()
+    assert np.allclose(arrays['processing_time_ms'], 250.0)
+    assert arrays['features'][0, arrays['feature_names'].index('sensationalism_score')] == 3
+    assert np.isnan(arrays['features'][0, arrays['feature_names'].index('clickbait_score')])
+    assert db.get_analytics()['total_analyses'] == 3
+
+
+def test_search_history_ranks_similar_claims(tmp_path):
+    db = AnalysisDatabase(str(tmp_path / 'history.db'))
+    db.save_analyses([(1000, 'The Earth is flat', 'false', 0.9, 'ensemble'),
+                      (2000, 'the earth is flat!', 'misleading', 0.6, 'ensemble'),
+                      (3000, 'Vaccines cause autism in children', 'false', 0.8, 'ensemble'),
+                      (4000, 'The moon landing was staged on Earth', 'false', 0.7, 'ensemble')])
+    
+    results = db.search_history('Is the earth really flat?')
+    assert [r['statement'] for r in results] == ['The Earth is flat', 'The moon landing was staged on Earth']
+    assert results[0]['analysis_count'] == 2
+    assert results[0]['verdict'] == 'misleading'
+    assert '<mark>flat</mark>' in results[0]['snippet']
+    assert db.search_history('the of and') == []
+
+
+def test_history_export_streams_chunks_incrementally(tmp_path):
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    
+    db = AnalysisDatabase(str(tmp_path / 'history.db'))
+    db.save_analyses([(1700000000000 + i, f"claim {i}", 'false', 0.5, 'ensemble') for i in range(250)])
+    exporter = HistoryExporter(db, chunk_size=100)
+    
+    first = exporter.export(str(tmp_path / 'full.parquet'))
+    assert (first['rows'], first['chunks'], first['to_id']) == (250, 3, 250)
+    table = pq.read_table(str(tmp_path / 'full.parquet'))
+    assert table.num_rows == 250
+    assert pq.ParquetFile(str(tmp_path / 'full.parquet')).num_row_groups == 3
+    
+    assert exporter.export(str(tmp_path / 'empty.parquet'))['rows'] == 0
+    assert not (tmp_path / 'empty.parquet').exists()
+    
+    db.save_analysis('new claim', 'true', 0.9, 'ensemble')
+    delta = exporter.export(str(tmp_path / 'delta.arrow'), fmt='arrow')
+    rows = pa.ipc.open_file(str(tmp_path / 'delta.arrow')).read_all().to_pylist()
+    assert delta['from_id'] == 250
+    assert [row['statement'] for row in rows] == ['new claim']
+    
+    # The archive is walked first, so a backdated row archived there is not the last batch
+    db.save_analysis('newer claim', 'true', 0.9, 'ensemble')
+    db.save_analyses([(1600000000000, 'backdated claim', 'false', 0.5, 'ensemble')])
+    db.partitions.archive_before(month_start_ms(2020, 10))
+    assert exporter.export(str(tmp_path / 'delta2.parquet'))['to_id'] == 253
+    assert exporter.export(str(tmp_path / 'delta3.parquet'))['rows'] == 0
+    
+    exporter.export(str(tmp_path / 'all.arrow'), fmt='arrow', full=True)
+    verdicts = pa.ipc.open_file(str(tmp_path / 'all.arrow')).read_all().column('verdict').to_pylist()
+    assert (verdicts.count('false'), verdicts.count('true')) == (251, 2)
+
+
+def test_history_partitions_archive_and_expire_old_months(tmp_path):
+    db = AnalysisDatabase(str(tmp_path / 'history.db'))
+    db.save_analyses([(month_start_ms(2025, month) + i, f"claim {i}", 'false', 0.5, 'ensemble')
+                      for month in (1, 2, 9, 10) for i in range(10)])
+    scheduler = MaintenanceScheduler(db, hot_days=20, retention_days=200)
+    
+    report = scheduler.run_once(now_ms=month_start_ms(2025, 10) + 25 * 24 * 3600 * 1000)
+    assert report['archived'] == {'2025-01': 10, '2025-02': 10, '2025-09': 10}
+    assert report['dropped'] == {'2025-01': 10, '2025-02': 10}
+    
+    conn = db._connection()
+    assert conn.execute('SELECT COUNT(*) FROM analysis_history').fetchone()[0] == 10
+    assert conn.execute('SELECT COUNT(*) FROM analysis_history_all').fetchone()[0] == 20
+    assert [p['partition'] for p in db.partitions.list_partitions()] == ['2025-09']
+    assert db.get_analytics()['total_analyses'] == 20
+    assert db.search_history('claim 3')[0]['analysis_count'] == 2
+    assert len(db.get_recent_analyses(15)) == 15
+
+
+def test_archiving_in_one_process_is_seen_by_anothers_connections(tmp_path, monkeypatch):
+    app_db = AnalysisDatabase(str(tmp_path / 'history.db'))
+    app_db.save_analyses([(month_start_ms(2025, month), f"claim {month}", 'false', 0.5, 'ensemble')
+                          for month in (1, 6)])
+    assert app_db._connection().execute('SELECT COUNT(*) FROM analysis_history_all').fetchone()[0] == 2
+    
+    cli_db = AnalysisDatabase(str(tmp_path / 'history.db'))
+    assert cli_db.partitions.archive_before(month_start_ms(2025, 6)) == {'2025-01': 1}
+    
+    conn = app_db._connection()
+    assert conn.execute('SELECT COUNT(*) FROM analysis_history').fetchone()[0] == 1
+    assert conn.execute('SELECT COUNT(*) FROM analysis_history_all').fetchone()[0] == 2
+    
+    # A run that stops between copying a chunk and deleting it keeps the rows; the next run finishes the move
+    def interrupted(*args):
+        raise sqlite3.DatabaseError('interrupted')
+    monkeypatch.setattr(cli_db.partitions, '_check_copied', interrupted)
+    with pytest.raises(sqlite3.DatabaseError):
+        cli_db.partitions.archive_before(month_start_ms(2025, 7))
+    assert conn.execute('SELECT COUNT(*) FROM analysis_history').fetchone()[0] == 1
+    monkeypatch.undo()
+    assert cli_db.partitions.archive_before(month_start_ms(2025, 7)) == {'2025-06': 1}
+    conn = app_db._connection()
+    assert conn.execute('SELECT COUNT(*) FROM analysis_history').fetchone()[0] == 0
+    assert conn.execute('SELECT COUNT(*) FROM analysis_history_all').fetchone()[0] == 2
+
+
+def test_legacy_database_is_migrated_to_typed_schema(tmp_path):
+    path = str(tmp_path / 'history.db')
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE analysis_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, statement TEXT NOT NULL,
+            verdict TEXT NOT NULL, confidence REAL NOT NULL, model_used TEXT NOT NULL
+        )
+    ''')
+    conn.executemany(
+        'INSERT INTO analysis_history (timestamp, statement, verdict, confidence, model_used) VALUES (?, ?, ?, ?, ?)',
+        [('2024-01-01T10:00:00', 'The Earth is flat', 'false', 0.9, 'ensemble'),
+         ('2024-01-02T10:00:00', 'the earth is flat!', 'false', 0.8, 'ensemble')]
+    )
+    conn.commit()
+    conn.close()
+    
+    db = AnalysisDatabase(path)
+    db.save_analysis('Water is wet', 'true', 0.7, 'ensemble')
+    
+    conn = db._connection()
+    assert get_schema_version(conn) == SCHEMA_VERSION
+    assert db.get_analytics()['total_analyses'] == 3
+    recent = db.get_recent_analyses(limit=2)
+    assert [r['statement'] for r in recent] == ['Water is wet', 'the earth is flat!']
+    assert recent[1]['timestamp_ms'] == int(datetime(2024, 1, 2, 10).timestamp() * 1000)
+    assert conn.execute('SELECT COUNT(*) FROM claims').fetchone()[0] == 2
+    plan = conn.execute('EXPLAIN QUERY PLAN SELECT * FROM analysis_history ORDER BY timestamp_ms DESC LIMIT 5')
+    assert 'idx_history_time' in ' '.join(str(row) for row in plan)
+
+
+class _KeywordModel:
+    def ensemble_predict(self, text):
+        return SimpleNamespace(verdict='false' if 'flat' in text else 'true', confidence=0.9,
+                               model_used='stub', reasoning='', processing_time=0.0)
+
+
+def test_job_queue_resumes_after_a_worker_dies(tmp_path):
+    source = tmp_path / 'claims.jsonl'
+    lines = [json.dumps({'id': i, 'text': f"claim {i} the earth is {'flat' if i % 2 else 'round'}"})
+             for i in range(22)]
+    lines.insert(5, '')
+    source.write_text('\n'.join(lines) + '\n')
+    database = AnalysisDatabase(str(tmp_path / 'history.db'))
+    
+    queue = JobQueue(database, lease_ms=50)
+    job_id = queue.submit(str(source), chunk_records=5)
+    crashed = JobWorker(queue, _KeywordModel(), worker_id='crashed')
+    assert crashed.run_once()                                     # plans the job
+    assert queue.claim('crashed')['chunk']['chunk'] == 0           # then dies holding chunk 0
+    assert queue.get_status(job_id)['total_chunks'] == 5
+    
+    time.sleep(0.06)
+    JobWorker(JobQueue(database), _KeywordModel(), worker_id='survivor').run(idle_timeout=0)
+    
+    status = queue.get_status(job_id)
+    results = [json.loads(line) for line in open(status['output_path'])]
+    assert status['status'] == 'completed' and status['progress'] == 1.0
+    assert [r['id'] for r in results] == list(range(22))
+    assert results[1]['verdict'] == 'false' and results[2]['verdict'] == 'true'
+    assert not queue.renew('crashed', job_id, 0)
+
+
+def test_chunk_whose_leases_keep_expiring_fails_the_job(tmp_path):
+    source = tmp_path / 'claims.jsonl'
+    source.write_text('\n'.join(json.dumps({'text': f"claim {i}"}) for i in range(3)) + '\n')
+    database = AnalysisDatabase(str(tmp_path / 'history.db'))
+    queue = JobQueue(database, lease_ms=1)
+    job_id = queue.submit(str(source), chunk_records=5)
+    assert JobWorker(queue, _KeywordModel(), worker_id='planner').run_once()
+    
+    for attempt in range(MAX_CHUNK_ATTEMPTS):
+        time.sleep(0.005)
+        assert queue.claim(f"stalled-{attempt}")['chunk']['chunk'] == 0
+    time.sleep(0.005)
+    
+    assert queue.claim('next') is None
+    status = queue.get_status(job_id)
+    assert status['status'] == 'failed' and 'lease expired' in status['error']
+
+
+def test_csv_chunks_never_split_quoted_records(tmp_path):
+    source = tmp_path / 'claims.csv'
+    source.write_text('id,text\n1,"multi\nline claim"\n2,second\n3,third\n', newline='')
+    
+    fieldnames, chunks = scan_chunks(str(source), 'csv', 'text', 2)
+    
+    assert fieldnames == ['id', 'text']
+    assert [(first_line, count) for _, first_line, count in chunks] == [(2, 2), (4, 1)]
+    with open(source, 'rb') as f:
+        f.seek(chunks[1][0])
+        assert f.read() == b'3,third\n'
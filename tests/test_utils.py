@@ -0,0 +1,90 @@
+import threading
+import time
+
+from src.utils.cache import SingleFlight, StaleWhileRevalidateCache
+from src.utils.http_client import PooledHTTPClient
+
+
+def test_pooled_client_reuses_keep_alive_connection(stub_server):
+    stub_server.routes['/ping'] = lambda query: (200, {'pong': query.get('n')})
+    client = PooledHTTPClient()
+    
+    for n in range(5):
+        assert client.get_json(f"{stub_server.url}/ping", params={'n': n}) == {'pong': str(n)}
+    
+    stats = client.get_stats()
+    assert stats['connections_opened'] == 1
+    assert stats['hosts'][stub_server.url]['connections_reused'] == 4
+
+
+def test_pooled_client_retries_transient_errors(stub_server):
+    statuses = iter([503, 503, 200])
+    stub_server.routes['/flaky'] = lambda query: (next(statuses), {'ok': True})
+    client = PooledHTTPClient(backoff_factor=0)
+    
+    assert client.get_json(f"{stub_server.url}/flaky") == {'ok': True}
+    assert stub_server.hits['/flaky'] == 3
+    assert client.retry.is_retry('GET', 503) and not client.retry.is_retry('POST', 503)
+
+
+def test_stale_entry_is_served_while_refreshing_in_background():
+    clock = [0.0]
+    cache = StaleWhileRevalidateCache(ttl=10, stale_ttl=100, clock=lambda: clock[0])
+    refreshed = threading.Event()
+    
+    def slow_refresh():
+        refreshed.wait(1)
+        return 'new'
+    
+    cache.put('claim', 'old')
+    assert cache.get_or_load('claim', slow_refresh) == 'old'
+    
+    clock[0] = 15
+    start = time.monotonic()
+    assert cache.get_or_load('claim', slow_refresh) == 'old'   # stale, does not block
+    assert time.monotonic() - start < 0.5
+    refreshed.set()
+    
+    deadline = time.monotonic() + 2
+    while cache.get_metrics()['refreshes'] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.get('claim') == 'new'
+    
+    metrics = cache.get_metrics()
+    assert metrics['stale_hits'] == 1
+    assert metrics['max_staleness'] == 5
+
+
+def test_expired_entry_is_reloaded_synchronously():
+    clock = [0.0]
+    cache = StaleWhileRevalidateCache(ttl=10, stale_ttl=5, clock=lambda: clock[0])
+    cache.put('claim', 'old')
+    
+    clock[0] = 20
+    assert cache.get_or_load('claim', lambda: 'new') == 'new'
+    assert cache.get_metrics()['hit_ratio'] == 0.0
+
+
+def test_single_flight_runs_concurrent_identical_calls_once():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+    
+    def compute():
+        calls.append(1)
+        release.wait(2)
+        return 'verdict'
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.do('claim', compute))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while flights.get_metrics()['calls'] < 5:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    
+    assert results == ['verdict'] * 5 and len(calls) == 1
+    assert flights.get_metrics()['shared'] == 4 and flights.get_metrics()['in_flight'] == 0
+    assert flights.do('claim', lambda: 'fresh') == 'fresh'    # finished calls are not cached